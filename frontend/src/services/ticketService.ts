@@ -1,6 +1,31 @@
 import api from './api';
 import { Ticket, PurchaseTicketRequest } from '../types/tickets';
 
+interface QueueTurn {
+  evento_id: number;
+  turno: number;
+  posicion: number;
+  admitido: boolean;
+  espera_estimada: number | null;
+  token_turno: string;
+  token_admision: string | null;
+}
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Sala de espera: se pide turno para el evento y se consulta hasta ser admitido
+async function waitForAdmission(eventoId: number): Promise<string> {
+  let turn: QueueTurn = (await api.post(`/entradas/entradas/cola/${eventoId}`)).data;
+  while (!turn.admitido || !turn.token_admision) {
+    const waitSeconds = Math.min(Math.max(turn.espera_estimada ?? 1, 1), 10);
+    await sleep(waitSeconds * 1000);
+    turn = (await api.get(`/entradas/entradas/cola/${eventoId}`, {
+      headers: { 'X-Token-Turno': turn.token_turno }
+    })).data;
+  }
+  return turn.token_admision;
+}
+
 export const ticketService = {
   async getMyTickets(): Promise<Ticket[]> {
     const response = await api.get('/entradas/entradas/mis-entradas');
@@ -28,8 +53,11 @@ export const ticketService = {
   },
 
   async purchaseTicket(purchaseData: PurchaseTicketRequest): Promise<void> {
+    const admissionToken = await waitForAdmission(purchaseData.evento_id);
     const response = await api.put(`/entradas/entradas/comprar-entrada-evento/${purchaseData.evento_id}`, {
       cantidad: purchaseData.cantidad
+    }, {
+      headers: { 'X-Token-Admision': admissionToken }
     });
     return response.data;
   },
@@ -55,9 +83,12 @@ export const ticketService = {
   },
 
   async purchaseTickets(eventoId: number, entradas: any[]): Promise<any> {
+    const admissionToken = await waitForAdmission(eventoId);
     const response = await api.post('/entradas/entradas/comprar', {
       evento_id: eventoId,
       entradas: entradas
+    }, {
+      headers: { 'X-Token-Admision': admissionToken }
     });
     return response.data;
   }
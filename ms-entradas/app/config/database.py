@@ -1,14 +1,86 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from app.config.reintentos import reintentar
 from app.config.settings import settings
 
 engine = create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+def get_async_database_url() -> str:
+    """URL del motor asíncrono: DATABASE_ASYNC_URL o DATABASE_URL con el driver asyncpg"""
+    if settings.DATABASE_ASYNC_URL:
+        return settings.DATABASE_ASYNC_URL
+    esquema, resto = settings.DATABASE_URL.split("://", 1)
+    return f"{esquema.split('+')[0]}+asyncpg://{resto}"
+
+# Motor asíncrono para los endpoints de compra y listado: las consultas se esperan en el
+# bucle de eventos en lugar de ocupar un hilo del threadpool por petición.
+async_engine = create_async_engine(get_async_database_url())
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+class SesionHistorica(Session):
+    """
+    Sesión de sólo lectura para listados públicos: cada transacción lee AS OF SYSTEM TIME,
+    así la puede atender cualquier réplica en lugar del leaseholder de los rangos que se
+    están comprando. Los datos pueden tener unos segundos de antigüedad.
+    """
+
+def marca_lectura_historica() -> str:
+    if settings.LECTURAS_ANTIGUEDAD:
+        return "'" + settings.LECTURAS_ANTIGUEDAD.replace("'", "") + "'"
+    return "follower_read_timestamp()"
+
+@event.listens_for(SesionHistorica, "after_begin")
+def _leer_en_el_pasado(session, transaction, connection):
+    # Sólo CockroachDB entiende AS OF SYSTEM TIME; con el ajuste apagado es una sesión normal
+    if settings.LECTURAS_HISTORICAS and connection.dialect.name == "cockroachdb":
+        connection.exec_driver_sql(f"SET TRANSACTION AS OF SYSTEM TIME {marca_lectura_historica()}")
+
+SessionLecturaLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=SesionHistorica)
+AsyncSessionLecturaLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False, sync_session_class=SesionHistorica
+)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_db_lectura():
+    """Para endpoints de consulta que toleran datos con unos segundos de retraso (LECTURAS_HISTORICAS)"""
+    async with AsyncSessionLecturaLocal() as db:
+        yield db
+
+def ejecutar_transaccion(db: Session, operacion, max_intentos: int = None, nombre: str = "transaccion"):
+    """
+    Ejecuta operacion(db) y confirma la transacción.
+    Cualquier excepción deshace la transacción completa; ante un conflicto de serialización hace rollback y vuelve a ejecutar la operación.
+    """
+    @reintentar(nombre, max_intentos)
+    def _transaccion(db: Session):
+        resultado = operacion(db)
+        db.commit()
+        return resultado
+
+    return _transaccion(db)
+
+async def ejecutar_transaccion_async(db: AsyncSession, operacion, max_intentos: int = None, nombre: str = "transaccion"):
+    """
+    Equivalente asíncrono de ejecutar_transaccion. operacion recibe la Session síncrona
+    subyacente (AsyncSession.run_sync), así que las mismas unidades de trabajo sirven en ambos caminos.
+    """
+    @reintentar(nombre, max_intentos)
+    async def _transaccion(db: AsyncSession):
+        resultado = await db.run_sync(operacion)
+        await db.commit()
+        return resultado
+
+    return await _transaccion(db)
@@ -0,0 +1,21 @@
+import httpx
+from app.config.settings import settings
+
+# Cliente HTTP compartido hacia ms-eventos: mantiene conexiones keep-alive entre peticiones
+_cliente_eventos = None
+
+def get_cliente_eventos() -> httpx.AsyncClient:
+    global _cliente_eventos
+    if _cliente_eventos is None or _cliente_eventos.is_closed:
+        _cliente_eventos = httpx.AsyncClient(
+            base_url=settings.EVENTOS_URL,
+            timeout=settings.EVENTOS_TIMEOUT,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        )
+    return _cliente_eventos
+
+async def cerrar_cliente_eventos():
+    global _cliente_eventos
+    if _cliente_eventos is not None:
+        await _cliente_eventos.aclose()
+        _cliente_eventos = None
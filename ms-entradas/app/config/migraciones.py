@@ -0,0 +1,110 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from app.config.settings import settings
+from app.model.entrada_model import Entrada
+from app.model.idempotencia_model import MensajeProcesado, ClaveIdempotencia
+from app.model.outbox_model import MensajeOutbox
+
+# create_all sólo crea tablas nuevas; estos pasos llevan las tablas existentes al esquema actual.
+# Todos son idempotentes y se ejecutan en cada arranque.
+
+# Índices de una sola columna que duplican la clave primaria (versiones anteriores usaban index=True)
+INDICES_REDUNDANTES = (
+    ("entradas", "ix_entradas_id"),
+    ("outbox", "ix_outbox_id"),
+)
+
+# Claves que crecen de forma monótona (unique_rowid, marcas de tiempo): todas las inserciones
+# caen en el último rango. Con DB_HASH_SHARDED se reparten en DB_HASH_BUCKETS rangos.
+PRIMARIAS_SECUENCIALES = ("entradas", "outbox")
+INDICES_SECUENCIALES = (
+    ("reservas", "ix_reservas_expira_en", "expira_en"),
+    ("mensajes_procesados", "ix_mensajes_procesados_procesado_en", "procesado_en"),
+    ("claves_idempotencia", "ix_claves_idempotencia_creado_en", "creado_en"),
+)
+
+def _es_cockroach(engine: Engine) -> bool:
+    return engine.dialect.name == "cockroachdb"
+
+def crear_indices(engine: Engine):
+    """Crea los índices declarados en los modelos si la tabla ya existía sin ellos"""
+    inspector = inspect(engine)
+    for tabla in (Entrada.__table__, MensajeProcesado.__table__, ClaveIdempotencia.__table__):
+        existentes = {indice["name"] for indice in inspector.get_indexes(tabla.name)}
+        for indice in tabla.indexes:
+            if indice.name not in existentes:
+                print(f"🛠️ Creando índice {indice.name}")
+                indice.create(bind=engine)
+
+# Columnas añadidas a tablas que ya existían
+COLUMNAS_NUEVAS = (
+    (MensajeOutbox.__table__, "reclamado_hasta"),
+)
+
+def crear_columnas(engine: Engine):
+    """Añade las columnas nullable declaradas en los modelos si la tabla ya existía sin ellas"""
+    inspector = inspect(engine)
+    for tabla, nombre in COLUMNAS_NUEVAS:
+        if nombre in {columna["name"] for columna in inspector.get_columns(tabla.name)}:
+            continue
+        tipo = tabla.c[nombre].type.compile(dialect=engine.dialect)
+        print(f"🛠️ Añadiendo columna {tabla.name}.{nombre}")
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {tabla.name} ADD COLUMN {nombre} {tipo}"))
+
+def eliminar_indices_redundantes(engine: Engine):
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for tabla, indice in INDICES_REDUNDANTES:
+            if indice in {i["name"] for i in inspector.get_indexes(tabla)}:
+                print(f"🛠️ Eliminando índice redundante {indice}")
+                conn.execute(text(f"DROP INDEX IF EXISTS {tabla}@{indice}"))
+
+def _tiene_shard(conn, tabla: str, columna: str) -> bool:
+    """CockroachDB añade una columna oculta crdb_internal_<columna>_shard_<buckets> por índice hash-sharded"""
+    return conn.execute(text(
+        "SELECT 1 FROM information_schema.columns "
+        "WHERE table_name = :tabla AND column_name LIKE :shard LIMIT 1"
+    ), {"tabla": tabla, "shard": f"crdb_internal_{columna}_shard%"}).first() is not None
+
+def aplicar_hash_sharding(engine: Engine):
+    """
+    Convierte las claves secuenciales en hash-sharded. En CockroachDB 21.2 la función es
+    experimental y hay que habilitarla en la sesión; ALTER PRIMARY KEY reescribe la tabla
+    en segundo plano, por eso sólo se hace con DB_HASH_SHARDED activo.
+    """
+    buckets = settings.DB_HASH_BUCKETS
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            conn.execute(text("SET experimental_enable_hash_sharded_indexes = on"))
+        except DBAPIError:
+            pass  # Versiones >= 22.1: ya no es experimental
+
+        for tabla in PRIMARIAS_SECUENCIALES:
+            if _tiene_shard(conn, tabla, "id"):
+                continue
+            print(f"🛠️ Clave primaria de {tabla} → hash-sharded ({buckets} buckets)")
+            conn.execute(text(
+                f"ALTER TABLE {tabla} ALTER PRIMARY KEY USING COLUMNS (id) "
+                f"USING HASH WITH BUCKET_COUNT = {buckets}"
+            ))
+
+        for tabla, indice, columna in INDICES_SECUENCIALES:
+            if _tiene_shard(conn, tabla, columna):
+                continue
+            print(f"🛠️ Índice {indice} → hash-sharded ({buckets} buckets)")
+            conn.execute(text(f"DROP INDEX IF EXISTS {tabla}@{indice}"))
+            conn.execute(text(
+                f"CREATE INDEX {indice} ON {tabla} ({columna}) USING HASH WITH BUCKET_COUNT = {buckets}"
+            ))
+
+def aplicar_migraciones(engine: Engine):
+    crear_columnas(engine)
+    crear_indices(engine)
+    if not _es_cockroach(engine):
+        return
+    eliminar_indices_redundantes(engine)
+    if settings.DB_HASH_SHARDED:
+        aplicar_hash_sharding(engine)
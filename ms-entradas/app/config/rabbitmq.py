@@ -1,6 +1,6 @@
-import os
-import json
-from typing import Optional, List
+import queue
+import threading
+from typing import Optional
 
 DEFAULT_QUEUES = (
     'entrada_comprada',
@@ -16,92 +16,167 @@ def get_rabbitmq_url():
     from app.config.settings import settings
     return settings.RABBITMQ_URL
 
-def _get_connection():
-    """Obtiene conexión a RabbitMQ con import diferido"""
-    try:
-        import pika
-        url = get_rabbitmq_url()
+class _Canal:
+    """
+    Conexión bloqueante con un canal transaccional (uso exclusivo de un hilo). Con publisher
+    confirms, BlockingConnection espera la confirmación de cada mensaje; en una transacción
+    el broker confirma todo lo publicado con un único tx_commit.
+    """
+
+    def __init__(self, pika, url: str, heartbeat: int):
         parameters = pika.URLParameters(url)
-        return pika.BlockingConnection(parameters)
-    except ImportError as e:
-        print(f"⚠️ pika no disponible: {e}")
-        return None
-    except Exception as e:
-        print(f"⚠️ Error conectando a RabbitMQ: {e}")
-        return None
-
-def _open_channel(connection):
-    """Abre canal y declara colas necesarias"""
-    try:
-        channel = connection.channel()
-        
-        # Declarar todas las colas necesarias
-        for queue_name in DEFAULT_QUEUES:
-            channel.queue_declare(queue=queue_name, durable=True)
-        
-        return channel
-    except Exception as e:
-        print(f"⚠️ Error abriendo canal RabbitMQ: {e}")
-        return None
-
-def publish_message(queue: str, message, queues: Optional[List[str]] = None):
+        parameters.heartbeat = heartbeat
+        parameters.blocked_connection_timeout = 15
+        self.connection = pika.BlockingConnection(parameters)
+        self.channel = self.connection.channel()
+        self.channel.tx_select()
+
+    @property
+    def abierto(self) -> bool:
+        return self.connection.is_open and self.channel.is_open
+
+    def cerrar(self):
+        try:
+            if self.connection.is_open:
+                self.connection.close()
+        except Exception:
+            pass
+
+class PublicadorRabbitMQ:
     """
-    Publica mensaje en RabbitMQ con manejo robusto de errores.
-    
-    Args:
-        queue: Cola principal donde publicar
-        message: Diccionario o string con el mensaje
-        queues: Lista opcional de colas adicionales
+    Publicador persistente y seguro entre hilos.
+    Mantiene un pool de canales abiertos (pika no permite compartir un canal entre hilos),
+    declara las colas una sola vez y espera la confirmación del broker una vez por lote.
+    No retiene mensajes: quien publica (el relay del outbox) ya los tiene persistidos y
+    reintenta los que no se confirmaron.
     """
-    connection = None
-    try:
-        connection = _get_connection()
-        if not connection:
-            print(f"⚠️ No hay conexión RabbitMQ disponible para {queue}")
-            return False
-            
-        channel = _open_channel(connection)
-        if not channel:
-            print(f"⚠️ No se pudo abrir canal para {queue}")
-            return False
-
-        # Preparar mensaje - manejar tanto dict como string
-        if isinstance(message, dict):
-            message_body = json.dumps(message)
-        elif isinstance(message, str):
-            message_body = message
-        else:
-            message_body = str(message)
-        
-        # Lista de colas donde publicar
-        target_queues = [queue]
-        if queues:
-            target_queues.extend(queues)
-        
-        # Publicar en todas las colas especificadas
-        success = True
-        for target_queue in target_queues:
+
+    def __init__(self, tamano_pool: int, heartbeat: int):
+        self._tamano_pool = tamano_pool
+        self._heartbeat = heartbeat
+        self._libres = queue.LifoQueue()
+        self._creados = 0
+        self._lock = threading.Lock()
+        self._colas_declaradas = False
+
+    def _nuevo_canal(self) -> Optional[_Canal]:
+        try:
+            import pika
+            canal = _Canal(pika, get_rabbitmq_url(), self._heartbeat)
+        except ImportError as e:
+            print(f"⚠️ pika no disponible: {e}")
+            return None
+        except Exception as e:
+            print(f"⚠️ Error conectando a RabbitMQ: {e}")
+            return None
+
+        if not self._colas_declaradas:
             try:
-                channel.basic_publish(
-                    exchange='',
-                    routing_key=target_queue,
-                    body=message_body,
-                    properties={'delivery_mode': 2}  # Mensaje persistente
-                )
-                print(f"✅ Mensaje publicado en cola '{target_queue}': {message}")
+                for queue_name in DEFAULT_QUEUES:
+                    canal.channel.queue_declare(queue=queue_name, durable=True)
+                self._colas_declaradas = True
             except Exception as e:
-                print(f"❌ Error publicando en '{target_queue}': {e}")
-                success = False
-        
-        return success
-        
-    except Exception as e:
-        print(f"❌ Error general en publish_message: {e}")
+                print(f"⚠️ Error declarando colas RabbitMQ: {e}")
+                canal.cerrar()
+                return None
+        return canal
+
+    def _tomar_canal(self) -> Optional[_Canal]:
+        """Reutiliza un canal libre; abre uno nuevo si el pool no está lleno o espera a que se libere"""
+        try:
+            canal = self._libres.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                crear = self._creados < self._tamano_pool
+                if crear:
+                    self._creados += 1
+            if crear:
+                canal = self._nuevo_canal()
+                if canal is None:
+                    self._descartar(None)
+                return canal
+            try:
+                canal = self._libres.get(timeout=5)
+            except queue.Empty:
+                return None
+
+        if canal.abierto:
+            return canal
+        # La conexión se cerró (heartbeat, reinicio del broker...): reconectar
+        canal.cerrar()
+        canal = self._nuevo_canal()
+        if canal is None:
+            self._descartar(None)
+        return canal
+
+    def _devolver(self, canal: _Canal):
+        self._libres.put(canal)
+
+    def _descartar(self, canal: Optional[_Canal]):
+        if canal is not None:
+            canal.cerrar()
+        with self._lock:
+            self._creados -= 1
+
+    def _enviar(self, canal: _Canal, cola: str, body: str):
+        import pika
+        canal.channel.basic_publish(
+            exchange='',
+            routing_key=cola,
+            body=body,
+            properties=pika.BasicProperties(delivery_mode=2)  # Mensaje persistente
+        )
+
+    def iniciar(self):
+        """Abre el primer canal y declara las colas al arrancar el servicio"""
+        canal = self._tomar_canal()
+        if canal is None:
+            print("⚠️ RabbitMQ no disponible al iniciar, se reintentará al publicar")
+            return
+        self._devolver(canal)
+        print(f"✅ Publicador RabbitMQ listo (pool de {self._tamano_pool} canales)")
+
+    def publicar_lote(self, mensajes: list) -> bool:
+        """
+        Publica una lista de (cola, body) en una transacción AMQP: el broker confirma todo el lote
+        con un único tx_commit en vez de un ida y vuelta por mensaje. Todo o nada; ante un fallo de
+        conexión reintenta una vez con otro canal (el broker descarta lo no confirmado).
+        """
+        for _ in range(2):
+            canal = self._tomar_canal()
+            if canal is None:
+                break
+            try:
+                for cola, body in mensajes:
+                    self._enviar(canal, cola, body)
+                canal.channel.tx_commit()
+            except Exception as e:
+                print(f"⚠️ Error publicando un lote de {len(mensajes)} mensajes, reconectando: {e}")
+                self._descartar(canal)
+                continue
+            self._devolver(canal)
+            return True
         return False
-        
-    finally:
-        if connection and not connection.is_closed:
+
+    def cerrar(self):
+        while True:
             try:
-                connection.close()
-            except:
-                pass
+                self._libres.get_nowait().cerrar()
+            except queue.Empty:
+                break
+        self._creados = 0
+
+def _crear_publicador() -> PublicadorRabbitMQ:
+    from app.config.settings import settings
+    return PublicadorRabbitMQ(
+        tamano_pool=settings.RABBITMQ_POOL_CANALES,
+        heartbeat=settings.RABBITMQ_HEARTBEAT
+    )
+
+publicador = _crear_publicador()
+
+def iniciar_publicador():
+    publicador.iniciar()
+
+def cerrar_publicador():
+    publicador.cerrar()
@@ -0,0 +1,143 @@
+import asyncio
+import functools
+import inspect
+import random
+import threading
+import time
+from collections import defaultdict
+from sqlalchemy.exc import DBAPIError
+from app.config.settings import settings
+
+def es_error_reintentable(error: Exception) -> bool:
+    """Indica si el error es un conflicto de serialización de CockroachDB (SQLSTATE 40001)"""
+    if not isinstance(error, DBAPIError):
+        return False
+    pgcode = getattr(error.orig, "pgcode", None)
+    return pgcode == "40001" or "restart transaction" in str(error.orig)
+
+def espera_reintento(intento: int) -> float:
+    """Backoff exponencial con jitter completo, acotado por DB_REINTENTO_ESPERA_MAX"""
+    tope = min(settings.DB_REINTENTO_ESPERA_MAX, settings.DB_REINTENTO_ESPERA_BASE * 2 ** intento)
+    return random.uniform(0, tope)
+
+class MetricasReintentos:
+    """Contadores por operación: ejecuciones, reintentos por 40001 y ejecuciones que agotaron el presupuesto"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._datos = defaultdict(lambda: {"ejecuciones": 0, "reintentos": 0, "agotados": 0})
+
+    def registrar(self, nombre: str, reintentos: int, agotado: bool = False):
+        with self._lock:
+            datos = self._datos[nombre]
+            datos["ejecuciones"] += 1
+            datos["reintentos"] += reintentos
+            datos["agotados"] += int(agotado)
+
+    def resumen(self) -> dict:
+        with self._lock:
+            return {nombre: dict(datos) for nombre, datos in self._datos.items()}
+
+metricas_reintentos = MetricasReintentos()
+
+def _debe_reintentar(nombre: str, error: Exception, intento: int, intentos: int) -> bool:
+    if not es_error_reintentable(error):
+        metricas_reintentos.registrar(nombre, intento - 1)
+        return False
+    if intento == intentos:
+        metricas_reintentos.registrar(nombre, intento - 1, agotado=True)
+        print(f"❌ Conflicto de transacción en '{nombre}', reintentos agotados ({intentos})")
+        return False
+    print(f"🔁 Conflicto de transacción en '{nombre}', reintento {intento}/{intentos}")
+    return True
+
+def reintentar(nombre: str = None, max_intentos: int = None):
+    """
+    Decorador para funciones que reciben la sesión como primer argumento y confirman su propia
+    transacción. Ante cualquier error hace rollback; si es un conflicto 40001 espera (con jitter)
+    y vuelve a ejecutar la función completa, hasta DB_MAX_REINTENTOS intentos.
+    Funciona con Session y con AsyncSession (funciones async).
+    """
+    def decorador(funcion):
+        etiqueta = nombre or funcion.__name__
+
+        if inspect.iscoroutinefunction(funcion):
+            @functools.wraps(funcion)
+            async def envoltura_async(db, *args, **kwargs):
+                intentos = max_intentos or settings.DB_MAX_REINTENTOS
+                for intento in range(1, intentos + 1):
+                    try:
+                        resultado = await funcion(db, *args, **kwargs)
+                    except Exception as e:
+                        await db.rollback()
+                        if not _debe_reintentar(etiqueta, e, intento, intentos):
+                            raise
+                        await asyncio.sleep(espera_reintento(intento))
+                        continue
+                    metricas_reintentos.registrar(etiqueta, intento - 1)
+                    return resultado
+            return envoltura_async
+
+        @functools.wraps(funcion)
+        def envoltura(db, *args, **kwargs):
+            intentos = max_intentos or settings.DB_MAX_REINTENTOS
+            for intento in range(1, intentos + 1):
+                try:
+                    resultado = funcion(db, *args, **kwargs)
+                except Exception as e:
+                    db.rollback()
+                    if not _debe_reintentar(etiqueta, e, intento, intentos):
+                        raise
+                    time.sleep(espera_reintento(intento))
+                    continue
+                metricas_reintentos.registrar(etiqueta, intento - 1)
+                return resultado
+        return envoltura
+    return decorador
+
+class _Intento:
+    def __init__(self, reintentos: "Reintentos", numero: int):
+        self._reintentos = reintentos
+        self.numero = numero
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, error, traza):
+        return self._reintentos._terminar(self.numero, error)
+
+class Reintentos:
+    """
+    Forma de context manager para bloques que no se pueden extraer a una función:
+
+        for intento in Reintentos(db, "listener"):
+            with intento:
+                ...
+                db.commit()
+
+    Un conflicto 40001 dentro del bloque hace rollback, espera y repite el bloque;
+    cualquier otro error (o el último intento) se propaga.
+    """
+
+    def __init__(self, db, nombre: str, max_intentos: int = None):
+        self._db = db
+        self._nombre = nombre
+        self._intentos = max_intentos or settings.DB_MAX_REINTENTOS
+        self._terminado = False
+
+    def __iter__(self):
+        for numero in range(1, self._intentos + 1):
+            if self._terminado:
+                return
+            yield _Intento(self, numero)
+
+    def _terminar(self, numero: int, error) -> bool:
+        if error is None:
+            metricas_reintentos.registrar(self._nombre, numero - 1)
+            self._terminado = True
+            return False
+        self._db.rollback()
+        if not _debe_reintentar(self._nombre, error, numero, self._intentos):
+            return False
+        time.sleep(espera_reintento(numero))
+        return True  # Suprime el error: el bucle ejecuta el siguiente intento
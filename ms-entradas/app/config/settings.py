@@ -4,12 +4,91 @@ class Settings(BaseSettings):
     APP_NAME: str = "ms-entradas"
 
     DATABASE_URL: str
+    # URL del motor asíncrono (asyncpg); vacía = se deriva de DATABASE_URL
+    DATABASE_ASYNC_URL: str = ""
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
 
     RABBITMQ_URL: str
     RABBITMQ_QUEUE: str
     RABBITMQ_LISTENER_QUEUE: str
+    RABBITMQ_POOL_CANALES: int = 4  # Conexiones persistentes del publicador
+    RABBITMQ_HEARTBEAT: int = 60
+
+    # Listener de eventos
+    LISTENER_WORKERS: int = 0  # Hilos que procesan mensajes (0 = uno por núcleo)
+    LISTENER_PREFETCH: int = 32  # Mensajes sin confirmar que el broker entrega por adelantado
+    LISTENER_MAX_REINTENTOS: int = 3  # Intentos ante errores de base de datos antes de mandar a la DLQ
+
+    # Outbox transaccional
+    OUTBOX_TAMANO_LOTE: int = 200  # Mensajes publicados por ciclo del relay
+    OUTBOX_INTERVALO: float = 1.0  # Segundos de espera del relay cuando el outbox está vacío
+    OUTBOX_RECLAMO: float = 30.0  # Segundos que un lote reclamado queda reservado a su relay
+
+    # Esquema (app/config/migraciones.py)
+    DB_HASH_SHARDED: bool = False  # Reescribe claves secuenciales como hash-sharded (ALTER PRIMARY KEY, costoso)
+    DB_HASH_BUCKETS: int = 8  # Buckets de los índices hash-sharded
+
+    # Asignación de entradas
+    DB_MAX_REINTENTOS: int = 5  # Reintentos ante conflictos de serialización (40001)
+    DB_REINTENTO_ESPERA_BASE: float = 0.01  # Segundos; la espera máxima se duplica en cada intento
+    DB_REINTENTO_ESPERA_MAX: float = 1.0  # Tope de la espera entre intentos (con jitter)
+    ENTRADAS_SKIP_LOCKED: bool = False  # FOR UPDATE SKIP LOCKED (requiere CockroachDB >= 22.2)
+    COMPRAS_AGRUPADAS: bool = False  # Agrupa las compras de un mismo evento en una transacción por lote
+    COMPRAS_LOTE_ESPERA: float = 0.005  # Segundos que se juntan compras antes de cerrar el lote
+    COMPRAS_LOTE_MAX: int = 100  # Compras por transacción del lote
+
+    # Generación de entradas
+    ENTRADAS_TAMANO_LOTE: int = 1000  # Filas por INSERT/commit al generar entradas de un evento
+    ENTRADAS_MODO_INVENTARIO: str = "materializado"  # 'materializado' o 'perezoso' para eventos nuevos
+    CANCELACION_TAMANO_LOTE: int = 1000  # Filas borradas por transacción al eliminar un evento cancelado
+    ARCHIVO_TAMANO_LOTE: int = 1000  # Entradas movidas a entradas_archivo por transacción al finalizar un evento
+
+    # Sala de espera (control de admisión a las compras)
+    SALA_ESPERA_ACTIVA: bool = False  # Exigir token de admisión en los endpoints de compra (cola en memoria: una sola instancia)
+    SALA_ESPERA_TASA: float = 50.0  # Compradores admitidos por segundo y evento (en cada instancia)
+    SALA_ESPERA_RAFAGA: int = 100  # Compradores que entran sin esperar cuando la cola está vacía
+    SALA_ESPERA_TTL_TURNO: int = 3600  # Validez del token de turno (segundos)
+    SALA_ESPERA_TTL_ADMISION: int = 300  # Tiempo para comprar una vez admitido (segundos); el token sirve para varias compras en ese plazo
+    SALA_ESPERA_CLAVE_FIRMA: str = ""  # Clave de los tokens de turno y admisión; vacía = derivada de SECRET_KEY
+
+    # Reservas temporales
+    RESERVAS_TTL: int = 600  # Segundos que se retienen las entradas reservadas antes de liberarlas
+    RESERVAS_MAX_ENTRADAS: int = 10  # Entradas por reserva
+    RESERVAS_BARRIDO_LOTE: int = 500  # Reservas expiradas liberadas por transacción
+    RESERVAS_BARRIDO_INTERVALO: float = 5.0  # Segundos entre barridos cuando no quedan expiradas
+
+    # Idempotencia (Idempotency-Key de las compras y message_id del listener)
+    IDEMPOTENCIA_RETENCION: int = 86400  # Segundos que se conserva una Idempotency-Key (y su respuesta)
+    MENSAJES_PROCESADOS_RETENCION: int = 604800  # Segundos que se recuerda un message_id del listener; mayor que cualquier reentrega
+    IDEMPOTENCIA_PURGA_LOTE: int = 1000  # Filas borradas por transacción al purgar
+    IDEMPOTENCIA_PURGA_INTERVALO: float = 300.0  # Segundos entre purgas (las hace el barrido de reservas)
+
+    # ms-eventos
+    EVENTOS_URL: str = "http://eventos:8001"
+    EVENTOS_TIMEOUT: float = 5.0
+    EVENTOS_CACHE_TTL: int = 60  # Segundos que se reutiliza un evento consultado; máximo retraso de las demás instancias ante un cambio
+    EVENTOS_CACHE_MAX: int = 1000  # Eventos en cache (LRU)
+
+    # Estadísticas
+    ESTADISTICAS_USAR_ACUMULADO: bool = False  # Mantener y leer la tabla ventas_por_evento
+
+    # Listados
+    ENTRADAS_LIMITE_PAGINA_MAX: int = 1000  # Máximo de filas por página (parámetro limit)
+    ENTRADAS_LOTE_STREAM: int = 500  # Filas por consulta al emitir listados en NDJSON
+    LECTURAS_HISTORICAS: bool = False  # Listados públicos AS OF SYSTEM TIME, servidos por cualquier réplica
+    LECTURAS_ANTIGUEDAD: str = ""  # Antigüedad fija (p. ej. '-5s'); vacía = follower_read_timestamp()
+
+    # Mapa de disponibilidad (bitmap por evento)
+    MAPA_ASIENTOS_TTL: int = 30  # Segundos antes de reconstruir el mapa (cambios hechos por otras instancias)
+    MAPA_ASIENTOS_MAX: int = 200  # Eventos con mapa en memoria (LRU)
+
+    # Control de acceso (check-in)
+    ENTRADAS_CLAVE_FIRMA: str = ""  # Clave HMAC de los códigos de acceso; vacía = derivada de SECRET_KEY
+    CHECKIN_RECARGA: int = 60  # Segundos entre recargas de ingresos y cancelaciones de un evento
+    CHECKIN_EVENTOS_MAX: int = 50  # Eventos con control de acceso en memoria (LRU)
+    CHECKIN_TAMANO_LOTE: int = 500  # Ingresos guardados por transacción
+    CHECKIN_INTERVALO: float = 1.0  # Segundos máximos que un ingreso espera a guardarse
 
     class Config:
         env_file = ".env"
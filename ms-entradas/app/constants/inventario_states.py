@@ -0,0 +1,24 @@
+# Constantes para los estados del inventario de entradas de un evento
+
+class EstadoInventario:
+    GENERANDO = "generando"  # Las entradas se están creando por lotes
+    VENDIBLE = "vendible"    # Generación completa, el evento puede venderse
+    CANCELANDO = "cancelando"  # Evento cancelado, sus entradas se están eliminando por lotes
+    CANCELADO = "cancelado"    # Eliminación terminada
+    ARCHIVANDO = "archivando"  # Evento finalizado, sus entradas se están moviendo a 'entradas_archivo'
+    ARCHIVADO = "archivado"    # Archivado terminado
+
+    TODOS = [GENERANDO, VENDIBLE, CANCELANDO, CANCELADO, ARCHIVANDO, ARCHIVADO]
+
+    CANCELADOS = [CANCELANDO, CANCELADO]
+    FINALIZADOS = [ARCHIVANDO, ARCHIVADO]
+
+    # Estados en los que las entradas del evento ya no se muestran ni se venden
+    RETIRADOS = CANCELADOS + FINALIZADOS
+
+
+class ModoInventario:
+    MATERIALIZADO = "materializado"  # Una fila en 'entradas' por cada plaza desde la publicación
+    PEREZOSO = "perezoso"            # Sólo un contador; las filas se crean al comprar
+
+    TODOS = [MATERIALIZADO, PEREZOSO]
@@ -1,87 +1,310 @@
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.config.database import get_db
-from app.dto.entrada_dto import EntradaResponse
-from app.security.dependencies import get_current_user, require_admin
+from app.config.database import get_db, get_async_db, get_async_db_lectura
+from app.config.reintentos import metricas_reintentos
+from app.config.settings import settings
+from app.dto.entrada_dto import (
+    EntradaResponse,
+    EntradaConEventoResponse,
+    EntradasLoteRequest,
+    DisponibilidadResponse,
+    MapaAsientosResponse,
+    CheckInRequest,
+    CheckInResultado,
+    CompraMultipleRequest,
+    ReservaRequest,
+    ReservaResponse,
+    TurnoResponse
+)
+from app.security.dependencies import get_current_user, require_admin, require_admision
+from app.security.sala_espera import sala_espera
 from app.service.entrada_service import (
-    cancelar_entrada_usuario,
-    comprar_entrada,
-    obtener_mis_entradas,
+    cancelar_entrada_usuario_async,
+    comprar_entrada_async,
+    obtener_mis_entradas_async,
     historial_usuario,
     evento_por_entrada,
-    obtener_disponibles,
-    obtener_no_disponibles,
-    obtener_todas_entradas,
-    obtener_entradas_por_evento,
-    comprar_entradas_multiple,
-    comprar_entrada_por_evento,
-    obtener_estadisticas_ventas
+    eventos_por_entradas,
+    obtener_mis_entradas_con_evento,
+    obtener_disponibles_async,
+    obtener_no_disponibles_async,
+    obtener_todas_entradas_async,
+    obtener_entradas_por_evento_async,
+    comprar_entradas_multiple_async,
+    comprar_entrada_por_evento_async,
+    reservar_entradas_async,
+    confirmar_reserva_async,
+    liberar_reserva_async,
+    obtener_estadisticas_ventas,
+    obtener_disponibilidad,
+    obtener_mapa_asientos,
+    registrar_ingresos,
+    stream_disponibles,
+    stream_no_disponibles,
+    stream_todas_entradas,
+    stream_entradas_por_evento
 )
 
 router = APIRouter()
 
+# Parámetros comunes de los listados: paginación por keyset sobre id y formato de salida
+LimitParam = Query(None, ge=1, le=settings.ENTRADAS_LIMITE_PAGINA_MAX)
+FormatoParam = Query("json", pattern="^(json|ndjson)$")
+# Reintentar una compra con la misma Idempotency-Key devuelve la respuesta original
+IdempotencyKeyParam = Header(None, alias="Idempotency-Key", max_length=255)
+
+def _pagina(response: Response, entradas: list, limit: Optional[int]):
+    """Si la página viene llena, indica en una cabecera el cursor para pedir la siguiente"""
+    if limit is not None and len(entradas) == limit:
+        response.headers["X-Siguiente-After"] = str(entradas[-1].id)
+    return entradas
+
+def _ndjson(filas):
+    return StreamingResponse(filas, media_type="application/x-ndjson")
+
+def _verificar_admision(evento_admitido: Optional[int], evento_id):
+    """El token de admisión sólo sirve para el evento en cuya cola se obtuvo"""
+    if evento_admitido is not None and evento_admitido != evento_id:
+        raise HTTPException(status_code=403, detail="El turno de admisión no corresponde a este evento")
+
+@router.post("/cola/{evento_id}", response_model=TurnoResponse)
+def entrar_cola(evento_id: int, user=Depends(get_current_user)):
+    return sala_espera.entrar(evento_id, user["id"])
+
+@router.get("/cola/{evento_id}", response_model=TurnoResponse)
+def estado_cola(evento_id: int, x_token_turno: str = Header(...), user=Depends(get_current_user)):
+    try:
+        return sala_espera.consultar(evento_id, user["id"], x_token_turno)
+    except ValueError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+
 @router.put("/comprar-entrada/{id}", response_model=EntradaResponse)
-def comprar(id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
+async def comprar(
+    id: int,
+    evento_id: Optional[int] = Query(None, description="Evento de la entrada; obligatorio para plazas virtuales (id negativo)"),
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user),
+    evento_admitido: Optional[int] = Depends(require_admision),
+    idempotency_key: Optional[str] = IdempotencyKeyParam
+):
+    if evento_id is not None:
+        _verificar_admision(evento_admitido, evento_id)
+    else:
+        evento_id = evento_admitido
     try:
-        return comprar_entrada(db, id, user["id"])
+        return await comprar_entrada_async(db, id, user["id"], evento_id, idempotency_key)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/comprar-entrada-evento/{evento_id}", response_model=EntradaResponse)
-def comprar_por_evento(evento_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
+async def comprar_por_evento(
+    evento_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user),
+    evento_admitido: Optional[int] = Depends(require_admision),
+    idempotency_key: Optional[str] = IdempotencyKeyParam
+):
+    _verificar_admision(evento_admitido, evento_id)
     try:
-        return comprar_entrada_por_evento(db, evento_id, user["id"])
+        return await comprar_entrada_por_evento_async(db, evento_id, user["id"], idempotency_key)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/mis-entradas", response_model=list[EntradaResponse])
-def mis_entradas(db: Session = Depends(get_db), user=Depends(get_current_user)):
-    return obtener_mis_entradas(db, user["id"])
+@router.post("/check-in", response_model=list[CheckInResultado])
+def check_in(request: CheckInRequest, _: dict = Depends(require_admin)):
+    """Valida los códigos de acceso escaneados en la puerta; acepta lotes de un mismo lector"""
+    return registrar_ingresos(request.evento_id, request.codigos)
+
+@router.get("/mis-entradas", response_model=list[EntradaConEventoResponse])
+async def mis_entradas(
+    expand: Optional[str] = Query(None, pattern="^evento$"),
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user)
+):
+    if expand == "evento":
+        try:
+            return await obtener_mis_entradas_con_evento(db, user["id"])
+        except ValueError as e:
+            raise HTTPException(status_code=502, detail=str(e))
+    return await obtener_mis_entradas_async(db, user["id"])
 
 @router.get("/historial-usuario/{id}", response_model=list[EntradaResponse])
-def historial(id: int, db: Session = Depends(get_db), _: Depends = Depends(require_admin)):
-    return historial_usuario(db, id)
+def historial(
+    id: int,
+    incluir_archivadas: bool = Query(False, description="Incluir entradas de eventos finalizados (entradas_archivo)"),
+    db: Session = Depends(get_db),
+    _: Depends = Depends(require_admin)
+):
+    return historial_usuario(db, id, incluir_archivadas)
+
+@router.post("/evento-por-entrada/batch")
+async def obtener_eventos_lote(request: EntradasLoteRequest, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await eventos_por_entradas(request.ids, db)
+    except ValueError as e:
+        raise HTTPException(status_code=502, detail=str(e))
 
 @router.get("/evento-por-entrada/{id}")
-async def obtener_evento(id: int, db: Session = Depends(get_db)):
+async def obtener_evento(id: int, db: AsyncSession = Depends(get_async_db)):
     try:
         return await evento_por_entrada(id, db)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 @router.get("/get-disponibles/{evento_id}", response_model=list[EntradaResponse])
-def entradas_disponibles(evento_id: int, db: Session = Depends(get_db)):
-    return obtener_disponibles(db, evento_id)
+async def entradas_disponibles(
+    evento_id: int,
+    response: Response,
+    limit: Optional[int] = LimitParam,
+    after: Optional[int] = None,
+    formato: str = FormatoParam,
+    db: AsyncSession = Depends(get_async_db_lectura)
+):
+    if formato == "ndjson":
+        return _ndjson(stream_disponibles(evento_id))
+    return _pagina(response, await obtener_disponibles_async(db, evento_id, limit, after), limit)
+
+@router.get("/disponibilidad/{evento_id}", response_model=DisponibilidadResponse)
+def disponibilidad(evento_id: int, db: Session = Depends(get_db)):
+    try:
+        return obtener_disponibilidad(db, evento_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.get("/mapa-asientos/{evento_id}", response_model=MapaAsientosResponse)
+def mapa_asientos(
+    evento_id: int,
+    formato: str = Query("base64", pattern="^(base64|binario)$"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Disponibilidad de todas las entradas del evento como bitmap (un bit por entrada).
+    Con If-None-Match y el ETag anterior responde 304 si nada cambió, así se puede consultar seguido.
+    """
+    try:
+        mapa = obtener_mapa_asientos(db, evento_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    etag = mapa["etag"] if formato == "binario" else mapa["etag"][:-1] + '-b64"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    if formato == "binario":
+        headers["X-Total-Entradas"] = str(mapa["total"])
+        headers["X-Disponibles"] = str(mapa["disponibles"])
+        return Response(content=mapa["mapa"], media_type="application/octet-stream", headers=headers)
+    return JSONResponse(
+        content={
+            "evento_id": evento_id,
+            "total": mapa["total"],
+            "disponibles": mapa["disponibles"],
+            "mapa": base64.b64encode(mapa["mapa"]).decode()
+        },
+        headers=headers
+    )
 
 @router.get("/get-nodisponibles/{evento_id}", response_model=list[EntradaResponse])
-def entradas_no_disponibles(evento_id: int, db: Session = Depends(get_db)):
-    return obtener_no_disponibles(db, evento_id)
+async def entradas_no_disponibles(
+    evento_id: int,
+    response: Response,
+    limit: Optional[int] = LimitParam,
+    after: Optional[int] = None,
+    formato: str = FormatoParam,
+    db: AsyncSession = Depends(get_async_db)
+):
+    if formato == "ndjson":
+        return _ndjson(stream_no_disponibles(evento_id))
+    return _pagina(response, await obtener_no_disponibles_async(db, evento_id, limit, after), limit)
 
 
 @router.put("/cancelar/{id}", response_model=EntradaResponse)
-def cancelar_entrada(id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
+async def cancelar_entrada(id: int, db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
     try:
-        return cancelar_entrada_usuario(db, id, user["id"])
+        return await cancelar_entrada_usuario_async(db, id, user["id"])
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/get-todas", response_model=list[EntradaResponse])
-def todas_entradas(db: Session = Depends(get_db), _: Depends = Depends(require_admin)):
-    return obtener_todas_entradas(db)
+async def todas_entradas(
+    response: Response,
+    limit: Optional[int] = LimitParam,
+    after: Optional[int] = None,
+    formato: str = FormatoParam,
+    db: AsyncSession = Depends(get_async_db),
+    _: Depends = Depends(require_admin)
+):
+    if formato == "ndjson":
+        return _ndjson(stream_todas_entradas())
+    return _pagina(response, await obtener_todas_entradas_async(db, limit, after), limit)
 
 @router.get("/get-por-evento/{evento_id}", response_model=list[EntradaResponse])
-def entradas_por_evento(evento_id: int, db: Session = Depends(get_db)):
-    return obtener_entradas_por_evento(db, evento_id)
+async def entradas_por_evento(
+    evento_id: int,
+    response: Response,
+    limit: Optional[int] = LimitParam,
+    after: Optional[int] = None,
+    formato: str = FormatoParam,
+    db: AsyncSession = Depends(get_async_db_lectura)
+):
+    if formato == "ndjson":
+        return _ndjson(stream_entradas_por_evento(evento_id))
+    return _pagina(response, await obtener_entradas_por_evento_async(db, evento_id, limit, after), limit)
 
 @router.post("/comprar")
-def comprar_multiple(request: dict, db: Session = Depends(get_db), user=Depends(get_current_user)):
+async def comprar_multiple(
+    request: CompraMultipleRequest,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user),
+    evento_admitido: Optional[int] = Depends(require_admision),
+    idempotency_key: Optional[str] = IdempotencyKeyParam
+):
+    _verificar_admision(evento_admitido, request.evento_id)
     try:
-        evento_id = request.get("evento_id")
-        entradas = request.get("entradas", [])
-        return comprar_entradas_multiple(db, evento_id, entradas, user["id"])
+        return await comprar_entradas_multiple_async(
+            db, request.evento_id, request.entradas, user["id"], idempotency_key
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/reservar", response_model=ReservaResponse)
+async def reservar(
+    request: ReservaRequest,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user),
+    evento_admitido: Optional[int] = Depends(require_admision),
+    idempotency_key: Optional[str] = IdempotencyKeyParam
+):
+    _verificar_admision(evento_admitido, request.evento_id)
+    try:
+        return await reservar_entradas_async(db, request.evento_id, request.cantidad, user["id"], idempotency_key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.put("/reservas/{reserva_id}/confirmar")
+async def confirmar_reserva(
+    reserva_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user),
+    idempotency_key: Optional[str] = IdempotencyKeyParam
+):
+    try:
+        return await confirmar_reserva_async(db, reserva_id, user["id"], idempotency_key)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.delete("/reservas/{reserva_id}")
+async def liberar_reserva(reserva_id: str, db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
+    try:
+        return await liberar_reserva_async(db, reserva_id, user["id"])
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
 @router.get("/estadisticas-ventas")
 def estadisticas_ventas(db: Session = Depends(get_db), _: dict = Depends(require_admin)):
     """Obtener estadísticas de ventas de entradas"""
@@ -99,3 +322,8 @@ def obtener_entradas_canceladas(
     """Obtener entradas canceladas para administradores"""
     from app.repository.entrada_repository import get_entradas_canceladas
     return get_entradas_canceladas(db, evento_id)
+
+@router.get("/metricas-reintentos")
+def obtener_metricas_reintentos(_: dict = Depends(require_admin)):
+    """Ejecuciones, reintentos por conflicto (40001) y reintentos agotados por operación de escritura"""
+    return metricas_reintentos.resumen()
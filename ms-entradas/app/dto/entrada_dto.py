@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from datetime import datetime
+from pydantic import BaseModel, Field
 from typing import Optional
 
 class EntradaResponse(BaseModel):
@@ -12,3 +13,56 @@ class EntradaResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+class EntradaConEventoResponse(EntradaResponse):
+    evento: Optional[dict] = None
+    codigo_acceso: Optional[str] = None  # Código firmado para la puerta (sólo entradas vendidas)
+
+class CheckInRequest(BaseModel):
+    evento_id: int
+    codigos: list[str] = Field(..., min_length=1, max_length=500)
+
+class CheckInResultado(BaseModel):
+    codigo: str
+    entrada_id: Optional[int]
+    resultado: str  # admitida, usada, cancelada, otro_evento o invalida
+
+class EntradasLoteRequest(BaseModel):
+    ids: list[int] = Field(..., min_length=1, max_length=500)
+
+class MapaAsientosResponse(BaseModel):
+    evento_id: int
+    total: int
+    disponibles: int
+    mapa: str  # Base64 de un bit por entrada en orden de id (1 = disponible)
+
+class DisponibilidadResponse(BaseModel):
+    evento_id: int
+    aforo: int
+    disponibles: int
+    vendidas: int
+    canceladas: int
+    estado: str
+    modo: str
+
+class CompraMultipleRequest(BaseModel):
+    evento_id: Optional[int] = None
+    entradas: list[dict] = Field(default_factory=list)  # [{"entryId": ..., "quantity": n}]
+
+class ReservaRequest(BaseModel):
+    evento_id: int
+    cantidad: int = Field(1, ge=1)
+
+class ReservaResponse(BaseModel):
+    reserva_id: str
+    expira_en: datetime
+    entradas: list[EntradaResponse]
+
+class TurnoResponse(BaseModel):
+    evento_id: int
+    turno: int
+    posicion: int
+    admitido: bool
+    espera_estimada: Optional[float] = None  # Segundos aproximados hasta la admisión
+    token_turno: str
+    token_admision: Optional[str] = None
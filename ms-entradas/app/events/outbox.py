@@ -0,0 +1,75 @@
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, event, or_, select, update
+from sqlalchemy.orm import Session
+from app.config.settings import settings
+from app.model.outbox_model import MensajeOutbox
+
+# Permite despertar al relay justo después de confirmar una transacción con mensajes
+_hay_pendientes = threading.Event()
+
+def encolar_mensaje(db: Session, cola: str, mensaje: dict):
+    """Guarda el mensaje en el outbox dentro de la transacción en curso (sin hacer commit)"""
+    db.add(MensajeOutbox(cola=cola, mensaje=json.dumps(mensaje)))
+    db.info["outbox_pendiente"] = True
+
+# Los savepoints (begin_nested) también disparan after_commit/after_rollback: sólo cuenta la
+# transacción exterior
+
+@event.listens_for(Session, "after_commit")
+def _despertar_relay(db: Session):
+    if db.in_nested_transaction():
+        return
+    if db.info.pop("outbox_pendiente", False):
+        _hay_pendientes.set()
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_aviso(db: Session):
+    if db.in_nested_transaction():
+        return
+    db.info.pop("outbox_pendiente", None)
+
+def esperar_pendientes(timeout: float):
+    _hay_pendientes.wait(timeout)
+    _hay_pendientes.clear()
+
+def reclamar_lote(db: Session, tamano: int):
+    """
+    Reserva hasta 'tamano' mensajes pendientes durante OUTBOX_RECLAMO segundos y devuelve sus
+    (id, cola, mensaje). Las filas sólo quedan bloqueadas en esta transacción corta: mientras dura
+    la reserva otro relay se las salta, y si el relay cae otro las retoma cuando caduque.
+    """
+    ahora = datetime.now(timezone.utc)
+    stmt = (
+        select(MensajeOutbox.id, MensajeOutbox.cola, MensajeOutbox.mensaje)
+        .where(or_(MensajeOutbox.reclamado_hasta.is_(None), MensajeOutbox.reclamado_hasta < ahora))
+        .order_by(MensajeOutbox.id)
+        .limit(tamano)
+    )
+    if settings.ENTRADAS_SKIP_LOCKED:
+        # Varias instancias pueden reclamar lotes a la vez sin pisarse
+        stmt = stmt.with_for_update(skip_locked=True)
+    lote = db.execute(stmt).all()
+    if lote:
+        _marcar_reclamo(db, [fila.id for fila in lote], ahora + timedelta(seconds=settings.OUTBOX_RECLAMO))
+    return lote
+
+def liberar_reclamo(db: Session, ids: list):
+    """Devuelve a pendientes los mensajes que no se llegaron a publicar"""
+    _marcar_reclamo(db, ids, None)
+
+def _marcar_reclamo(db: Session, ids: list, hasta):
+    db.execute(
+        update(MensajeOutbox)
+        .where(MensajeOutbox.id.in_(ids))
+        .values(reclamado_hasta=hasta)
+        .execution_options(synchronize_session=False)
+    )
+
+def eliminar_enviados(db: Session, ids: list):
+    db.execute(
+        delete(MensajeOutbox)
+        .where(MensajeOutbox.id.in_(ids))
+        .execution_options(synchronize_session=False)
+    )
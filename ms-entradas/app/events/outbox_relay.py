@@ -0,0 +1,49 @@
+import time
+from sqlalchemy.exc import SQLAlchemyError
+from app.config.database import SessionLocal, ejecutar_transaccion
+from app.config.rabbitmq import publicador
+from app.config.settings import settings
+from app.events.outbox import reclamar_lote, liberar_reclamo, eliminar_enviados, esperar_pendientes
+
+def relay_lote(db, tamano: int) -> int:
+    """
+    Publica un lote del outbox en tres pasos para no mantener una transacción abierta mientras
+    se habla con el broker: reclama el lote (transacción corta), lo publica con una sola
+    confirmación y borra los mensajes en otra transacción corta. Si la publicación falla el lote
+    vuelve a pendientes y se reintenta completo en el siguiente ciclo, en el mismo orden.
+    """
+    lote = ejecutar_transaccion(db, lambda s: reclamar_lote(s, tamano), nombre="outbox_reclamar")
+    if not lote:
+        return 0
+
+    ids = [fila.id for fila in lote]
+    if not publicador.publicar_lote([(fila.cola, fila.mensaje) for fila in lote]):
+        ejecutar_transaccion(db, lambda s: liberar_reclamo(s, ids), nombre="outbox_liberar")
+        return 0
+
+    ejecutar_transaccion(db, lambda s: eliminar_enviados(s, ids), nombre="outbox_eliminar")
+    return len(ids)
+
+def start_outbox_relay():
+    """Drena el outbox continuamente; espera entre ciclos sólo cuando no queda trabajo"""
+    tamano = settings.OUTBOX_TAMANO_LOTE
+    print(f"🔄 Relay de outbox iniciado (lotes de {tamano})")
+    while True:
+        db = SessionLocal()
+        try:
+            enviados = relay_lote(db, tamano)
+            if enviados:
+                print(f"📤 Outbox: {enviados} mensajes publicados")
+        except SQLAlchemyError as db_error:
+            db.rollback()
+            enviados = 0
+            print("❌ Error de base de datos en el relay de outbox:", str(db_error))
+        except Exception as e:
+            enviados = 0
+            print("❌ Error en el relay de outbox:", str(e))
+            time.sleep(settings.OUTBOX_INTERVALO)
+        finally:
+            db.close()
+
+        if enviados < tamano:
+            esperar_pendientes(settings.OUTBOX_INTERVALO)
@@ -1,65 +1,145 @@
-import pika, json
+import threading
+from sqlalchemy.exc import SQLAlchemyError
 from app.config.database import SessionLocal
-from app.listener.evento_listener import cancelar_entradas_evento, procesar_evento_creado
+from app.config.reintentos import Reintentos
+from app.listener.evento_listener import (
+    procesar_evento_actualizado,
+    generar_entradas_evento,
+    reanudar_generaciones_pendientes,
+    eliminar_entradas_evento,
+    archivar_entradas_evento,
+    get_eventos_cancelando,
+    get_eventos_archivando
+)
 from app.config.settings import settings
-from app.model.entrada_model import Entrada
-from uuid import uuid4
+from app.listener.pool_consumidor import ConsumidorConcurrente
+from app.repository.idempotencia_repository import mensaje_procesado, registrar_mensaje_procesado
+from app.repository.inventario_repository import marcar_cancelando, marcar_archivando
+from app.service.evento_cache import cache_eventos
+from app.service.mapa_asientos import mapa_asientos
 
-def start_listener():
-    # Conectarse a RabbitMQ
-    connection = pika.BlockingConnection(pika.URLParameters(settings.RABBITMQ_URL))
-    channel = connection.channel()
+def _eliminar_en_segundo_plano(evento_id: int):
+    db = SessionLocal()
+    try:
+        eliminar_entradas_evento(db, evento_id)
+    except SQLAlchemyError as db_error:
+        # El evento sigue en 'cancelando' y se retoma en el próximo arranque
+        print(f"❌ Error eliminando entradas del evento {evento_id}:", str(db_error))
+    finally:
+        db.close()
 
-    # Declarar la cola del listener
-    channel.queue_declare(queue=settings.RABBITMQ_LISTENER_QUEUE, durable=True)
+def lanzar_eliminacion(evento_id: int):
+    """La eliminación corre en su propio hilo para no ocupar un worker del listener"""
+    threading.Thread(target=_eliminar_en_segundo_plano, args=(evento_id,), daemon=True).start()
 
-    def callback(ch, method, properties, body):
-        print("📥 Evento recibido:", body)
-        try:
-            data = json.loads(body)
-            tipo = data.get("tipo")
-            payload = data.get("payload")
+def _archivar_en_segundo_plano(evento_id: int):
+    db = SessionLocal()
+    try:
+        archivar_entradas_evento(db, evento_id)
+    except SQLAlchemyError as db_error:
+        # El evento sigue en 'archivando' y se retoma en el próximo arranque
+        print(f"❌ Error archivando entradas del evento {evento_id}:", str(db_error))
+    finally:
+        db.close()
 
-            db = SessionLocal()
+def lanzar_archivado(evento_id: int):
+    threading.Thread(target=_archivar_en_segundo_plano, args=(evento_id,), daemon=True).start()
 
-            if tipo == "evento_publicado":
-                evento_id = payload["evento_id"]
-                aforo = payload["aforo"]
-                nombre = payload["nombre"]
-                precio = payload["precio"]
+def _reanudar_pendientes():
+    db = SessionLocal()
+    try:
+        reanudar_generaciones_pendientes(db)
+        for evento_id in get_eventos_cancelando(db):
+            lanzar_eliminacion(evento_id)
+        for evento_id in get_eventos_archivando(db):
+            lanzar_archivado(evento_id)
+    except SQLAlchemyError as db_error:
+        print("❌ Error reanudando generación de entradas:", str(db_error))
+    finally:
+        db.close()
 
-                print(f"🎫 Generando {aforo} entradas para evento {evento_id}")
-                for _ in range(aforo):
-                    entrada = Entrada(
-                        codigo=str(uuid4()),
-                        evento_id=evento_id,
-                        evento_nombre=nombre,
-                        precio=precio
-                    )
-                    db.add(entrada)
+def _aplicar_evento(db, tipo: str, payload: dict, message_id: str = None):
+    """
+    Aplica el mensaje y lo registra como procesado. Retorna (tipo, evento_id) si queda trabajo
+    para un hilo en segundo plano (eliminar o archivar entradas), que se lanza tras el commit.
+    """
+    if message_id and mensaje_procesado(db, message_id):
+        print(f"ℹ️ Mensaje {message_id} ya procesado, se descarta")
+        return None
 
-                db.commit()
-                print(f"✅ Entradas creadas para evento {evento_id}")
+    pendiente = None
+    if tipo == "evento_publicado":
+        generar_entradas_evento(
+            db,
+            payload["evento_id"],
+            payload["aforo"],
+            payload["nombre"],
+            payload["precio"]
+        )
 
-            elif tipo == "evento_cancelado":
-                evento_id = payload["evento_id"]
-                db.query(Entrada).filter(Entrada.evento_id == evento_id).delete()
-                db.commit()
-                print(f"❌ Entradas eliminadas para evento cancelado {evento_id}")
+    elif tipo == "evento_actualizado":
+        # Aforo y título nuevos: se generan o retiran sólo las entradas de diferencia.
+        # Las invalidaciones de cache sólo alcanzan a esta instancia; las demás esperan al TTL
+        cache_eventos.invalidar(payload["evento_id"])
+        procesar_evento_actualizado(payload, db)
 
-            db.close()
+    elif tipo == "evento_cancelado":
+        # Se marca al instante y las entradas se borran después por lotes
+        cancelado = payload["evento_id"]
+        cache_eventos.invalidar(cancelado)
+        mapa_asientos.invalidar(cancelado)
+        marcar_cancelando(db, cancelado)
+        pendiente = (tipo, cancelado)
 
-        except SQLAlchemyError as db_error:
-            print("❌ Error de base de datos:", str(db_error))
-        except Exception as e:
-            print("❌ Error procesando evento:", str(e))
+    elif tipo == "evento_finalizado":
+        # Igual que la cancelación, pero las entradas se mueven a entradas_archivo en lugar de borrarse
+        finalizado = payload["evento_id"]
+        cache_eventos.invalidar(finalizado)
+        mapa_asientos.invalidar(finalizado)
+        if marcar_archivando(db, finalizado) is not None:
+            pendiente = (tipo, finalizado)
 
-    # Escuchar la cola
-    channel.basic_consume(
-        queue=settings.RABBITMQ_LISTENER_QUEUE,
-        on_message_callback=callback,
-        auto_ack=True
-    )
+    if message_id:
+        registrar_mensaje_procesado(db, message_id)
+    db.commit()
+    return pendiente
+
+def procesar_evento(data: dict, message_id: str = None):
+    """
+    Aplica un mensaje de ms-eventos; los errores se propagan para que el consumidor decida si reintentar.
+    El message_id se registra al terminar, así que una reentrega de un mensaje ya aplicado se descarta.
+    Los conflictos de serialización (40001) se reintentan aquí mismo sin devolver el mensaje a la cola;
+    la generación por lotes se reanuda desde el último lote confirmado.
+    """
+    db = SessionLocal()
+    try:
+        for intento in Reintentos(db, "listener"):
+            with intento:
+                pendiente = _aplicar_evento(db, data.get("tipo"), data.get("payload"), message_id)
+    finally:
+        db.close()
+
+    if pendiente is None:
+        return
+    tipo, evento_id = pendiente
+    if tipo == "evento_cancelado":
+        print(f"🚫 Evento {evento_id} cancelado, eliminando sus entradas en segundo plano")
+        lanzar_eliminacion(evento_id)
+    else:
+        print(f"🏁 Evento {evento_id} finalizado, archivando sus entradas en segundo plano")
+        lanzar_archivado(evento_id)
 
-    print(f"🔄 Escuchando en cola: {settings.RABBITMQ_LISTENER_QUEUE}")
-    channel.start_consuming()
+def start_listener():
+    # Completar generaciones interrumpidas antes de atender nuevos mensajes
+    _reanudar_pendientes()
+
+    consumidor = ConsumidorConcurrente(
+        url=settings.RABBITMQ_URL,
+        cola=settings.RABBITMQ_LISTENER_QUEUE,
+        procesar=procesar_evento,
+        num_workers=settings.LISTENER_WORKERS,
+        prefetch=settings.LISTENER_PREFETCH,
+        max_reintentos=settings.LISTENER_MAX_REINTENTOS,
+        heartbeat=settings.RABBITMQ_HEARTBEAT
+    )
+    consumidor.consumir()
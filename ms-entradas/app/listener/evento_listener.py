@@ -1,26 +1,232 @@
+from uuid import uuid4
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
+from app.config.database import ejecutar_transaccion
+from app.config.settings import settings
+from app.constants.entrada_states import EstadoEntrada
+from app.constants.inventario_states import EstadoInventario, ModoInventario
 from app.model.entrada_model import Entrada
+from app.repository.entrada_repository import (
+    eliminar_lote_evento,
+    archivar_lote_evento,
+    retirar_disponibles,
+    renombrar_evento
+)
+from app.repository.inventario_repository import (
+    get_inventario,
+    crear_inventario,
+    get_inventarios_generando,
+    get_inventarios_cancelando,
+    get_inventarios_archivando,
+    ajustar_contadores,
+    renombrar_inventario
+)
+from app.repository.reserva_repository import eliminar_reservas_evento
+from app.repository.ventas_repository import eliminar_ventas_evento
+from app.service.mapa_asientos import mapa_asientos
 
-def procesar_evento_creado(data: dict, db: Session):
-    evento_id = data.get("id")
-    aforo = data.get("aforo")
-    precio = data.get("precio", 0.0)
+def _nuevas_entradas(evento_id: int, evento_nombre: str, precio: float, cantidad: int) -> list:
+    return [
+        {
+            "codigo": str(uuid4()),
+            "evento_id": evento_id,
+            "evento_nombre": evento_nombre,
+            "precio": precio,
+            "estado": EstadoEntrada.DISPONIBLE
+        }
+        for _ in range(cantidad)
+    ]
 
-    if not evento_id or not aforo:
-        print("❌ Evento inválido")
-        return
+def generar_entradas_evento(db: Session, evento_id: int, aforo: int, nombre: str = None,
+                            precio: float = 0.0, tamano_lote: int = None):
+    """
+    Genera las entradas de un evento en lotes con INSERT executemany.
+    Cada lote se confirma junto con el avance del inventario, por lo que si el
+    servicio cae a mitad de la generación se reanuda desde el último lote confirmado.
+    El evento sólo pasa a 'vendible' cuando se han creado todas las entradas.
+    En modo perezoso sólo se registra el inventario y no se inserta ninguna fila.
+    """
+    tamano_lote = tamano_lote or settings.ENTRADAS_TAMANO_LOTE
 
-    print(f"🎫 Generando {aforo} entradas para evento {evento_id}")
-    for _ in range(aforo):
-        entrada = Entrada(evento_id=evento_id, precio=precio)
-        db.add(entrada)
-    db.commit()
+    inventario = get_inventario(db, evento_id)
+    if inventario is None:
+        inventario = crear_inventario(db, evento_id, aforo, nombre, precio, settings.ENTRADAS_MODO_INVENTARIO)
+        if inventario.modo == ModoInventario.PEREZOSO:
+            print(f"✅ Inventario perezoso de {aforo} plazas registrado para evento {evento_id}")
+            return inventario
+    elif inventario.estado == EstadoInventario.VENDIBLE:
+        print(f"ℹ️ Las entradas del evento {evento_id} ya fueron generadas")
+        return inventario
+
+    generadas = inventario.generadas
+    print(f"🎫 Generando {aforo - generadas} de {aforo} entradas para evento {evento_id}")
+    while generadas < inventario.aforo:
+        lote = min(tamano_lote, inventario.aforo - generadas)
+        db.execute(
+            insert(Entrada.__table__),
+            _nuevas_entradas(evento_id, inventario.evento_nombre, inventario.precio, lote)
+        )
+        generadas += lote
+        # Suma al contador en lugar de fijarlo: una compra confirmada mientras tanto ya lo descontó
+        ajustar_contadores(db, evento_id, generadas=lote, disponibles=lote)
+        db.commit()
+        print(f"⏳ Evento {evento_id}: {generadas}/{inventario.aforo} entradas generadas")
 
-def cancelar_entradas_evento(evento_id: int, db: Session):
-    entradas = db.query(Entrada).filter(
-        Entrada.evento_id == evento_id,
-        Entrada.usuario_id != None
-    ).all()
-    for entrada in entradas:
-        entrada.estado = "cancelada"
+    inventario.estado = EstadoInventario.VENDIBLE
     db.commit()
+    print(f"✅ Entradas creadas para evento {evento_id}, evento a la venta")
+    return inventario
+
+def reanudar_generaciones_pendientes(db: Session):
+    """Retoma las generaciones que quedaron a medias por una caída del servicio"""
+    for inventario in get_inventarios_generando(db):
+        print(f"🔁 Reanudando generación de entradas del evento {inventario.evento_id}")
+        generar_entradas_evento(db, inventario.evento_id, inventario.aforo)
+
+def eliminar_entradas_evento(db: Session, evento_id: int, tamano_lote: int = None):
+    """
+    Elimina las entradas de un evento en estado 'cancelando' por lotes, una transacción
+    corta por lote, para no crear una transacción enorme que compita con las lecturas.
+    Si el servicio cae a mitad se reanuda: lo ya borrado no se vuelve a tocar.
+    Al terminar el inventario queda en 'cancelado'.
+    """
+    tamano_lote = tamano_lote or settings.CANCELACION_TAMANO_LOTE
+    eliminadas = 0
+    print(f"🗑️ Eliminando entradas del evento cancelado {evento_id} (lotes de {tamano_lote})")
+    while True:
+        borradas = ejecutar_transaccion(
+            db, lambda s: eliminar_lote_evento(s, evento_id, tamano_lote), nombre="eliminar_entradas_evento"
+        )
+        eliminadas += borradas
+        if borradas < tamano_lote:
+            break
+        print(f"⏳ Evento {evento_id}: {eliminadas} entradas eliminadas")
+
+    def _finalizar(s: Session):
+        eliminar_reservas_evento(s, evento_id)
+        eliminar_ventas_evento(s, evento_id)
+        inventario = get_inventario(s, evento_id)
+        if inventario is not None:
+            inventario.estado = EstadoInventario.CANCELADO
+
+    ejecutar_transaccion(db, _finalizar, nombre="eliminar_entradas_evento")
+    print(f"❌ Entradas eliminadas para evento cancelado {evento_id} ({eliminadas} en total)")
+
+def archivar_entradas_evento(db: Session, evento_id: int, tamano_lote: int = None):
+    """
+    Mueve las entradas de un evento finalizado a entradas_archivo, un lote por transacción
+    para no retener bloqueos sobre la tabla caliente. El evento ya está marcado como
+    'archivando'; si el proceso se interrumpe, reanudar mueve sólo lo que quedó.
+    Las ventas acumuladas y los ingresos registrados se conservan.
+    """
+    tamano_lote = tamano_lote or settings.ARCHIVO_TAMANO_LOTE
+    archivadas = 0
+    print(f"📦 Archivando entradas del evento finalizado {evento_id} (lotes de {tamano_lote})")
+    while True:
+        movidas = ejecutar_transaccion(
+            db, lambda s: archivar_lote_evento(s, evento_id, tamano_lote), nombre="archivar_entradas_evento"
+        )
+        archivadas += movidas
+        if movidas < tamano_lote:
+            break
+        print(f"⏳ Evento {evento_id}: {archivadas} entradas archivadas")
+
+    def _finalizar(s: Session):
+        eliminar_reservas_evento(s, evento_id)
+        inventario = get_inventario(s, evento_id)
+        if inventario is not None:
+            inventario.estado = EstadoInventario.ARCHIVADO
+
+    ejecutar_transaccion(db, _finalizar, nombre="archivar_entradas_evento")
+    print(f"📦 Entradas archivadas para evento finalizado {evento_id} ({archivadas} en total)")
+
+def _completar_entradas(db: Session, evento_id: int, tamano_lote: int):
+    """Inserta por lotes las entradas que faltan hasta el aforo; el evento sigue a la venta mientras tanto"""
+    def _lote(s: Session):
+        inventario = get_inventario(s, evento_id)
+        lote = min(tamano_lote, inventario.aforo - inventario.generadas)
+        if lote <= 0:
+            return 0
+        s.execute(
+            insert(Entrada.__table__),
+            _nuevas_entradas(evento_id, inventario.evento_nombre, inventario.precio, lote)
+        )
+        ajustar_contadores(s, evento_id, generadas=lote, disponibles=lote)
+        return lote
+
+    while ejecutar_transaccion(db, _lote, nombre="ajustar_aforo"):
+        print(f"⏳ Evento {evento_id}: entradas adicionales generadas")
+
+def _retirar_sobrantes(db: Session, evento_id: int, cantidad: int, tamano_lote: int, perezoso: bool) -> int:
+    """Quita hasta `cantidad` plazas no vendidas; retorna cuántas pudo quitar"""
+    def _lote(s: Session):
+        pendientes = cantidad - retiradas
+        if perezoso:
+            quitar = min(pendientes, get_inventario(s, evento_id).disponibles)
+            ajustar_contadores(s, evento_id, aforo=-quitar, disponibles=-quitar)
+            return quitar
+        quitar = retirar_disponibles(s, evento_id, min(tamano_lote, pendientes))
+        ajustar_contadores(s, evento_id, aforo=-quitar, generadas=-quitar, disponibles=-quitar)
+        return quitar
+
+    retiradas = 0
+    while retiradas < cantidad:
+        quitadas = ejecutar_transaccion(db, _lote, nombre="ajustar_aforo")
+        retiradas += quitadas
+        if quitadas == 0 or perezoso:
+            break
+    return retiradas
+
+def ajustar_aforo_evento(db: Session, evento_id: int, aforo: int, tamano_lote: int = None):
+    """
+    Lleva el inventario del evento al nuevo aforo sin regenerarlo: en modo materializado
+    inserta sólo las entradas que faltan o borra sólo las disponibles sobrantes, por lotes;
+    en modo perezoso basta con ajustar los contadores. Se trabaja con el aforo final y no con
+    el delta, así que reaplicar el mensaje tras una caída termina el trabajo sin duplicarlo.
+    Nunca se retiran entradas vendidas o reservadas.
+    """
+    tamano_lote = tamano_lote or settings.ENTRADAS_TAMANO_LOTE
+    inventario = get_inventario(db, evento_id)
+    if inventario is None or inventario.estado in EstadoInventario.RETIRADOS:
+        return
+    perezoso = inventario.modo == ModoInventario.PEREZOSO
+    delta = aforo - inventario.aforo
+
+    if delta > 0:
+        ejecutar_transaccion(
+            db,
+            lambda s: ajustar_contadores(s, evento_id, aforo=delta, disponibles=delta if perezoso else 0),
+            nombre="ajustar_aforo"
+        )
+        print(f"📈 Evento {evento_id}: aforo ampliado en {delta} plazas")
+    elif delta < 0:
+        retiradas = _retirar_sobrantes(db, evento_id, -delta, tamano_lote, perezoso)
+        print(f"📉 Evento {evento_id}: {retiradas} plazas retiradas")
+        if retiradas < -delta:
+            print(f"⚠️ Evento {evento_id}: no quedan disponibles para retirar {-delta - retiradas} plazas más")
+
+    if not perezoso:
+        _completar_entradas(db, evento_id, tamano_lote)
+    mapa_asientos.invalidar(evento_id)
+
+def renombrar_entradas_evento(db: Session, evento_id: int, nombre: str):
+    def _renombrar(s: Session):
+        renombrar_inventario(s, evento_id, nombre)
+        return renombrar_evento(s, evento_id, nombre)
+
+    actualizadas = ejecutar_transaccion(db, _renombrar, nombre="renombrar_evento")
+    print(f"✏️ Evento {evento_id} renombrado a '{nombre}' en {actualizadas} entradas")
+
+def get_eventos_cancelando(db: Session):
+    return [inventario.evento_id for inventario in get_inventarios_cancelando(db)]
+
+def get_eventos_archivando(db: Session):
+    return [inventario.evento_id for inventario in get_inventarios_archivando(db)]
+
+def procesar_evento_actualizado(data: dict, db: Session):
+    evento_id = data.get("evento_id")
+    inventario = get_inventario(db, evento_id)
+    if data.get("titulo") and (inventario is None or inventario.evento_nombre != data["titulo"]):
+        renombrar_entradas_evento(db, evento_id, data["titulo"])
+    if data.get("aforo") is not None:
+        ajustar_aforo_evento(db, evento_id, data["aforo"])
@@ -0,0 +1,121 @@
+import json
+import os
+import queue
+import random
+import threading
+import time
+from functools import partial
+import pika
+from sqlalchemy.exc import SQLAlchemyError
+
+class ConsumidorConcurrente:
+    """
+    Consume una cola con ack manual y reparte los mensajes entre varios workers.
+    procesar(data, message_id) recibe el message_id del productor para descartar reentregas.
+    Un mensaje sin message_id se procesa siempre (None): no se deduplica por contenido, porque
+    dos cambios legítimos pueden tener el mismo cuerpo (renombrar A→B→A), y los manejadores
+    ya son idempotentes ante una reentrega.
+    Los mensajes de un mismo evento van siempre al mismo worker (hash de evento_id),
+    así que se procesan en orden mientras eventos distintos avanzan en paralelo.
+    Los errores de base de datos se reintentan en el propio worker (conservando el orden);
+    si se agotan los reintentos, o el mensaje es inválido, se envía a la cola '<cola>.dlq'.
+    Los acks y publicaciones se hacen en el hilo de la conexión (add_callback_threadsafe),
+    porque los canales de pika no se pueden usar desde varios hilos.
+    """
+
+    def __init__(self, url: str, cola: str, procesar, num_workers: int, prefetch: int,
+                 max_reintentos: int, heartbeat: int):
+        self._url = url
+        self._cola = cola
+        self._cola_dlq = f"{cola}.dlq"
+        self._procesar = procesar
+        self._prefetch = prefetch
+        self._max_reintentos = max(1, max_reintentos)
+        self._heartbeat = heartbeat
+        self._trabajos = [queue.Queue() for _ in range(num_workers or os.cpu_count() or 1)]
+        for indice, trabajos in enumerate(self._trabajos):
+            threading.Thread(target=self._worker, args=(trabajos,), name=f"listener-{indice}", daemon=True).start()
+
+    def _indice_worker(self, data: dict) -> int:
+        payload = data.get("payload") or {}
+        evento_id = payload.get("evento_id") if isinstance(payload, dict) else None
+        return hash(evento_id) % len(self._trabajos)
+
+    def _recibir(self, ch, method, properties, body):
+        try:
+            data = json.loads(body)
+            if not isinstance(data, dict):
+                raise ValueError("el mensaje no es un objeto JSON")
+        except ValueError as e:
+            print("❌ Mensaje inválido, se envía a la DLQ:", str(e))
+            self._a_dlq(ch, method.delivery_tag, properties, body, str(e))
+            return
+        message_id = getattr(properties, "message_id", None) or None
+        self._trabajos[self._indice_worker(data)].put((ch, method.delivery_tag, properties, body, data, message_id))
+
+    def _worker(self, trabajos: queue.Queue):
+        while True:
+            ch, tag, properties, body, data, message_id = trabajos.get()
+            error = self._procesar_con_reintentos(data, message_id)
+            if error is None:
+                accion = partial(self._ack, ch, tag)
+            else:
+                accion = partial(self._a_dlq, ch, tag, properties, body, error)
+            try:
+                ch.connection.add_callback_threadsafe(accion)
+            except Exception as e:
+                # La conexión se cerró: el broker volverá a entregar el mensaje
+                print("⚠️ No se pudo confirmar el mensaje, se reentregará:", str(e))
+
+    def _procesar_con_reintentos(self, data: dict, message_id: str):
+        """Devuelve None si el mensaje se procesó o la descripción del error definitivo"""
+        for intento in range(1, self._max_reintentos + 1):
+            try:
+                self._procesar(data, message_id)
+                return None
+            except SQLAlchemyError as db_error:
+                print(f"❌ Error de base de datos (intento {intento}/{self._max_reintentos}):", str(db_error))
+                if intento < self._max_reintentos:
+                    time.sleep(random.uniform(0, 0.5 * 2 ** intento))
+                error = str(db_error)
+            except Exception as e:
+                print("❌ Error procesando evento:", str(e))
+                return str(e)
+        return error
+
+    def _ack(self, ch, tag):
+        if ch.is_open:
+            ch.basic_ack(delivery_tag=tag)
+
+    def _a_dlq(self, ch, tag, properties, body, error: str):
+        if not ch.is_open:
+            return
+        headers = dict(properties.headers or {}) if properties else {}
+        headers["x-error"] = error[:500]
+        headers["x-cola-origen"] = self._cola
+        ch.basic_publish(
+            exchange='',
+            routing_key=self._cola_dlq,
+            body=body,
+            properties=pika.BasicProperties(delivery_mode=2, headers=headers)
+        )
+        ch.basic_ack(delivery_tag=tag)
+
+    def consumir(self):
+        """Bucle de consumo; si se pierde la conexión se reconecta y sigue"""
+        while True:
+            try:
+                parameters = pika.URLParameters(self._url)
+                parameters.heartbeat = self._heartbeat
+                connection = pika.BlockingConnection(parameters)
+                channel = connection.channel()
+                channel.queue_declare(queue=self._cola, durable=True)
+                channel.queue_declare(queue=self._cola_dlq, durable=True)
+                channel.basic_qos(prefetch_count=self._prefetch)
+                channel.basic_consume(queue=self._cola, on_message_callback=self._recibir)
+
+                print(f"🔄 Escuchando en cola: {self._cola} ({len(self._trabajos)} workers, prefetch {self._prefetch})")
+                channel.start_consuming()
+            except pika.exceptions.AMQPError as e:
+                print("⚠️ Conexión con RabbitMQ perdida, reconectando en 5s:", str(e))
+                time.sleep(5)
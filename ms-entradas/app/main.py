@@ -1,11 +1,26 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DBAPIError
 from app.config.settings import settings
-from app.config.database import Base, engine
+from app.config.database import Base, engine, SessionLocal
+from app.config.reintentos import es_error_reintentable
+from app.config.migraciones import aplicar_migraciones
+from app.config.rabbitmq import iniciar_publicador, cerrar_publicador
+from app.config.http_client import get_cliente_eventos, cerrar_cliente_eventos
+from app.model import entrada_model, inventario_model, ventas_model, outbox_model, reserva_model, idempotencia_model, checkin_model, entrada_archivo_model  # Registrar modelos antes de create_all
 from app.controller.entrada_controller import router as entrada_router
+from app.repository.ventas_repository import acumulado_vacio, reconstruir_ventas_por_evento
 
-# Crear tablas
+# Crear tablas y llevar las existentes al esquema actual (índices)
 Base.metadata.create_all(bind=engine)
+aplicar_migraciones(engine)
+
+# Poblar el acumulado de ventas la primera vez que se activa
+if settings.ESTADISTICAS_USAR_ACUMULADO:
+    with SessionLocal() as db:
+        if acumulado_vacio(db):
+            reconstruir_ventas_por_evento(db)
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -20,6 +35,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(DBAPIError)
+async def error_base_datos(request: Request, exc: DBAPIError):
+    # Un conflicto que agotó los reintentos es contención, no un fallo: el cliente puede repetir
+    if es_error_reintentable(exc):
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Alta demanda sobre estas entradas, intenta de nuevo"},
+            headers={"Retry-After": "1"}
+        )
+    return JSONResponse(status_code=500, content={"detail": "Error interno de base de datos"})
+
+@app.on_event("startup")
+def iniciar_rabbitmq():
+    # Conexiones y colas del publicador se preparan una sola vez
+    iniciar_publicador()
+
+@app.on_event("shutdown")
+def cerrar_rabbitmq():
+    cerrar_publicador()
+
+@app.on_event("startup")
+async def iniciar_cliente_http():
+    # Cliente keep-alive compartido para las consultas a ms-eventos
+    get_cliente_eventos()
+
+@app.on_event("shutdown")
+async def cerrar_cliente_http():
+    await cerrar_cliente_eventos()
+
 # Rutas
 app.include_router(entrada_router, prefix="/entradas", tags=["Entradas"])
 
@@ -28,3 +72,18 @@ import threading
 from app.listener.consumer import start_listener
 
 threading.Thread(target=start_listener, daemon=True).start()
+
+# 📤 Iniciar el relay del outbox
+from app.events.outbox_relay import start_outbox_relay
+
+threading.Thread(target=start_outbox_relay, daemon=True).start()
+
+# ⏳ Iniciar el barrido de reservas expiradas
+from app.service.barrido_reservas import start_barrido_reservas
+
+threading.Thread(target=start_barrido_reservas, daemon=True).start()
+
+# 🎟️ Iniciar el registro de ingresos (check-in)
+from app.service.control_acceso import start_registro_checkins
+
+threading.Thread(target=start_registro_checkins, daemon=True).start()
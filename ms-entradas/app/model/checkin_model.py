@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, DateTime
+from app.config.database import Base
+
+class Checkin(Base):
+    """Ingreso registrado en la puerta del evento; una fila por entrada"""
+    __tablename__ = "checkins"
+
+    entrada_id = Column(Integer, primary_key=True, autoincrement=False)
+    evento_id = Column(Integer, nullable=False, index=True)
+    usuario_id = Column(Integer, nullable=False)
+    registrado_en = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String, Float, func
+from app.config.database import Base
+
+class EntradaArchivada(Base):
+    """
+    Entrada de un evento finalizado. Se mueve aquí desde 'entradas' para que la tabla caliente
+    sólo contenga eventos vigentes; se consulta únicamente desde el historial del usuario.
+    """
+    __tablename__ = "entradas_archivo"
+    __table_args__ = (
+        Index("ix_entradas_archivo_usuario", "usuario_id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)  # El mismo id que tenía en 'entradas'
+    codigo = Column(String, nullable=False)
+    evento_id = Column(Integer, nullable=False)
+    evento_nombre = Column(String, nullable=True)
+    usuario_id = Column(Integer, nullable=True)
+    precio = Column(Float, nullable=False, default=0.0)
+    estado = Column(String, nullable=True)
+    archivado_en = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
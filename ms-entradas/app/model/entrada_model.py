@@ -1,11 +1,17 @@
 import uuid
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Index, Integer, String, Float
 from app.config.database import Base
 
 class Entrada(Base):
     __tablename__ = "entradas"
+    __table_args__ = (
+        # Reclamar/listar entradas de un evento por estado (codigo permite recorrer desde un pivote)
+        Index("ix_entradas_evento_estado", "evento_id", "estado", "codigo"),
+        # Entradas de un usuario (mis-entradas, historial)
+        Index("ix_entradas_usuario_estado", "usuario_id", "estado"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)  # Sin autoincrement
+    id = Column(Integer, primary_key=True)  # Sin autoincrement
     codigo = Column(String, unique=True, nullable=False)
     evento_id = Column(Integer, nullable=False)
     evento_nombre = Column(String, nullable=True)  # ✅ NUEVA LÍNEA
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, DateTime, func
+from app.config.database import Base
+
+class MensajeProcesado(Base):
+    """Mensajes del listener ya aplicados, para descartar reentregas y duplicados"""
+    __tablename__ = "mensajes_procesados"
+
+    message_id = Column(String, primary_key=True)
+    procesado_en = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
+
+class ClaveIdempotencia(Base):
+    """Respuesta original de una compra, asociada a la cabecera Idempotency-Key del usuario"""
+    __tablename__ = "claves_idempotencia"
+
+    usuario_id = Column(Integer, primary_key=True, autoincrement=False)
+    clave = Column(String, primary_key=True)
+    ruta = Column(String, nullable=False)  # Operación para la que se usó la clave
+    respuesta = Column(String, nullable=False)  # Cuerpo JSON devuelto
+    creado_en = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
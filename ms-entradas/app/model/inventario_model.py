@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, Float
+from app.config.database import Base
+
+class InventarioEvento(Base):
+    __tablename__ = "inventario_eventos"
+
+    evento_id = Column(Integer, primary_key=True, autoincrement=False)
+    evento_nombre = Column(String, nullable=True)
+    precio = Column(Float, nullable=False, default=0.0)
+    aforo = Column(Integer, nullable=False)
+    generadas = Column(Integer, nullable=False, default=0)  # Entradas ya insertadas (punto de reanudación)
+    estado = Column(String, nullable=False, default="generando")  # 'generando', 'vendible'
+    modo = Column(String, nullable=False, default="materializado")  # 'materializado', 'perezoso'
+
+    # Resumen de disponibilidad, mantenido en la misma transacción que cada cambio de estado
+    disponibles = Column(Integer, nullable=False, default=0)
+    vendidas = Column(Integer, nullable=False, default=0)
+    canceladas = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String, DateTime, func
+from app.config.database import Base
+
+class MensajeOutbox(Base):
+    __tablename__ = "outbox"
+
+    id = Column(Integer, primary_key=True)
+    cola = Column(String, nullable=False)
+    mensaje = Column(String, nullable=False)  # Cuerpo JSON tal cual se publicará
+    creado_en = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    reclamado_hasta = Column(DateTime(timezone=True), nullable=True)  # Un relay lo está publicando hasta esa hora
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from app.config.database import Base
+
+class ReservaEntrada(Base):
+    """Entrada retenida temporalmente por un usuario (estado 'reservada') hasta expira_en"""
+    __tablename__ = "reservas"
+
+    entrada_id = Column(Integer, primary_key=True, autoincrement=False)
+    reserva_id = Column(String, nullable=False, index=True)  # Identificador común de las entradas reservadas juntas
+    usuario_id = Column(Integer, nullable=False)
+    evento_id = Column(Integer, nullable=False)
+    expira_en = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, Float
+from app.config.database import Base
+
+class VentasEvento(Base):
+    __tablename__ = "ventas_por_evento"
+
+    evento_id = Column(Integer, primary_key=True, autoincrement=False)
+    cantidad = Column(Integer, nullable=False, default=0)
+    ingresos = Column(Float, nullable=False, default=0.0)
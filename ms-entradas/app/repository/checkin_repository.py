@@ -0,0 +1,26 @@
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from app.constants.entrada_states import EstadoEntrada
+from app.model.checkin_model import Checkin
+from app.model.entrada_model import Entrada
+
+def get_checkins_evento(db: Session, evento_id: int) -> set:
+    return set(db.scalars(select(Checkin.entrada_id).where(Checkin.evento_id == evento_id)))
+
+def get_canceladas_evento(db: Session, evento_id: int) -> set:
+    return set(db.scalars(
+        select(Entrada.id).where(Entrada.evento_id == evento_id, Entrada.estado == EstadoEntrada.CANCELADA)
+    ))
+
+def registrar_checkins(db: Session, filas: list) -> list:
+    """
+    Inserta los ingresos que aún no estaban registrados (sin hacer commit).
+    Retorna los ids que ya tenían ingreso: el mismo código se usó en otra instancia.
+    """
+    existentes = set(db.scalars(
+        select(Checkin.entrada_id).where(Checkin.entrada_id.in_([fila["entrada_id"] for fila in filas]))
+    ))
+    nuevas = [fila for fila in filas if fila["entrada_id"] not in existentes]
+    if nuevas:
+        db.execute(insert(Checkin.__table__), nuevas)
+    return sorted(existentes)
@@ -1,7 +1,14 @@
+from sqlalchemy import delete, func, insert, select, update
 from sqlalchemy.orm import Session
+from app.config.settings import settings
+from app.constants.entrada_states import EstadoEntrada
+from app.constants.inventario_states import EstadoInventario
 from app.model.entrada_model import Entrada
+from app.model.entrada_archivo_model import EntradaArchivada
+from app.model.inventario_model import InventarioEvento
 import random
 import time
+import uuid
 
 def generar_id_seguro():
     """Genera un ID seguro que JavaScript puede manejar sin perder precisión"""
@@ -9,63 +16,302 @@ def generar_id_seguro():
     random_part = random.randint(100, 999)  
     return int(f"{timestamp}{random_part}")
 
-def asignar_entrada(db: Session, entrada_id: int, user_id: int):
-    entrada = db.query(Entrada).filter(
+def _eventos_no_vendibles():
+    """
+    Eventos cuyo inventario no está 'vendible': entradas todavía generándose, o evento
+    cancelado o finalizado. Sus entradas no se listan ni se venden. Los eventos sin inventario
+    (anteriores al resumen de disponibilidad) no aparecen aquí y siguen a la venta.
+    """
+    return select(InventarioEvento.evento_id).where(
+        InventarioEvento.estado != EstadoInventario.VENDIBLE
+    )
+
+def asignar_entrada(db: Session, entrada_id: int, user_id: int, evento_id: int = None):
+    query = db.query(Entrada).filter(
         Entrada.id == entrada_id, 
         Entrada.usuario_id == None,
-        Entrada.estado == "disponible"
-    ).first()
+        Entrada.estado == "disponible",
+        Entrada.evento_id.not_in(_eventos_no_vendibles())
+    )
+    if evento_id is not None:
+        # Sólo entradas del evento al que se tiene acceso
+        query = query.filter(Entrada.evento_id == evento_id)
+    entrada = query.first()
     if not entrada:
         return None
     entrada.usuario_id = user_id
     entrada.estado = "vendida"
-    db.commit()
-    db.refresh(entrada)
+    db.flush()
     return entrada
 
-def mis_entradas(db: Session, user_id: int):
-    return db.query(Entrada).filter(
+def select_candidatas(evento_id: int, cantidad: int, pivote: str = None):
+    """Ids de entradas disponibles del evento desde el pivote (recorre ix_entradas_evento_estado)"""
+    candidatas = select(Entrada.id).where(
+        Entrada.evento_id == evento_id,
+        Entrada.usuario_id.is_(None),
+        Entrada.estado == EstadoEntrada.DISPONIBLE
+    )
+    if pivote is not None:
+        candidatas = candidatas.where(Entrada.codigo >= pivote)
+    return candidatas.order_by(Entrada.codigo).limit(cantidad)
+
+def _reclamar_desde(db: Session, evento_id: int, user_id: int, cantidad: int, pivote: str = None,
+                    estado: str = EstadoEntrada.VENDIDA):
+    """UPDATE ... WHERE id IN (SELECT ... LIMIT n) RETURNING: reclama entradas en una sola sentencia"""
+    candidatas = select_candidatas(evento_id, cantidad, pivote)
+    if settings.ENTRADAS_SKIP_LOCKED:
+        candidatas = candidatas.with_for_update(skip_locked=True)
+
+    stmt = (
+        update(Entrada)
+        .where(
+            Entrada.id.in_(candidatas.scalar_subquery()),
+            Entrada.estado == EstadoEntrada.DISPONIBLE
+        )
+        .values(usuario_id=user_id, estado=estado)
+        .returning(Entrada)
+        .execution_options(synchronize_session=False)
+    )
+    return list(db.scalars(stmt).all())
+
+def reclamar_entradas(db: Session, evento_id: int, user_id: int, cantidad: int,
+                      estado: str = EstadoEntrada.VENDIDA):
+    """
+    Reclama atómicamente hasta `cantidad` entradas disponibles del evento (sin hacer commit).
+    El código de cada entrada es un uuid4 aleatorio, así que partir de un pivote
+    aleatorio reparte a los compradores concurrentes entre filas distintas en vez
+    de que todos compitan por las primeras. Si por encima del pivote no hay
+    suficientes se completa desde el principio. Con estado='reservada' las entradas
+    quedan retenidas en lugar de vendidas.
+    """
+    entradas = _reclamar_desde(db, evento_id, user_id, cantidad, str(uuid.uuid4()), estado)
+    if len(entradas) < cantidad:
+        entradas += _reclamar_desde(db, evento_id, user_id, cantidad - len(entradas), estado=estado)
+    return entradas
+
+def materializar_entradas(db: Session, evento_id: int, user_id: int, cantidad: int,
+                          evento_nombre: str, precio: float, estado: str = EstadoEntrada.VENDIDA):
+    """Inserta las filas de entradas compradas (o reservadas) en modo perezoso (sin hacer commit)"""
+    stmt = insert(Entrada).returning(Entrada)
+    return list(db.scalars(stmt, [
+        {
+            "codigo": str(uuid.uuid4()),
+            "evento_id": evento_id,
+            "evento_nombre": evento_nombre,
+            "usuario_id": user_id,
+            "precio": precio,
+            "estado": estado
+        }
+        for _ in range(cantidad)
+    ]).all())
+
+def confirmar_reservadas(db: Session, entrada_ids: list, user_id: int):
+    """Pasa a vendidas las entradas que el usuario sigue teniendo reservadas"""
+    stmt = (
+        update(Entrada)
+        .where(
+            Entrada.id.in_(entrada_ids),
+            Entrada.usuario_id == user_id,
+            Entrada.estado == EstadoEntrada.RESERVADA,
+            Entrada.evento_id.not_in(_eventos_no_vendibles())
+        )
+        .values(estado=EstadoEntrada.VENDIDA)
+        .returning(Entrada)
+        .execution_options(synchronize_session=False)
+    )
+    return list(db.scalars(stmt).all())
+
+def liberar_reservadas(db: Session, entrada_ids: list) -> int:
+    """Devuelve a disponibles las entradas que siguen reservadas; retorna cuántas se liberaron"""
+    return db.execute(
+        update(Entrada)
+        .where(Entrada.id.in_(entrada_ids), Entrada.estado == EstadoEntrada.RESERVADA)
+        .values(usuario_id=None, estado=EstadoEntrada.DISPONIBLE)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+def eliminar_reservadas(db: Session, entrada_ids: list) -> int:
+    """En modo perezoso la plaza liberada vuelve al contador, así que la fila materializada se borra"""
+    return db.execute(
+        delete(Entrada)
+        .where(Entrada.id.in_(entrada_ids), Entrada.estado == EstadoEntrada.RESERVADA)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+# Las consultas de lectura se construyen como sentencias select() para que el repositorio
+# asíncrono (entrada_repository_async) ejecute exactamente las mismas.
+
+def select_mis_entradas(user_id: int):
+    return select(Entrada).where(
         Entrada.usuario_id == user_id,
-        Entrada.estado.in_(["vendida", "reservada"])
-    ).all()
+        Entrada.estado.in_(["vendida", "reservada"]),
+        Entrada.evento_id.not_in(_eventos_no_vendibles())
+    )
+
+def mis_entradas(db: Session, user_id: int):
+    return db.scalars(select_mis_entradas(user_id)).all()
 
-def historial_entradas(db: Session, usuario_id: int):
+_COLUMNAS_ARCHIVO = ["id", "codigo", "evento_id", "evento_nombre", "usuario_id", "precio", "estado"]
+
+def historial_entradas(db: Session, usuario_id: int, incluir_archivadas: bool = False):
     # El historial debe mostrar todas las entradas del usuario (activas y canceladas)
-    return db.query(Entrada).filter(Entrada.usuario_id == usuario_id).all()
+    if not incluir_archivadas:
+        return db.query(Entrada).filter(Entrada.usuario_id == usuario_id).all()
+    # Las de eventos finalizados viven en entradas_archivo: se unen con las vigentes en una consulta
+    activas = select(*[getattr(Entrada, c) for c in _COLUMNAS_ARCHIVO]).where(Entrada.usuario_id == usuario_id)
+    archivadas = select(*[getattr(EntradaArchivada, c) for c in _COLUMNAS_ARCHIVO]).where(
+        EntradaArchivada.usuario_id == usuario_id
+    )
+    return db.execute(activas.union_all(archivadas).order_by("id")).all()
 
 def get_entrada(db: Session, entrada_id: int):
-    return db.query(Entrada).filter(Entrada.id == entrada_id).first()
-def get_entradas_disponibles(db: Session, evento_id: int):
-    return db.query(Entrada).filter(
+    return db.get(Entrada, entrada_id)
+
+def select_entradas_por_ids(entrada_ids: list):
+    return select(Entrada).where(Entrada.id.in_(entrada_ids))
+
+def get_entradas_por_ids(db: Session, entrada_ids: list):
+    return db.scalars(select_entradas_por_ids(entrada_ids)).all()
+
+def select_entradas_disponibles(evento_id: int):
+    return select(Entrada).where(
         Entrada.evento_id == evento_id,
         Entrada.usuario_id == None,
-        Entrada.estado == "disponible"
-    ).all()
+        Entrada.estado == "disponible",
+        Entrada.evento_id.not_in(_eventos_no_vendibles())
+    )
 
-def get_entradas_asignadas(db: Session, evento_id: int):
+def get_entradas_disponibles(db: Session, evento_id: int):
+    return db.scalars(select_entradas_disponibles(evento_id)).all()
+
+def select_entradas_asignadas(evento_id: int):
     if evento_id is None:
         # Para estadísticas generales, devolver todas las entradas vendidas
-        return db.query(Entrada).filter(
-            Entrada.usuario_id != None,
-            Entrada.estado.in_(["vendida", "reservada"])
-        ).all()
-    else:
-        # Para un evento específico
-        return db.query(Entrada).filter(
-            Entrada.evento_id == evento_id,
+        return select(Entrada).where(
             Entrada.usuario_id != None,
-            Entrada.estado.in_(["vendida", "reservada"])
-        ).all()
+            Entrada.estado.in_(["vendida", "reservada"]),
+            Entrada.evento_id.not_in(_eventos_no_vendibles())
+        )
+    # Para un evento específico
+    return select(Entrada).where(
+        Entrada.evento_id == evento_id,
+        Entrada.usuario_id != None,
+        Entrada.estado.in_(["vendida", "reservada"]),
+        Entrada.evento_id.not_in(_eventos_no_vendibles())
+    )
+
+def get_entradas_asignadas(db: Session, evento_id: int):
+    return db.scalars(select_entradas_asignadas(evento_id)).all()
+
+def contar_por_estado(db: Session, evento_id: int):
+    """Conteo de entradas del evento agrupado por estado"""
+    return dict(
+        db.query(Entrada.estado, func.count(Entrada.id))
+        .filter(Entrada.evento_id == evento_id)
+        .group_by(Entrada.estado)
+        .all()
+    )
+
+def select_todas_entradas():
+    return select(Entrada).where(Entrada.evento_id.not_in(_eventos_no_vendibles()))
 
 def get_todas_entradas(db: Session):
-    return db.query(Entrada).all()
+    return db.scalars(select_todas_entradas()).all()
+
+def select_entradas_por_evento(evento_id: int):
+    return select(Entrada).where(
+        Entrada.evento_id == evento_id,
+        Entrada.evento_id.not_in(_eventos_no_vendibles())
+    )
 
 def get_entradas_por_evento(db: Session, evento_id: int):
-    return db.query(Entrada).filter(Entrada.evento_id == evento_id).all()
+    return db.scalars(select_entradas_por_evento(evento_id)).all()
+
+def pagina_keyset(stmt, limit: int, after: int = None):
+    """Página por keyset sobre id: hasta `limit` filas con id > after, en orden de id"""
+    if after is not None:
+        stmt = stmt.where(Entrada.id > after)
+    return stmt.order_by(Entrada.id).limit(limit)
+
+def paginar(db: Session, stmt, limit: int, after: int = None):
+    return db.scalars(pagina_keyset(stmt, limit, after)).all()
+
+def iterar_por_lotes(db: Session, stmt, tamano_lote: int):
+    """
+    Recorre la consulta página a página por keyset. Cada lote es una consulta corta en
+    su propia transacción (de sólo lectura, se cierra con rollback antes de entregar las
+    filas), así que la memoria no depende del tamaño del evento y no se mantiene abierta
+    una transacción larga mientras el cliente consume la respuesta. Con una sesión
+    histórica cada lote lee en su propia marca de tiempo.
+    """
+    after = None
+    while True:
+        lote = paginar(db, stmt, tamano_lote, after)
+        # Desligadas antes del rollback para que conserven sus valores sin volver a leerse
+        db.expunge_all()
+        db.rollback()
+        yield from lote
+        if len(lote) < tamano_lote:
+            return
+        after = lote[-1].id
 
 def get_entradas_canceladas(db: Session, evento_id: int = None):
     """Obtener entradas canceladas"""
     query = db.query(Entrada).filter(Entrada.estado == "cancelada")
     if evento_id:
         query = query.filter(Entrada.evento_id == evento_id)
-    return query.all()
\ No newline at end of file
+    return query.all()
+
+def eliminar_lote_evento(db: Session, evento_id: int, tamano_lote: int) -> int:
+    """Borra hasta `tamano_lote` entradas del evento (sin hacer commit); retorna cuántas borró"""
+    lote = select(Entrada.id).where(Entrada.evento_id == evento_id).limit(tamano_lote)
+    return db.execute(
+        delete(Entrada)
+        .where(Entrada.id.in_(lote.scalar_subquery()))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+def archivar_lote_evento(db: Session, evento_id: int, tamano_lote: int) -> int:
+    """
+    Mueve hasta `tamano_lote` entradas del evento a entradas_archivo (sin hacer commit):
+    INSERT ... SELECT y DELETE del mismo lote, así que en la misma transacción nunca
+    quedan duplicadas ni se pierden. Retorna cuántas movió.
+    """
+    ids = db.scalars(select(Entrada.id).where(Entrada.evento_id == evento_id).limit(tamano_lote)).all()
+    if not ids:
+        return 0
+    db.execute(
+        insert(EntradaArchivada).from_select(
+            _COLUMNAS_ARCHIVO,
+            select(*[getattr(Entrada, c) for c in _COLUMNAS_ARCHIVO]).where(Entrada.id.in_(ids))
+        )
+    )
+    return db.execute(
+        delete(Entrada).where(Entrada.id.in_(ids)).execution_options(synchronize_session=False)
+    ).rowcount
+
+def retirar_disponibles(db: Session, evento_id: int, cantidad: int) -> int:
+    """
+    Borra hasta `cantidad` entradas disponibles del evento, empezando por las últimas
+    (sin hacer commit). Las vendidas, reservadas o canceladas no se tocan.
+    """
+    lote = (
+        select(Entrada.id)
+        .where(Entrada.evento_id == evento_id, Entrada.estado == EstadoEntrada.DISPONIBLE)
+        .order_by(Entrada.id.desc())
+        .limit(cantidad)
+    )
+    return db.execute(
+        delete(Entrada)
+        .where(Entrada.id.in_(lote.scalar_subquery()), Entrada.estado == EstadoEntrada.DISPONIBLE)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+def renombrar_evento(db: Session, evento_id: int, nombre: str) -> int:
+    """Actualiza el nombre desnormalizado en todas las entradas del evento con una sola sentencia"""
+    return db.execute(
+        update(Entrada)
+        .where(Entrada.evento_id == evento_id, Entrada.evento_nombre.is_distinct_from(nombre))
+        .values(evento_nombre=nombre)
+        .execution_options(synchronize_session=False)
+    ).rowcount
@@ -0,0 +1,44 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.model.entrada_model import Entrada
+from app.model.inventario_model import InventarioEvento
+from app.repository.entrada_repository import (
+    select_mis_entradas,
+    select_entradas_por_ids,
+    select_entradas_disponibles,
+    select_entradas_asignadas,
+    select_todas_entradas,
+    select_entradas_por_evento,
+    pagina_keyset
+)
+
+# Versiones asíncronas de las lecturas de entrada_repository: ejecutan las mismas
+# sentencias select() sobre una AsyncSession (asyncpg) sin ocupar un hilo del threadpool.
+
+async def _todas(db: AsyncSession, stmt, limit: int = None, after: int = None):
+    if limit is not None:
+        stmt = pagina_keyset(stmt, limit, after)
+    return (await db.scalars(stmt)).all()
+
+async def get_entrada_async(db: AsyncSession, entrada_id: int):
+    return await db.get(Entrada, entrada_id)
+
+async def get_inventario_async(db: AsyncSession, evento_id: int):
+    return await db.get(InventarioEvento, evento_id)
+
+async def mis_entradas_async(db: AsyncSession, user_id: int):
+    return await _todas(db, select_mis_entradas(user_id))
+
+async def get_entradas_por_ids_async(db: AsyncSession, entrada_ids: list):
+    return await _todas(db, select_entradas_por_ids(entrada_ids))
+
+async def get_entradas_disponibles_async(db: AsyncSession, evento_id: int, limit: int = None, after: int = None):
+    return await _todas(db, select_entradas_disponibles(evento_id), limit, after)
+
+async def get_entradas_asignadas_async(db: AsyncSession, evento_id: int, limit: int = None, after: int = None):
+    return await _todas(db, select_entradas_asignadas(evento_id), limit, after)
+
+async def get_todas_entradas_async(db: AsyncSession, limit: int = None, after: int = None):
+    return await _todas(db, select_todas_entradas(), limit, after)
+
+async def get_entradas_por_evento_async(db: AsyncSession, evento_id: int, limit: int = None, after: int = None):
+    return await _todas(db, select_entradas_por_evento(evento_id), limit, after)
@@ -0,0 +1,37 @@
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.orm import Session
+from app.model.idempotencia_model import MensajeProcesado, ClaveIdempotencia
+
+def mensaje_procesado(db: Session, message_id: str) -> bool:
+    return db.get(MensajeProcesado, message_id) is not None
+
+def registrar_mensaje_procesado(db: Session, message_id: str):
+    db.add(MensajeProcesado(message_id=message_id))
+
+def get_clave_idempotencia(db: Session, usuario_id: int, clave: str):
+    return db.get(ClaveIdempotencia, (usuario_id, clave))
+
+def guardar_clave_idempotencia(db: Session, usuario_id: int, clave: str, ruta: str, respuesta: str):
+    db.add(ClaveIdempotencia(usuario_id=usuario_id, clave=clave, ruta=ruta, respuesta=respuesta))
+
+def purgar_mensajes_procesados(db: Session, antes_de, tamano_lote: int) -> int:
+    """Borra hasta `tamano_lote` mensajes registrados antes de `antes_de` (sin hacer commit)"""
+    lote = select(MensajeProcesado.message_id).where(MensajeProcesado.procesado_en < antes_de).limit(tamano_lote)
+    return db.execute(
+        delete(MensajeProcesado)
+        .where(MensajeProcesado.message_id.in_(lote.scalar_subquery()))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+def purgar_claves_idempotencia(db: Session, antes_de, tamano_lote: int) -> int:
+    """Borra hasta `tamano_lote` claves guardadas antes de `antes_de` (sin hacer commit)"""
+    lote = (
+        select(ClaveIdempotencia.usuario_id, ClaveIdempotencia.clave)
+        .where(ClaveIdempotencia.creado_en < antes_de)
+        .limit(tamano_lote)
+    )
+    return db.execute(
+        delete(ClaveIdempotencia)
+        .where(tuple_(ClaveIdempotencia.usuario_id, ClaveIdempotencia.clave).in_(lote))
+        .execution_options(synchronize_session=False)
+    ).rowcount
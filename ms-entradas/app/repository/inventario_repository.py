@@ -0,0 +1,156 @@
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.constants.inventario_states import EstadoInventario, ModoInventario
+from app.model.inventario_model import InventarioEvento
+
+def get_inventario(db: Session, evento_id: int):
+    return db.get(InventarioEvento, evento_id)
+
+def crear_inventario(db: Session, evento_id: int, aforo: int, nombre: str, precio: float,
+                     modo: str = ModoInventario.MATERIALIZADO):
+    # En modo perezoso no hay nada que generar: el evento es vendible desde el inicio
+    estado = EstadoInventario.VENDIBLE if modo == ModoInventario.PEREZOSO else EstadoInventario.GENERANDO
+    inventario = InventarioEvento(
+        evento_id=evento_id,
+        evento_nombre=nombre,
+        precio=precio,
+        aforo=aforo,
+        generadas=0,
+        estado=estado,
+        modo=modo,
+        disponibles=aforo if modo == ModoInventario.PEREZOSO else 0,
+        vendidas=0,
+        canceladas=0
+    )
+    db.add(inventario)
+    db.commit()
+    return inventario
+
+def get_inventarios_generando(db: Session):
+    return db.query(InventarioEvento).filter(
+        InventarioEvento.estado == EstadoInventario.GENERANDO
+    ).all()
+
+def get_inventarios_cancelando(db: Session):
+    return db.query(InventarioEvento).filter(
+        InventarioEvento.estado == EstadoInventario.CANCELANDO
+    ).all()
+
+def get_inventarios_archivando(db: Session):
+    return db.query(InventarioEvento).filter(
+        InventarioEvento.estado == EstadoInventario.ARCHIVANDO
+    ).all()
+
+def _inventario_o_vacio(db: Session, evento_id: int):
+    """Los eventos sin inventario reciben uno vacío para poder marcarlos"""
+    inventario = get_inventario(db, evento_id)
+    if inventario is None:
+        inventario = InventarioEvento(
+            evento_id=evento_id,
+            aforo=0,
+            precio=0.0,
+            generadas=0,
+            modo=ModoInventario.MATERIALIZADO,
+            vendidas=0,
+            canceladas=0
+        )
+        db.add(inventario)
+    return inventario
+
+def marcar_cancelando(db: Session, evento_id: int):
+    """
+    Marca el evento como 'cancelando' (sin hacer commit). Desde ese momento las lecturas y
+    compras ignoran sus entradas aunque todavía no se hayan eliminado.
+    """
+    inventario = _inventario_o_vacio(db, evento_id)
+    inventario.estado = EstadoInventario.CANCELANDO
+    inventario.disponibles = 0
+    return inventario
+
+def marcar_archivando(db: Session, evento_id: int):
+    """
+    Marca el evento finalizado como 'archivando' (sin hacer commit); a partir de ahí sus
+    entradas dejan de venderse y listarse. Retorna None si no hay nada que archivar: el
+    evento ya se archivó o fue cancelado (sus entradas se eliminan, no se archivan).
+    """
+    inventario = _inventario_o_vacio(db, evento_id)
+    if inventario.estado in EstadoInventario.CANCELADOS or inventario.estado == EstadoInventario.ARCHIVADO:
+        return None
+    inventario.estado = EstadoInventario.ARCHIVANDO
+    inventario.disponibles = 0
+    return inventario
+
+def descontar_disponibles(db: Session, evento_id: int, cantidad: int):
+    """
+    Pasa `cantidad` plazas de disponibles a vendidas con un UPDATE condicional.
+    Devuelve (evento_nombre, precio) o None si el contador no tiene plazas suficientes.
+    """
+    stmt = (
+        update(InventarioEvento)
+        .where(
+            InventarioEvento.evento_id == evento_id,
+            InventarioEvento.disponibles >= cantidad
+        )
+        .values(
+            disponibles=InventarioEvento.disponibles - cantidad,
+            vendidas=InventarioEvento.vendidas + cantidad
+        )
+        .returning(InventarioEvento.evento_nombre, InventarioEvento.precio)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).first()
+
+def registrar_venta(db: Session, evento_id: int, cantidad: int = 1):
+    db.execute(
+        update(InventarioEvento)
+        .where(InventarioEvento.evento_id == evento_id)
+        .values(
+            disponibles=InventarioEvento.disponibles - cantidad,
+            vendidas=InventarioEvento.vendidas + cantidad
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def registrar_cancelacion(db: Session, evento_id: int, cantidad: int = 1):
+    db.execute(
+        update(InventarioEvento)
+        .where(InventarioEvento.evento_id == evento_id)
+        .values(
+            vendidas=InventarioEvento.vendidas - cantidad,
+            canceladas=InventarioEvento.canceladas + cantidad
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def registrar_liberacion(db: Session, evento_id: int, cantidad: int):
+    """Devuelve a disponibles plazas que estaban retenidas por una reserva"""
+    db.execute(
+        update(InventarioEvento)
+        .where(InventarioEvento.evento_id == evento_id)
+        .values(
+            disponibles=InventarioEvento.disponibles + cantidad,
+            vendidas=InventarioEvento.vendidas - cantidad
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def ajustar_contadores(db: Session, evento_id: int, aforo: int = 0, generadas: int = 0, disponibles: int = 0):
+    """Suma los deltas a los contadores del inventario con un UPDATE (sin hacer commit)"""
+    db.execute(
+        update(InventarioEvento)
+        .where(InventarioEvento.evento_id == evento_id)
+        .values(
+            aforo=InventarioEvento.aforo + aforo,
+            generadas=InventarioEvento.generadas + generadas,
+            disponibles=InventarioEvento.disponibles + disponibles
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def renombrar_inventario(db: Session, evento_id: int, nombre: str):
+    db.execute(
+        update(InventarioEvento)
+        .where(InventarioEvento.evento_id == evento_id)
+        .values(evento_nombre=nombre)
+        .execution_options(synchronize_session=False)
+    )
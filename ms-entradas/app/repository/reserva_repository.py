@@ -0,0 +1,51 @@
+from datetime import datetime
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from app.config.settings import settings
+from app.model.reserva_model import ReservaEntrada
+
+def crear_reservas(db: Session, reserva_id: str, entradas: list, usuario_id: int, expira_en: datetime):
+    db.add_all([
+        ReservaEntrada(
+            entrada_id=entrada.id,
+            reserva_id=reserva_id,
+            usuario_id=usuario_id,
+            evento_id=entrada.evento_id,
+            expira_en=expira_en
+        )
+        for entrada in entradas
+    ])
+
+def get_reserva(db: Session, reserva_id: str, usuario_id: int):
+    return db.scalars(
+        select(ReservaEntrada).where(
+            ReservaEntrada.reserva_id == reserva_id,
+            ReservaEntrada.usuario_id == usuario_id
+        )
+    ).all()
+
+def get_reservas_expiradas(db: Session, ahora: datetime, tamano: int):
+    stmt = (
+        select(ReservaEntrada)
+        .where(ReservaEntrada.expira_en <= ahora)
+        .order_by(ReservaEntrada.expira_en)
+        .limit(tamano)
+    )
+    if settings.ENTRADAS_SKIP_LOCKED:
+        # Varias instancias pueden barrer reservas sin pisarse
+        stmt = stmt.with_for_update(skip_locked=True)
+    return db.scalars(stmt).all()
+
+def eliminar_reservas(db: Session, entrada_ids: list):
+    db.execute(
+        delete(ReservaEntrada)
+        .where(ReservaEntrada.entrada_id.in_(entrada_ids))
+        .execution_options(synchronize_session=False)
+    )
+
+def eliminar_reservas_evento(db: Session, evento_id: int):
+    db.execute(
+        delete(ReservaEntrada)
+        .where(ReservaEntrada.evento_id == evento_id)
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,64 @@
+from sqlalchemy import delete, func, insert as sa_insert, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.constants.entrada_states import EstadoEntrada
+from app.model.entrada_model import Entrada
+from app.model.entrada_archivo_model import EntradaArchivada
+from app.model.ventas_model import VentasEvento
+
+def _vendidas(modelo):
+    return select(modelo.evento_id, modelo.id, modelo.precio).where(
+        modelo.usuario_id.isnot(None),
+        modelo.estado == EstadoEntrada.VENDIDA
+    )
+
+def _consulta_agrupada():
+    """
+    Entradas vendidas (con usuario asignado) agrupadas por evento; las reservadas aún no cuentan.
+    Incluye las de eventos finalizados, que ya se movieron a entradas_archivo.
+    """
+    vendidas = _vendidas(Entrada).union_all(_vendidas(EntradaArchivada)).subquery()
+    return (
+        select(
+            vendidas.c.evento_id,
+            func.count(vendidas.c.id).label("cantidad"),
+            func.coalesce(func.sum(vendidas.c.precio), 0.0).label("ingresos")
+        )
+        .group_by(vendidas.c.evento_id)
+    )
+
+def ventas_agrupadas(db: Session):
+    """Calcula las ventas por evento con GROUP BY en la base de datos"""
+    return db.execute(_consulta_agrupada()).all()
+
+def get_ventas_por_evento(db: Session):
+    """Lee el acumulado incremental de ventas (una fila por evento)"""
+    return db.execute(
+        select(VentasEvento.evento_id, VentasEvento.cantidad, VentasEvento.ingresos)
+    ).all()
+
+def acumular_ventas(db: Session, evento_id: int, cantidad: int, importe: float):
+    """Suma (o resta, con valores negativos) ventas al acumulado del evento con un upsert"""
+    stmt = insert(VentasEvento).values(evento_id=evento_id, cantidad=cantidad, ingresos=importe)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[VentasEvento.evento_id],
+        set_={
+            "cantidad": VentasEvento.cantidad + stmt.excluded.cantidad,
+            "ingresos": VentasEvento.ingresos + stmt.excluded.ingresos
+        }
+    )
+    db.execute(stmt)
+
+def eliminar_ventas_evento(db: Session, evento_id: int):
+    db.execute(delete(VentasEvento).where(VentasEvento.evento_id == evento_id))
+
+def acumulado_vacio(db: Session) -> bool:
+    return db.execute(select(VentasEvento.evento_id).limit(1)).first() is None
+
+def reconstruir_ventas_por_evento(db: Session):
+    """Reconstruye el acumulado desde entradas y entradas_archivo (INSERT ... SELECT en una sentencia)"""
+    db.execute(delete(VentasEvento))
+    db.execute(
+        sa_insert(VentasEvento).from_select(["evento_id", "cantidad", "ingresos"], _consulta_agrupada())
+    )
+    db.commit()
@@ -1,3 +1,5 @@
+import hashlib
+import hmac
 from jose import jwt, JWTError
 from app.config.settings import settings
 
@@ -7,3 +9,13 @@ def verify_token(token: str):
         return payload
     except JWTError:
         return None
+
+def clave_derivada(proposito: str, clave: str = "") -> str:
+    """
+    Clave de firma para un uso concreto: la configurada o, si está vacía, una derivada de
+    SECRET_KEY con el propósito como etiqueta. Así un token de un uso nunca vale para otro
+    (p. ej. un token de admisión como token de sesión).
+    """
+    if clave:
+        return clave
+    return hmac.new(settings.SECRET_KEY.encode(), proposito.encode(), hashlib.sha256).hexdigest()
@@ -1,6 +1,9 @@
-from fastapi import Depends, HTTPException
+from typing import Optional
+from fastapi import Depends, Header, HTTPException
 from fastapi.security import OAuth2PasswordBearer
+from app.config.settings import settings
 from app.security.auth import verify_token
+from app.security.sala_espera import sala_espera
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
@@ -14,3 +17,19 @@ def require_admin(user: dict = Depends(get_current_user)):
     if user.get("rol") != "administrador":
         raise HTTPException(status_code=403, detail="Acceso restringido a administradores")
     return user
+
+def require_admision(
+    x_token_admision: Optional[str] = Header(None),
+    user: dict = Depends(get_current_user)
+) -> Optional[int]:
+    """
+    Evento para el que el usuario tiene un token de admisión de la sala de espera.
+    Se valida sólo con la firma, así que las compras sin turno se rechazan sin tocar la base de datos.
+    Con la sala de espera desactivada devuelve None.
+    """
+    if not settings.SALA_ESPERA_ACTIVA:
+        return None
+    evento_id = sala_espera.validar_admision(x_token_admision, user["id"]) if x_token_admision else None
+    if evento_id is None:
+        raise HTTPException(status_code=403, detail="Se requiere un turno de admisión válido para comprar")
+    return evento_id
@@ -0,0 +1,31 @@
+import base64
+import hashlib
+import hmac
+from typing import Optional
+from app.config.settings import settings
+from app.security.auth import clave_derivada
+
+# Código de acceso de una entrada vendida: "<id>.<evento_id>.<usuario_id>.<firma>", con la firma
+# HMAC-SHA256 de los tres campos. Se verifica en la puerta sin consultar la base de datos.
+
+def _firma(entrada_id: int, evento_id: int, usuario_id: int) -> str:
+    clave = clave_derivada("codigo_acceso", settings.ENTRADAS_CLAVE_FIRMA).encode()
+    mensaje = f"{entrada_id}.{evento_id}.{usuario_id}".encode()
+    digest = hmac.new(clave, mensaje, hashlib.sha256).digest()[:16]
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+def firmar_codigo(entrada_id: int, evento_id: int, usuario_id: int) -> str:
+    return f"{entrada_id}.{evento_id}.{usuario_id}.{_firma(entrada_id, evento_id, usuario_id)}"
+
+def verificar_codigo(codigo: str) -> Optional[tuple]:
+    """Retorna (entrada_id, evento_id, usuario_id) si la firma es válida, None si no"""
+    partes = codigo.split(".")
+    if len(partes) != 4:
+        return None
+    try:
+        entrada_id, evento_id, usuario_id = (int(parte) for parte in partes[:3])
+    except ValueError:
+        return None
+    if not hmac.compare_digest(partes[3], _firma(entrada_id, evento_id, usuario_id)):
+        return None
+    return entrada_id, evento_id, usuario_id
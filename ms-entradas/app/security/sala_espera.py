@@ -0,0 +1,114 @@
+import math
+import threading
+import time
+from typing import Optional
+from jose import jwt, JWTError
+from app.config.settings import settings
+from app.security.auth import clave_derivada
+
+TIPO_TURNO = "turno"
+TIPO_ADMISION = "admision"
+
+class _ColaEvento:
+    def __init__(self, ahora: float, rafaga: int):
+        self.emitidos = 0  # Último turno entregado
+        self.admitidos = float(rafaga)  # Turnos con paso libre hasta este número
+        self.actualizado = ahora
+
+class SalaEspera:
+    """
+    Sala de espera en memoria para las compras de cada evento.
+    Reparte turnos firmados y deja pasar `tasa` turnos por segundo; los primeros `rafaga`
+    entran sin esperar. Consultar la posición no toca la base de datos, y el token de
+    admisión firmado es lo único que aceptan los endpoints de compra.
+    La cola y la tasa son por instancia del servicio: con varias réplicas cada una reparte sus
+    propios turnos, por eso SALA_ESPERA_ACTIVA viene desactivada. Los tokens se firman con una
+    clave propia, no con la de los tokens de sesión. El token de admisión no es de un solo uso:
+    durante SALA_ESPERA_TTL_ADMISION segundos permite varias compras del mismo usuario y evento
+    (la ventana para reintentar una compra fallida sin volver a la cola).
+    """
+
+    def __init__(self, tasa: float, rafaga: int):
+        self._tasa = tasa
+        self._rafaga = rafaga
+        self._colas = {}
+        self._lock = threading.Lock()
+
+    def _avanzar(self, evento_id: int, ahora: float) -> _ColaEvento:
+        cola = self._colas.get(evento_id)
+        if cola is None:
+            cola = self._colas[evento_id] = _ColaEvento(ahora, self._rafaga)
+        # El cursor avanza con el tiempo, pero sin acumular más de `rafaga` pases por delante de la cola
+        cola.admitidos = min(
+            cola.admitidos + self._tasa * (ahora - cola.actualizado),
+            cola.emitidos + self._rafaga
+        )
+        cola.actualizado = ahora
+        return cola
+
+    def _clave(self) -> str:
+        return clave_derivada("sala_espera", settings.SALA_ESPERA_CLAVE_FIRMA)
+
+    def _firmar(self, datos: dict, ttl: int) -> str:
+        return jwt.encode(
+            {**datos, "exp": int(time.time()) + ttl},
+            self._clave(),
+            algorithm=settings.ALGORITHM
+        )
+
+    def _leer(self, token: str, tipo: str, usuario_id: int) -> Optional[dict]:
+        try:
+            datos = jwt.decode(token, self._clave(), algorithms=[settings.ALGORITHM])
+        except JWTError:
+            return None
+        if datos.get("tipo") != tipo or datos.get("usuario_id") != usuario_id:
+            return None
+        return datos
+
+    def _estado(self, evento_id: int, usuario_id: int, turno: int, token_turno: str, ahora: float) -> dict:
+        cola = self._avanzar(evento_id, ahora)
+        pendientes = max(0, math.ceil(turno - cola.admitidos))
+        estado = {
+            "evento_id": evento_id,
+            "turno": turno,
+            "posicion": pendientes,
+            "admitido": pendientes == 0,
+            "espera_estimada": round(pendientes / self._tasa, 1) if self._tasa else None,
+            "token_turno": token_turno,
+            "token_admision": None
+        }
+        if estado["admitido"]:
+            estado["token_admision"] = self._firmar(
+                {"tipo": TIPO_ADMISION, "usuario_id": usuario_id, "evento_id": evento_id},
+                settings.SALA_ESPERA_TTL_ADMISION
+            )
+        return estado
+
+    def entrar(self, evento_id: int, usuario_id: int) -> dict:
+        """Entrega el siguiente turno de la cola del evento"""
+        ahora = time.monotonic()
+        with self._lock:
+            cola = self._avanzar(evento_id, ahora)
+            cola.emitidos += 1
+            turno = cola.emitidos
+        token_turno = self._firmar(
+            {"tipo": TIPO_TURNO, "usuario_id": usuario_id, "evento_id": evento_id, "turno": turno},
+            settings.SALA_ESPERA_TTL_TURNO
+        )
+        with self._lock:
+            return self._estado(evento_id, usuario_id, turno, token_turno, ahora)
+
+    def consultar(self, evento_id: int, usuario_id: int, token_turno: str) -> dict:
+        """Posición actual del turno; si ya le toca incluye el token de admisión"""
+        datos = self._leer(token_turno, TIPO_TURNO, usuario_id)
+        if datos is None or datos.get("evento_id") != evento_id:
+            raise ValueError("Turno no válido o expirado, vuelve a entrar en la cola")
+        with self._lock:
+            return self._estado(evento_id, usuario_id, datos["turno"], token_turno, time.monotonic())
+
+    def validar_admision(self, token_admision: str, usuario_id: int) -> Optional[int]:
+        """Devuelve el evento para el que el usuario fue admitido, o None si el token no es válido"""
+        datos = self._leer(token_admision, TIPO_ADMISION, usuario_id)
+        return datos.get("evento_id") if datos else None
+
+sala_espera = SalaEspera(settings.SALA_ESPERA_TASA, settings.SALA_ESPERA_RAFAGA)
@@ -0,0 +1,62 @@
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.config.database import SessionLocal, ejecutar_transaccion
+from app.config.settings import settings
+from app.repository.idempotencia_repository import purgar_claves_idempotencia, purgar_mensajes_procesados
+from app.service.entrada_service import liberar_reservas_expiradas
+
+def purgar_idempotencia(db: Session) -> int:
+    """
+    Borra por lotes las Idempotency-Key y los message_id más antiguos que su retención;
+    pasado ese tiempo un reintento con la misma clave se trata como una compra nueva.
+    """
+    ahora = datetime.now(timezone.utc)
+    tamano = settings.IDEMPOTENCIA_PURGA_LOTE
+    purgadas = 0
+    for purgar, retencion in (
+        (purgar_claves_idempotencia, settings.IDEMPOTENCIA_RETENCION),
+        (purgar_mensajes_procesados, settings.MENSAJES_PROCESADOS_RETENCION)
+    ):
+        antes_de = ahora - timedelta(seconds=retencion)
+        while True:
+            borradas = ejecutar_transaccion(
+                db, lambda s: purgar(s, antes_de, tamano), nombre="purga_idempotencia"
+            )
+            purgadas += borradas
+            if borradas < tamano:
+                break
+    return purgadas
+
+def start_barrido_reservas():
+    """
+    Devuelve a disponibles las entradas de reservas expiradas, por lotes.
+    Cada IDEMPOTENCIA_PURGA_INTERVALO segundos purga además las tablas de idempotencia.
+    """
+    tamano = settings.RESERVAS_BARRIDO_LOTE
+    print(f"⏳ Barrido de reservas iniciado (lotes de {tamano})")
+    proxima_purga = time.monotonic()
+    while True:
+        db = SessionLocal()
+        try:
+            procesadas = liberar_reservas_expiradas(db, tamano)
+            if procesadas:
+                print(f"♻️ Reservas expiradas liberadas: {procesadas}")
+            if time.monotonic() >= proxima_purga:
+                proxima_purga = time.monotonic() + settings.IDEMPOTENCIA_PURGA_INTERVALO
+                purgadas = purgar_idempotencia(db)
+                if purgadas:
+                    print(f"🧹 Claves de idempotencia y mensajes procesados purgados: {purgadas}")
+        except SQLAlchemyError as db_error:
+            procesadas = 0
+            print("❌ Error de base de datos en el barrido de reservas:", str(db_error))
+        except Exception as e:
+            procesadas = 0
+            print("❌ Error en el barrido de reservas:", str(e))
+        finally:
+            db.close()
+
+        # Si el lote vino lleno quedan más expiradas: seguir sin esperar
+        if procesadas < tamano:
+            time.sleep(settings.RESERVAS_BARRIDO_INTERVALO)
@@ -0,0 +1,150 @@
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.config.database import SessionLocal, ejecutar_transaccion
+from app.config.settings import settings
+from app.repository.checkin_repository import get_checkins_evento, get_canceladas_evento, registrar_checkins
+from app.security.firma_entradas import verificar_codigo
+
+class _EstadoEvento:
+    def __init__(self, usados: set, canceladas: set):
+        self.usados = usados
+        self.canceladas = canceladas
+        self.recargar_en = time.monotonic() + settings.CHECKIN_RECARGA
+
+class ControlAcceso:
+    """
+    Validación de ingresos en la puerta. La firma del código se comprueba en memoria y cada
+    evento mantiene el conjunto de entradas ya usadas y el de canceladas, cargados de la base de
+    datos la primera vez y recargados cada CHECKIN_RECARGA segundos (para ver los ingresos y
+    cancelaciones de otras instancias). Los ingresos aceptados se guardan después, por lotes.
+    """
+
+    def __init__(self, maximo: int):
+        self._maximo = maximo
+        self._eventos = OrderedDict()
+        self._lock = threading.Lock()
+        self._pendientes = queue.Queue()
+
+    def _estado(self, evento_id: int) -> _EstadoEvento:
+        with self._lock:
+            estado = self._eventos.get(evento_id)
+            if estado is not None and estado.recargar_en > time.monotonic():
+                self._eventos.move_to_end(evento_id)
+                return estado
+
+        with SessionLocal() as db:
+            usados = get_checkins_evento(db, evento_id)
+            canceladas = get_canceladas_evento(db, evento_id)
+
+        with self._lock:
+            anterior = self._eventos.get(evento_id)
+            if anterior is not None:
+                # Los ingresos aceptados aquí pueden no estar guardados todavía
+                usados |= anterior.usados
+                canceladas |= anterior.canceladas
+            estado = _EstadoEvento(usados, canceladas)
+            self._eventos[evento_id] = estado
+            self._eventos.move_to_end(evento_id)
+            while len(self._eventos) > self._maximo:
+                self._eventos.popitem(last=False)
+            return estado
+
+    def validar(self, evento_id: int, codigos: list) -> list:
+        estado = self._estado(evento_id)
+        resultados = []
+        for codigo in codigos:
+            datos = verificar_codigo(codigo)
+            if datos is None:
+                resultados.append({"codigo": codigo, "entrada_id": None, "resultado": "invalida"})
+                continue
+            entrada_id, evento_codigo, usuario_id = datos
+            with self._lock:
+                if evento_codigo != evento_id:
+                    resultado = "otro_evento"
+                elif entrada_id in estado.canceladas:
+                    resultado = "cancelada"
+                elif entrada_id in estado.usados:
+                    resultado = "usada"
+                else:
+                    estado.usados.add(entrada_id)
+                    resultado = "admitida"
+            if resultado == "admitida":
+                self._pendientes.put({
+                    "entrada_id": entrada_id,
+                    "evento_id": evento_id,
+                    "usuario_id": usuario_id,
+                    "registrado_en": datetime.now(timezone.utc)
+                })
+            resultados.append({"codigo": codigo, "entrada_id": entrada_id, "resultado": resultado})
+        return resultados
+
+    def cancelar(self, evento_id: int, entrada_id: int):
+        with self._lock:
+            estado = self._eventos.get(evento_id)
+            if estado is not None:
+                estado.canceladas.add(entrada_id)
+
+    def tomar_lote(self, tamano: int, espera: float) -> list:
+        """Espera hasta `espera` segundos el primer ingreso pendiente y junta hasta `tamano`"""
+        try:
+            lote = [self._pendientes.get(timeout=espera)]
+        except queue.Empty:
+            return []
+        while len(lote) < tamano:
+            try:
+                lote.append(self._pendientes.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+
+    def devolver(self, lote: list):
+        for fila in lote:
+            self._pendientes.put(fila)
+
+control_acceso = ControlAcceso(settings.CHECKIN_EVENTOS_MAX)
+
+# Las cancelaciones de entradas se aplican al control de acceso cuando se confirma la
+# transacción exterior (los savepoints también disparan estos eventos)
+
+def registrar_cancelada(db: Session, evento_id: int, entrada_id: int):
+    db.info.setdefault("canceladas", []).append((evento_id, entrada_id))
+
+@event.listens_for(Session, "after_commit")
+def _aplicar_canceladas(session):
+    if session.in_nested_transaction():
+        return
+    for evento_id, entrada_id in session.info.pop("canceladas", []):
+        control_acceso.cancelar(evento_id, entrada_id)
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_canceladas(session):
+    if session.in_nested_transaction():
+        return
+    session.info.pop("canceladas", None)
+
+def start_registro_checkins():
+    """Guarda por lotes los ingresos aceptados en la puerta"""
+    tamano = settings.CHECKIN_TAMANO_LOTE
+    print(f"🎟️ Registro de ingresos iniciado (lotes de {tamano})")
+    while True:
+        lote = control_acceso.tomar_lote(tamano, settings.CHECKIN_INTERVALO)
+        if not lote:
+            continue
+        db = SessionLocal()
+        try:
+            repetidas = ejecutar_transaccion(db, lambda s: registrar_checkins(s, lote), nombre="registro_checkins")
+            if repetidas:
+                print(f"⚠️ Entradas con ingreso ya registrado en otra puerta: {repetidas}")
+        except SQLAlchemyError as db_error:
+            # Se conservan para el siguiente ciclo
+            control_acceso.devolver(lote)
+            print("❌ Error de base de datos registrando ingresos:", str(db_error))
+            time.sleep(settings.CHECKIN_INTERVALO)
+        finally:
+            db.close()
@@ -0,0 +1,90 @@
+import asyncio
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config.database import AsyncSessionLocal, ejecutar_transaccion_async
+from app.config.settings import settings
+
+def _aplicar_lote(s: Session, operaciones: list) -> list:
+    """
+    Ejecuta las compras del lote en la misma transacción, cada una en su savepoint: la que
+    falla (sin entradas, clave de idempotencia repetida) se deshace sola y el resto sigue.
+    Un conflicto de serialización no se atrapa aquí y hace reintentar el lote completo.
+    Las anotaciones en s.info (bits del mapa de asientos, cancelaciones) se aplican sólo al
+    confirmar la transacción exterior; las de una compra deshecha se descartan aquí.
+    """
+    resultados = []
+    for operacion in operaciones:
+        anotadas = {clave: len(valor) for clave, valor in s.info.items() if isinstance(valor, list)}
+        savepoint = s.begin_nested()
+        try:
+            resultados.append((None, operacion(s)))
+            savepoint.commit()
+        except (ValueError, IntegrityError) as e:
+            savepoint.rollback()
+            for clave, valor in s.info.items():
+                if isinstance(valor, list):
+                    del valor[anotadas.get(clave, 0):]
+            resultados.append((e, None))
+    return resultados
+
+class CoordinadorCompras:
+    """
+    Agrupa las compras de un mismo evento (group commit). Las peticiones se encolan por evento
+    y una tarea por evento las ejecuta en lotes: una transacción y un commit cada
+    COMPRAS_LOTE_ESPERA segundos en lugar de una transacción por comprador compitiendo por las
+    mismas filas. Vive en el event loop del proceso; cada instancia agrupa sus propias compras.
+    """
+
+    def __init__(self, espera: float, maximo: int):
+        self._espera = espera
+        self._maximo = maximo
+        self._colas = {}
+        self._tareas = {}
+
+    async def ejecutar(self, evento_id: int, operacion):
+        """Encola operacion(Session) y espera su resultado (o su excepción) cuando se confirme el lote"""
+        futuro = asyncio.get_running_loop().create_future()
+        self._colas.setdefault(evento_id, []).append((operacion, futuro))
+        if evento_id not in self._tareas:
+            self._tareas[evento_id] = asyncio.create_task(self._despachar(evento_id))
+        return await futuro
+
+    async def _despachar(self, evento_id: int):
+        try:
+            while self._colas.get(evento_id):
+                if len(self._colas[evento_id]) < self._maximo:
+                    # Ventana para que se sumen al lote las compras que llegan casi a la vez
+                    await asyncio.sleep(self._espera)
+                cola = self._colas[evento_id]
+                lote, self._colas[evento_id] = cola[:self._maximo], cola[self._maximo:]
+                await self._procesar(evento_id, lote)
+        finally:
+            self._tareas.pop(evento_id, None)
+            self._colas.pop(evento_id, None)
+
+    async def _procesar(self, evento_id: int, lote: list):
+        # Las peticiones abandonadas por el cliente antes de empezar no compran
+        lote = [(operacion, futuro) for operacion, futuro in lote if not futuro.done()]
+        if not lote:
+            return
+        try:
+            async with AsyncSessionLocal() as db:
+                resultados = await ejecutar_transaccion_async(
+                    db, lambda s: _aplicar_lote(s, [operacion for operacion, _ in lote]), nombre="compra_lote"
+                )
+        except Exception as e:
+            print(f"❌ Error en lote de {len(lote)} compras del evento {evento_id}:", str(e))
+            for _, futuro in lote:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            return
+
+        for (_, futuro), (error, valor) in zip(lote, resultados):
+            if futuro.done():
+                continue
+            if error is not None:
+                futuro.set_exception(error)
+            else:
+                futuro.set_result(valor)
+
+coordinador_compras = CoordinadorCompras(settings.COMPRAS_LOTE_ESPERA, settings.COMPRAS_LOTE_MAX)
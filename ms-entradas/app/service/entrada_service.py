@@ -1,35 +1,152 @@
-import httpx
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.config.database import SessionLocal, SessionLecturaLocal, ejecutar_transaccion, ejecutar_transaccion_async
+from app.config.settings import settings
+from app.dto.entrada_dto import EntradaResponse, EntradaConEventoResponse, DisponibilidadResponse, ReservaResponse
 from app.repository.entrada_repository import (
-    get_entradas_disponibles,
-    get_entradas_asignadas,
-    asignar_entrada, mis_entradas, historial_entradas, get_entrada
+    select_entradas_disponibles,
+    select_entradas_asignadas,
+    select_todas_entradas,
+    select_entradas_por_evento,
+    paginar, iterar_por_lotes,
+    asignar_entrada, mis_entradas, historial_entradas,
+    reclamar_entradas, materializar_entradas, contar_por_estado,
+    confirmar_reservadas, liberar_reservadas, eliminar_reservadas
+)
+from app.repository.entrada_repository_async import (
+    get_entrada_async,
+    get_inventario_async,
+    mis_entradas_async,
+    get_entradas_por_ids_async,
+    get_entradas_disponibles_async,
+    get_entradas_asignadas_async,
+    get_todas_entradas_async,
+    get_entradas_por_evento_async
+)
+from app.repository.inventario_repository import (
+    get_inventario,
+    descontar_disponibles,
+    registrar_venta,
+    registrar_cancelacion,
+    registrar_liberacion
+)
+from app.repository.idempotencia_repository import get_clave_idempotencia, guardar_clave_idempotencia
+from app.repository.reserva_repository import (
+    crear_reservas,
+    get_reserva,
+    get_reservas_expiradas,
+    eliminar_reservas
+)
+from app.constants.entrada_states import EstadoEntrada
+from app.constants.inventario_states import EstadoInventario, ModoInventario
+from app.repository.ventas_repository import (
+    ventas_agrupadas,
+    get_ventas_por_evento,
+    acumular_ventas
+)
+from app.security.firma_entradas import firmar_codigo
+from app.service.control_acceso import control_acceso, registrar_cancelada
+from app.service.coordinador_compras import coordinador_compras
+from app.service.evento_cache import obtener_evento, obtener_eventos
+from app.service.mapa_asientos import mapa_asientos, registrar_ocupadas, registrar_liberadas
+from app.events.publisher import (
+    publish_entrada_comprada,
+    publish_entrada_cancelada,
+    publish_entradas_compradas
 )
-from app.events.publisher import publish_entrada_comprada, publish_entrada_cancelada
 from app.model.entrada_model import Entrada
 
-def comprar_entrada(db: Session, entrada_id: int, user_id: int):
-    entrada = asignar_entrada(db, entrada_id, user_id)
+# Las unidades de trabajo (_tx_*) reciben una Session síncrona y no hacen commit: el camino
+# síncrono las ejecuta con ejecutar_transaccion y el asíncrono con ejecutar_transaccion_async.
+
+def _tx_comprar_entrada(s: Session, entrada_id: int, user_id: int, evento_id: int = None):
+    entrada = asignar_entrada(s, entrada_id, user_id, evento_id)
     if not entrada:
         raise ValueError("Entrada no disponible")
-    publish_entrada_comprada(entrada.id, user_id)
+    registrar_venta(s, entrada.evento_id)
+    _acumular_ventas(s, [entrada])
+    registrar_ocupadas(s, entrada.evento_id, [entrada.id])
+    publish_entrada_comprada(s, entrada.id, user_id)
     return entrada
 
+def comprar_entrada(db: Session, entrada_id: int, user_id: int):
+    return ejecutar_transaccion(db, lambda s: _tx_comprar_entrada(s, entrada_id, user_id), nombre="comprar_entrada")
+
+async def _ejecutar_compra(db: AsyncSession, operacion, user_id: int, clave: str = None, ruta: str = None,
+                           nombre: str = "compra", evento_id: int = None):
+    """
+    Ejecuta una operación de compra. Con Idempotency-Key la respuesta se guarda en la misma
+    transacción que la compra, y un reintento con la misma clave devuelve esa respuesta
+    sin volver a comprar. Los errores no se guardan: un reintento tras un 4xx vuelve a intentarlo.
+    Con COMPRAS_AGRUPADAS y evento_id la operación se suma al lote del coordinador del evento.
+    """
+    async def _transaccion(unidad):
+        if evento_id is not None and settings.COMPRAS_AGRUPADAS:
+            return await coordinador_compras.ejecutar(evento_id, unidad)
+        return await ejecutar_transaccion_async(db, unidad, nombre=nombre)
+
+    if clave is None:
+        return await _transaccion(operacion)
+
+    def _con_clave(s: Session):
+        guardada = get_clave_idempotencia(s, user_id, clave)
+        if guardada is not None:
+            if guardada.ruta != ruta:
+                raise ValueError("La Idempotency-Key ya se usó para otra operación")
+            return json.loads(guardada.respuesta)
+        respuesta = jsonable_encoder(operacion(s))
+        guardar_clave_idempotencia(s, user_id, clave, ruta, json.dumps(respuesta))
+        return respuesta
+
+    try:
+        return await _transaccion(_con_clave)
+    except IntegrityError:
+        # Una petición concurrente con la misma clave se confirmó antes: devolver su respuesta
+        return await ejecutar_transaccion_async(db, _con_clave, nombre=nombre)
+
+def _tx_comprar_plaza_virtual(s: Session, evento_id: int, user_id: int):
+    """
+    Las plazas de un evento perezoso no están numeradas: comprar una plaza virtual compra la
+    siguiente libre y crea su fila, igual que comprar-entrada-evento.
+    """
+    modo = _modo_inventario(s, evento_id)
+    if modo != ModoInventario.PEREZOSO:
+        raise ValueError("Entrada no disponible")
+    return _tx_comprar_por_evento(s, modo, evento_id, user_id)
+
+async def comprar_entrada_async(db: AsyncSession, entrada_id: int, user_id: int, evento_id: int = None,
+                                clave: str = None):
+    """
+    Con evento_id sólo se puede comprar una entrada de ese evento (el de la admisión).
+    Un id negativo es una plaza virtual de get-disponibles en modo perezoso; como el id no
+    identifica al evento, en ese caso evento_id es obligatorio.
+    """
+    if entrada_id < 0:
+        if evento_id is None:
+            raise ValueError("Para comprar una plaza virtual (id negativo) indica el evento con ?evento_id=")
+        return await _ejecutar_compra(
+            db,
+            lambda s: EntradaResponse.model_validate(_tx_comprar_plaza_virtual(s, evento_id, user_id)),
+            user_id, clave, f"comprar-entrada/{entrada_id}", "comprar_entrada", evento_id
+        )
+    return await _ejecutar_compra(
+        db,
+        lambda s: EntradaResponse.model_validate(_tx_comprar_entrada(s, entrada_id, user_id, evento_id)),
+        user_id, clave, f"comprar-entrada/{entrada_id}", "comprar_entrada"
+    )
+
 def obtener_mis_entradas(db: Session, user_id: int):
     return mis_entradas(db, user_id)
 
-def historial_usuario(db: Session, usuario_id: int):
-    return historial_entradas(db, usuario_id)
+def historial_usuario(db: Session, usuario_id: int, incluir_archivadas: bool = False):
+    return historial_entradas(db, usuario_id, incluir_archivadas)
 
-async def evento_por_entrada(entrada_id: int, db: Session):
-    entrada = get_entrada(db, entrada_id)
-    if not entrada:
-        raise ValueError("Entrada no encontrada")
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"http://eventos:8001/eventos/get-evento/{entrada.evento_id}")
-        if response.status_code != 200:
-            raise ValueError("Evento no encontrado")
-        evento = response.json()
+def _entrada_con_nombre_evento(entrada, evento: dict):
     return {
         "id": entrada.id,
         "codigo": entrada.codigo,
@@ -39,106 +156,451 @@ async def evento_por_entrada(entrada_id: int, db: Session):
         "precio": entrada.precio,
         "estado": entrada.estado
     }
-    
-def obtener_disponibles(db: Session, evento_id: int):
-    return get_entradas_disponibles(db, evento_id)
 
-def obtener_no_disponibles(db: Session, evento_id: int):
-    return get_entradas_asignadas(db, evento_id)
+async def evento_por_entrada(entrada_id: int, db: AsyncSession):
+    entrada = await get_entrada_async(db, entrada_id)
+    if not entrada:
+        raise ValueError("Entrada no encontrada")
+    evento = await obtener_evento(entrada.evento_id)
+    return _entrada_con_nombre_evento(entrada, evento)
 
-def cancelar_entrada_usuario(db: Session, entrada_id: int, user_id: int):
-    entrada = db.query(Entrada).filter(
+async def eventos_por_entradas(entrada_ids: list, db: AsyncSession):
+    """
+    Versión por lotes de evento_por_entrada: una consulta de entradas y una sola
+    llamada a ms-eventos por los eventos distintos. Se omiten entradas o eventos inexistentes.
+    """
+    entradas = await get_entradas_por_ids_async(db, entrada_ids)
+    eventos = await obtener_eventos(entrada.evento_id for entrada in entradas)
+    return [
+        _entrada_con_nombre_evento(entrada, eventos[entrada.evento_id])
+        for entrada in entradas
+        if entrada.evento_id in eventos
+    ]
+
+def _con_codigo_acceso(entrada, evento: dict = None):
+    respuesta = EntradaConEventoResponse.model_validate(entrada)
+    codigo = None
+    if entrada.estado == EstadoEntrada.VENDIDA:
+        codigo = firmar_codigo(entrada.id, entrada.evento_id, entrada.usuario_id)
+    return respuesta.model_copy(update={"evento": evento, "codigo_acceso": codigo})
+
+async def obtener_mis_entradas_async(db: AsyncSession, user_id: int):
+    return [_con_codigo_acceso(entrada) for entrada in await mis_entradas_async(db, user_id)]
+
+async def obtener_mis_entradas_con_evento(db: AsyncSession, user_id: int):
+    """Entradas del usuario con los datos de su evento incluidos (?expand=evento)"""
+    entradas = await mis_entradas_async(db, user_id)
+    eventos = await obtener_eventos(entrada.evento_id for entrada in entradas)
+    return [_con_codigo_acceso(entrada, eventos.get(entrada.evento_id)) for entrada in entradas]
+
+def _listar(db: Session, stmt, limit: int = None, after: int = None):
+    """Sin limit devuelve el listado completo; con limit, una página por keyset sobre id"""
+    if limit is None:
+        return db.scalars(stmt).all()
+    return paginar(db, stmt, limit, after)
+
+def _es_perezoso(inventario) -> bool:
+    return inventario is not None and inventario.modo == ModoInventario.PEREZOSO
+
+def obtener_disponibles(db: Session, evento_id: int, limit: int = None, after: int = None):
+    inventario = get_inventario(db, evento_id)
+    if _es_perezoso(inventario):
+        return list(_plazas_virtuales(inventario, limit, after))
+    return _listar(db, select_entradas_disponibles(evento_id), limit, after)
+
+async def obtener_disponibles_async(db: AsyncSession, evento_id: int, limit: int = None, after: int = None):
+    inventario = await get_inventario_async(db, evento_id)
+    if _es_perezoso(inventario):
+        return list(_plazas_virtuales(inventario, limit, after))
+    return await get_entradas_disponibles_async(db, evento_id, limit, after)
+
+def _plazas_virtuales(inventario, limit: int = None, after: int = None):
+    """
+    En modo perezoso las plazas libres no tienen fila: se genera el rango de plazas.
+    Se identifican con el número de plaza en negativo para no chocar con ids reales,
+    por lo que `after` es el id (negativo) de la última plaza recibida. Se compran con
+    comprar-entrada/{id}?evento_id= (ver comprar_entrada_async).
+    """
+    primera = inventario.aforo - inventario.disponibles + 1
+    if after is not None:
+        primera = max(primera, -after + 1)
+    ultima = inventario.aforo if limit is None else min(inventario.aforo, primera + limit - 1)
+    for plaza in range(primera, ultima + 1):
+        yield EntradaResponse(
+            id=-plaza,
+            codigo=f"{inventario.evento_id}-{plaza}",
+            evento_id=inventario.evento_id,
+            usuario_id=None,
+            precio=inventario.precio,
+            estado=EstadoEntrada.DISPONIBLE,
+            evento_nombre=inventario.evento_nombre
+        )
+
+def obtener_no_disponibles(db: Session, evento_id: int, limit: int = None, after: int = None):
+    return _listar(db, select_entradas_asignadas(evento_id), limit, after)
+
+async def obtener_no_disponibles_async(db: AsyncSession, evento_id: int, limit: int = None, after: int = None):
+    return await get_entradas_asignadas_async(db, evento_id, limit, after)
+
+def _stream_ndjson(generar_filas, fabrica=SessionLocal):
+    """
+    Serializa las filas en NDJSON a medida que se leen. Usa una sesión propia porque
+    la respuesta se sigue enviando después de que termine el endpoint.
+    """
+    db = fabrica()
+    try:
+        for fila in generar_filas(db):
+            yield EntradaResponse.model_validate(fila).model_dump_json() + "\n"
+    finally:
+        db.close()
+
+def obtener_mapa_asientos(db: Session, evento_id: int) -> dict:
+    """Bitmap de disponibilidad del evento (ver app/service/mapa_asientos.py)"""
+    return mapa_asientos.obtener(db, evento_id)
+
+def registrar_ingresos(evento_id: int, codigos: list) -> list:
+    """Valida en memoria los códigos escaneados en la puerta (ver app/service/control_acceso.py)"""
+    return control_acceso.validar(evento_id, codigos)
+
+def stream_disponibles(evento_id: int):
+    def _filas(db: Session):
+        inventario = get_inventario(db, evento_id)
+        if _es_perezoso(inventario):
+            # Las plazas salen del inventario ya leído: no hace falta seguir en la transacción
+            db.expunge(inventario)
+            db.rollback()
+            return _plazas_virtuales(inventario)
+        return iterar_por_lotes(db, select_entradas_disponibles(evento_id), settings.ENTRADAS_LOTE_STREAM)
+    return _stream_ndjson(_filas, SessionLecturaLocal)
+
+def stream_no_disponibles(evento_id: int):
+    return _stream_ndjson(
+        lambda db: iterar_por_lotes(db, select_entradas_asignadas(evento_id), settings.ENTRADAS_LOTE_STREAM)
+    )
+
+def stream_todas_entradas():
+    return _stream_ndjson(
+        lambda db: iterar_por_lotes(db, select_todas_entradas(), settings.ENTRADAS_LOTE_STREAM)
+    )
+
+def stream_entradas_por_evento(evento_id: int):
+    return _stream_ndjson(
+        lambda db: iterar_por_lotes(db, select_entradas_por_evento(evento_id), settings.ENTRADAS_LOTE_STREAM),
+        SessionLecturaLocal
+    )
+
+def _tx_cancelar(s: Session, entrada_id: int, user_id: int):
+    entrada = s.query(Entrada).filter(
         Entrada.id == entrada_id,
         Entrada.usuario_id == user_id,
         Entrada.estado.in_(["vendida", "reservada"])
     ).first()
     if not entrada:
         raise ValueError("Entrada no válida o ya cancelada")
-    
+
+    # Una entrada sólo reservada no llegó a sumarse al acumulado de ventas
+    vendida = entrada.estado == EstadoEntrada.VENDIDA
     entrada.estado = "cancelada"
     entrada.usuario_id = None
-    
-    # Publicar evento de cancelación
-    try:
-        publish_entrada_cancelada(entrada_id, user_id)
-    except Exception as e:
-        print(f"⚠️ Error al publicar evento cancelación (cancelación exitosa): {e}")
-    
-    db.commit()
+    registrar_cancelacion(s, entrada.evento_id)
+    registrar_cancelada(s, entrada.evento_id, entrada.id)
+    if vendida:
+        _acumular_ventas(s, [entrada], signo=-1)
+
+    # El evento de cancelación sólo se publica si la cancelación se confirma
+    publish_entrada_cancelada(s, entrada_id, user_id)
+    return entrada
+
+def cancelar_entrada_usuario(db: Session, entrada_id: int, user_id: int):
+    return ejecutar_transaccion(db, lambda s: _tx_cancelar(s, entrada_id, user_id), nombre="cancelar_entrada")
+
+async def cancelar_entrada_usuario_async(db: AsyncSession, entrada_id: int, user_id: int):
+    return await ejecutar_transaccion_async(
+        db, lambda s: _tx_cancelar(s, entrada_id, user_id), nombre="cancelar_entrada"
+    )
+
+def _modo_inventario(db: Session, evento_id: int):
+    """
+    Devuelve el modo de inventario del evento, o None si el evento no tiene inventario
+    (eventos anteriores al resumen de disponibilidad). Si el resumen indica que el
+    evento está agotado se rechaza la compra sin tocar la tabla de entradas.
+    """
+    inventario = get_inventario(db, evento_id)
+    if inventario is None:
+        return None
+    if inventario.estado in EstadoInventario.CANCELADOS:
+        raise ValueError("El evento fue cancelado")
+    if inventario.estado in EstadoInventario.FINALIZADOS:
+        raise ValueError("El evento ya finalizó")
+    if inventario.estado != EstadoInventario.VENDIBLE:
+        raise ValueError("Las entradas de este evento aún se están generando, intenta más tarde")
+    if inventario.disponibles <= 0:
+        raise ValueError("Entradas agotadas para este evento")
+    return inventario.modo
+
+def _reclamar(db: Session, modo: str, evento_id: int, user_id: int, cantidad: int,
+              estado: str = EstadoEntrada.VENDIDA):
+    """
+    Reclama `cantidad` entradas según el modo de inventario del evento (sin hacer commit).
+    Si no se consiguen todas lanza ValueError para que la transacción se deshaga completa.
+    Las entradas reservadas cuentan en el inventario como asignadas, pero no en las ventas.
+    """
+    if modo is None:
+        entradas = reclamar_entradas(db, evento_id, user_id, cantidad, estado)
+    else:
+        cupo = descontar_disponibles(db, evento_id, cantidad)
+        if cupo is None:
+            entradas = []
+        elif modo == ModoInventario.PEREZOSO:
+            entradas = materializar_entradas(
+                db, evento_id, user_id, cantidad, cupo.evento_nombre, cupo.precio, estado
+            )
+        else:
+            entradas = reclamar_entradas(db, evento_id, user_id, cantidad, estado)
+
+    if len(entradas) < cantidad:
+        if cantidad == 1:
+            raise ValueError("No hay entradas disponibles para este evento")
+        raise ValueError(f"No hay suficientes entradas disponibles (solicitadas: {cantidad})")
+    if estado == EstadoEntrada.VENDIDA:
+        _acumular_ventas(db, entradas)
+    registrar_ocupadas(db, evento_id, [entrada.id for entrada in entradas])
+    return entradas
+
+def _tx_comprar_por_evento(s: Session, modo: str, evento_id: int, user_id: int):
+    entrada = _reclamar(s, modo, evento_id, user_id, 1)[0]
+    publish_entrada_comprada(s, entrada.id, user_id)
     return entrada
 
 def comprar_entrada_por_evento(db: Session, evento_id: int, user_id: int):
     """Compra cualquier entrada disponible para un evento específico"""
-    entradas_disponibles = get_entradas_disponibles(db, evento_id)
-    if not entradas_disponibles:
-        raise ValueError("No hay entradas disponibles para este evento")
-    
-    # Tomar la primera entrada disponible
-    entrada = entradas_disponibles[0]
-    return comprar_entrada(db, entrada.id, user_id)
-
-def obtener_todas_entradas(db: Session):
+    modo = _modo_inventario(db, evento_id)
+    return ejecutar_transaccion(
+        db, lambda s: _tx_comprar_por_evento(s, modo, evento_id, user_id), nombre="comprar_por_evento"
+    )
+
+async def comprar_entrada_por_evento_async(db: AsyncSession, evento_id: int, user_id: int, clave: str = None):
+    # La comprobación del inventario va dentro de la transacción para que un reintento
+    # idempotente devuelva la compra original aunque el evento ya esté agotado
+    return await _ejecutar_compra(
+        db,
+        lambda s: EntradaResponse.model_validate(
+            _tx_comprar_por_evento(s, _modo_inventario(s, evento_id), evento_id, user_id)
+        ),
+        user_id, clave, f"comprar-entrada-evento/{evento_id}", "comprar_por_evento", evento_id
+    )
+
+def obtener_disponibilidad(db: Session, evento_id: int):
+    """Resumen de disponibilidad del evento sin recorrer sus entradas"""
+    inventario = get_inventario(db, evento_id)
+    if inventario is not None:
+        return DisponibilidadResponse(
+            evento_id=evento_id,
+            aforo=inventario.aforo,
+            disponibles=inventario.disponibles,
+            vendidas=inventario.vendidas,
+            canceladas=inventario.canceladas,
+            estado=inventario.estado,
+            modo=inventario.modo
+        )
+
+    # Evento sin inventario: se calcula una vez a partir de las entradas
+    conteos = contar_por_estado(db, evento_id)
+    if not conteos:
+        raise ValueError("Evento sin entradas")
+    return DisponibilidadResponse(
+        evento_id=evento_id,
+        aforo=sum(conteos.values()),
+        disponibles=conteos.get(EstadoEntrada.DISPONIBLE, 0),
+        vendidas=sum(conteos.get(estado, 0) for estado in EstadoEntrada.ASIGNADAS),
+        canceladas=conteos.get(EstadoEntrada.CANCELADA, 0),
+        estado=EstadoInventario.VENDIBLE,
+        modo=ModoInventario.MATERIALIZADO
+    )
+
+def obtener_todas_entradas(db: Session, limit: int = None, after: int = None):
     """Obtener todas las entradas (solo admin)"""
-    return db.query(Entrada).all()
+    return _listar(db, select_todas_entradas(), limit, after)
 
-def obtener_entradas_por_evento(db: Session, evento_id: int):
+async def obtener_todas_entradas_async(db: AsyncSession, limit: int = None, after: int = None):
+    return await get_todas_entradas_async(db, limit, after)
+
+def obtener_entradas_por_evento(db: Session, evento_id: int, limit: int = None, after: int = None):
     """Obtener todas las entradas de un evento específico"""
-    return db.query(Entrada).filter(Entrada.evento_id == evento_id).all()
+    return _listar(db, select_entradas_por_evento(evento_id), limit, after)
 
-def comprar_entradas_multiple(db: Session, evento_id: int, entradas_data: list, user_id: int):
-    """Comprar múltiples entradas para un evento"""
-    entradas_compradas = []
-    
+async def obtener_entradas_por_evento_async(db: AsyncSession, evento_id: int, limit: int = None, after: int = None):
+    return await get_entradas_por_evento_async(db, evento_id, limit, after)
+
+def _cantidad_total(evento_id: int, entradas_data: list) -> int:
+    cantidad = 0
     for entrada_info in entradas_data:
-        entry_id = entrada_info.get("entryId", "general")
         quantity = entrada_info.get("quantity", 1)
-        
-        for _ in range(quantity):
-            # Buscar entrada disponible del tipo solicitado
-            entrada_disponible = db.query(Entrada).filter(
-                Entrada.evento_id == evento_id,
-                Entrada.usuario_id.is_(None),
-                Entrada.estado == "disponible"
-            ).first()
-            
-            if not entrada_disponible:
-                raise ValueError(f"No hay entradas disponibles del tipo {entry_id}")
-            
-            # Comprar la entrada
-            entrada_comprada = comprar_entrada(db, entrada_disponible.id, user_id)
-            entradas_compradas.append(entrada_comprada)
-    
+        if not isinstance(quantity, int) or quantity < 1:
+            raise ValueError(f"Cantidad inválida para el tipo {entrada_info.get('entryId', 'general')}")
+        cantidad += quantity
+
+    if not evento_id or cantidad == 0:
+        raise ValueError("Debe indicar el evento y al menos una entrada")
+    return cantidad
+
+def _tx_comprar_multiple(s: Session, modo: str, evento_id: int, user_id: int, cantidad: int):
+    entradas = _reclamar(s, modo, evento_id, user_id, cantidad)
+    publish_entradas_compradas(s, [entrada.id for entrada in entradas], user_id)
+    return entradas
+
+def _resultado_compra_multiple(entradas_compradas: list):
     return {
         "mensaje": f"Se compraron {len(entradas_compradas)} entradas exitosamente",
-        "entradas": entradas_compradas
+        "entradas": [EntradaResponse.model_validate(entrada) for entrada in entradas_compradas]
     }
 
+def comprar_entradas_multiple(db: Session, evento_id: int, entradas_data: list, user_id: int):
+    """
+    Comprar múltiples entradas para un evento en una sola transacción.
+    Todas las entradas se reclaman con una sentencia; si no alcanzan no se compra ninguna.
+    """
+    cantidad = _cantidad_total(evento_id, entradas_data)
+    modo = _modo_inventario(db, evento_id)
+    entradas_compradas = ejecutar_transaccion(
+        db, lambda s: _tx_comprar_multiple(s, modo, evento_id, user_id, cantidad), nombre="comprar_multiple"
+    )
+    return _resultado_compra_multiple(entradas_compradas)
+
+async def comprar_entradas_multiple_async(db: AsyncSession, evento_id: int, entradas_data: list, user_id: int,
+                                          clave: str = None):
+    cantidad = _cantidad_total(evento_id, entradas_data)
+    return await _ejecutar_compra(
+        db,
+        lambda s: _resultado_compra_multiple(
+            _tx_comprar_multiple(s, _modo_inventario(s, evento_id), evento_id, user_id, cantidad)
+        ),
+        user_id, clave, f"comprar/{evento_id}", "comprar_multiple", evento_id
+    )
+
+def _tx_reservar(s: Session, modo: str, evento_id: int, user_id: int, cantidad: int):
+    entradas = _reclamar(s, modo, evento_id, user_id, cantidad, estado=EstadoEntrada.RESERVADA)
+    reserva_id = str(uuid.uuid4())
+    expira_en = datetime.now(timezone.utc) + timedelta(seconds=settings.RESERVAS_TTL)
+    crear_reservas(s, reserva_id, entradas, user_id, expira_en)
+    return ReservaResponse(
+        reserva_id=reserva_id,
+        expira_en=expira_en,
+        entradas=[EntradaResponse.model_validate(entrada) for entrada in entradas]
+    )
+
+async def reservar_entradas_async(db: AsyncSession, evento_id: int, cantidad: int, user_id: int,
+                                  clave: str = None):
+    """
+    Retiene `cantidad` entradas del evento durante RESERVAS_TTL segundos. La transacción
+    de asignación queda igual de corta que una compra; el pago se hace después y se
+    cierra con confirmar_reserva. Si no se confirma, el barrido libera las entradas.
+    """
+    if cantidad > settings.RESERVAS_MAX_ENTRADAS:
+        raise ValueError(f"No se pueden reservar más de {settings.RESERVAS_MAX_ENTRADAS} entradas")
+    return await _ejecutar_compra(
+        db,
+        lambda s: _tx_reservar(s, _modo_inventario(s, evento_id), evento_id, user_id, cantidad),
+        user_id, clave, f"reservar/{evento_id}", "reservar", evento_id
+    )
+
+def _aware(fecha: datetime) -> datetime:
+    # Algunos drivers devuelven fechas sin zona; se guardan siempre en UTC
+    return fecha if fecha.tzinfo else fecha.replace(tzinfo=timezone.utc)
+
+def _tx_confirmar_reserva(s: Session, reserva_id: str, user_id: int):
+    reservas = get_reserva(s, reserva_id, user_id)
+    ahora = datetime.now(timezone.utc)
+    vigentes = [reserva.entrada_id for reserva in reservas if _aware(reserva.expira_en) > ahora]
+    entradas = confirmar_reservadas(s, vigentes, user_id) if vigentes else []
+    if not entradas:
+        raise ValueError("Reserva no encontrada o expirada")
+
+    eliminar_reservas(s, vigentes)
+    _acumular_ventas(s, entradas)
+    publish_entradas_compradas(s, [entrada.id for entrada in entradas], user_id)
+    return entradas
+
+async def confirmar_reserva_async(db: AsyncSession, reserva_id: str, user_id: int, clave: str = None):
+    """Convierte en venta las entradas de una reserva vigente"""
+    return await _ejecutar_compra(
+        db,
+        lambda s: _resultado_compra_multiple(_tx_confirmar_reserva(s, reserva_id, user_id)),
+        user_id, clave, f"reservas/{reserva_id}/confirmar", "confirmar_reserva"
+    )
+
+def _liberar_reservas(s: Session, reservas: list) -> int:
+    """Libera las entradas aún reservadas y borra las reservas; retorna las plazas devueltas"""
+    por_evento = {}
+    for reserva in reservas:
+        por_evento.setdefault(reserva.evento_id, []).append(reserva.entrada_id)
+
+    liberadas = 0
+    for evento_id, entrada_ids in por_evento.items():
+        if _es_perezoso(get_inventario(s, evento_id)):
+            cantidad = eliminar_reservadas(s, entrada_ids)
+        else:
+            cantidad = liberar_reservadas(s, entrada_ids)
+        if cantidad:
+            registrar_liberacion(s, evento_id, cantidad)
+            registrar_liberadas(s, evento_id)
+        liberadas += cantidad
+
+    eliminar_reservas(s, [reserva.entrada_id for reserva in reservas])
+    return liberadas
+
+def _tx_liberar_reserva(s: Session, reserva_id: str, user_id: int):
+    reservas = get_reserva(s, reserva_id, user_id)
+    if not reservas:
+        raise ValueError("Reserva no encontrada o expirada")
+    return _liberar_reservas(s, reservas)
+
+async def liberar_reserva_async(db: AsyncSession, reserva_id: str, user_id: int):
+    """El usuario abandona la reserva: las entradas vuelven a estar disponibles sin esperar al TTL"""
+    liberadas = await ejecutar_transaccion_async(
+        db, lambda s: _tx_liberar_reserva(s, reserva_id, user_id), nombre="liberar_reserva"
+    )
+    return {"mensaje": f"Se liberaron {liberadas} entradas"}
+
+def liberar_reservas_expiradas(db: Session, tamano: int) -> int:
+    """Libera un lote de reservas expiradas en una transacción; retorna cuántas reservas procesó"""
+    def _barrer(s: Session):
+        reservas = get_reservas_expiradas(s, datetime.now(timezone.utc), tamano)
+        if reservas:
+            _liberar_reservas(s, reservas)
+        return len(reservas)
+
+    return ejecutar_transaccion(db, _barrer, nombre="barrido_reservas")
+
+def _acumular_ventas(db: Session, entradas: list, signo: int = 1):
+    """Actualiza el acumulado de ventas en la misma transacción que el cambio de estado"""
+    if not settings.ESTADISTICAS_USAR_ACUMULADO or not entradas:
+        return
+    acumular_ventas(
+        db,
+        entradas[0].evento_id,
+        signo * len(entradas),
+        signo * sum(entrada.precio for entrada in entradas)
+    )
+
 def obtener_estadisticas_ventas(db: Session):
-    """Obtener estadísticas de ventas"""
-    # Obtener todas las entradas vendidas (con usuario asignado)
-    entradas_vendidas = db.query(Entrada).filter(
-        Entrada.usuario_id.isnot(None),
-        Entrada.estado.in_(["vendida", "reservada"])
-    ).all()
-    
-    total_vendidas = len(entradas_vendidas)
-    total_ingresos = sum(entrada.precio for entrada in entradas_vendidas)
-    
-    # Agrupar por evento
-    ventas_por_evento = {}
-    for entrada in entradas_vendidas:
-        evento_id = entrada.evento_id
-        if evento_id not in ventas_por_evento:
-            ventas_por_evento[evento_id] = {
-                "evento_id": evento_id,
-                "cantidad": 0,
-                "ingresos": 0
-            }
-        ventas_por_evento[evento_id]["cantidad"] += 1
-        ventas_por_evento[evento_id]["ingresos"] += entrada.precio
-    
+    """
+    Obtener estadísticas de ventas.
+    Con el acumulado activo se leen las filas de ventas_por_evento (una por evento);
+    si no, se agrupa en la base de datos en lugar de cargar cada entrada vendida.
+    """
+    if settings.ESTADISTICAS_USAR_ACUMULADO:
+        filas = get_ventas_por_evento(db)
+    else:
+        filas = ventas_agrupadas(db)
+
+    ventas_por_evento = [
+        {"evento_id": evento_id, "cantidad": cantidad, "ingresos": ingresos}
+        for evento_id, cantidad, ingresos in filas
+        if cantidad > 0
+    ]
     return {
-        "total_vendidas": total_vendidas,
-        "total_ingresos": total_ingresos,
-        "ventas_por_evento": list(ventas_por_evento.values())
+        "total_vendidas": sum(venta["cantidad"] for venta in ventas_por_evento),
+        "total_ingresos": sum(venta["ingresos"] for venta in ventas_por_evento),
+        "ventas_por_evento": ventas_por_evento
     }
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from app.config.http_client import get_cliente_eventos
+from app.config.settings import settings
+
+class CacheEventos:
+    """
+    Cache LRU con expiración de los resúmenes de eventos de ms-eventos.
+    Se accede desde el event loop y desde el hilo del listener (invalidaciones), por eso usa un lock.
+    La cola del listener tiene consumidores en competencia: cada mensaje de ms-eventos lo recibe
+    una sola instancia, que es la única que invalida. Las demás pueden servir el evento anterior
+    hasta EVENTOS_CACHE_TTL segundos; ese plazo es la cota de desactualización entre instancias.
+    """
+
+    def __init__(self, ttl: int, maximo: int):
+        self._ttl = ttl
+        self._maximo = maximo
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, evento_id: int):
+        with self._lock:
+            item = self._datos.get(evento_id)
+            if item is None:
+                return None
+            expira, evento = item
+            if expira < time.monotonic():
+                del self._datos[evento_id]
+                return None
+            self._datos.move_to_end(evento_id)
+            return evento
+
+    def guardar(self, evento_id: int, evento: dict):
+        with self._lock:
+            self._datos[evento_id] = (time.monotonic() + self._ttl, evento)
+            self._datos.move_to_end(evento_id)
+            while len(self._datos) > self._maximo:
+                self._datos.popitem(last=False)
+
+    def invalidar(self, evento_id: int):
+        with self._lock:
+            self._datos.pop(evento_id, None)
+
+cache_eventos = CacheEventos(settings.EVENTOS_CACHE_TTL, settings.EVENTOS_CACHE_MAX)
+
+# Consultas en curso por evento: peticiones simultáneas del mismo evento comparten una sola llamada
+_en_curso = {}
+
+async def _consultar_evento(evento_id: int):
+    response = await get_cliente_eventos().get(f"/eventos/get-evento/{evento_id}")
+    if response.status_code != 200:
+        raise ValueError("Evento no encontrado")
+    evento = response.json()
+    cache_eventos.guardar(evento_id, evento)
+    return evento
+
+async def obtener_evento(evento_id: int) -> dict:
+    """Devuelve el evento desde la cache o lo consulta a ms-eventos"""
+    evento = cache_eventos.obtener(evento_id)
+    if evento is not None:
+        return evento
+
+    tarea = _en_curso.get(evento_id)
+    if tarea is None:
+        tarea = asyncio.ensure_future(_consultar_evento(evento_id))
+        _en_curso[evento_id] = tarea
+        tarea.add_done_callback(lambda _: _en_curso.pop(evento_id, None))
+    return await asyncio.shield(tarea)
+
+async def obtener_eventos(evento_ids) -> dict:
+    """
+    Devuelve {evento_id: evento} para varios eventos: los que no están en cache se piden
+    a ms-eventos en una única llamada por lotes. Los eventos inexistentes se omiten.
+    """
+    eventos = {}
+    faltantes = []
+    for evento_id in set(evento_ids):
+        evento = cache_eventos.obtener(evento_id)
+        if evento is not None:
+            eventos[evento_id] = evento
+        else:
+            faltantes.append(evento_id)
+
+    if faltantes:
+        response = await get_cliente_eventos().post("/eventos/get-eventos-lote", json=faltantes)
+        if response.status_code != 200:
+            raise ValueError("No se pudieron consultar los eventos")
+        for evento in response.json():
+            cache_eventos.guardar(evento["id"], evento)
+            eventos[evento["id"]] = evento
+    return eventos
@@ -0,0 +1,153 @@
+import hashlib
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app.config.settings import settings
+from app.constants.entrada_states import EstadoEntrada
+from app.constants.inventario_states import EstadoInventario, ModoInventario
+from app.model.entrada_model import Entrada
+from app.repository.inventario_repository import get_inventario
+
+# Mapa de disponibilidad de un evento: un bit por entrada, en orden de id (el mismo orden que
+# get-por-evento), el más significativo de cada byte primero. Bit a 1 = entrada disponible.
+# En modo perezoso cada bit es una plaza: las primeras (aforo - disponibles) están ocupadas.
+
+def _etag(bits: bytes) -> str:
+    return '"' + hashlib.blake2b(bits, digest_size=8).hexdigest() + '"'
+
+def _mapa_perezoso(aforo: int, disponibles: int) -> bytes:
+    ocupadas = aforo - disponibles
+    bits = bytearray(b"\xff" * ((aforo + 7) // 8))
+    bits[:ocupadas // 8] = bytes(ocupadas // 8)
+    if ocupadas % 8:
+        bits[ocupadas // 8] = 0xFF >> (ocupadas % 8)
+    if aforo % 8:
+        bits[-1] &= (0xFF << (8 - aforo % 8)) & 0xFF
+    return bytes(bits)
+
+class _Mapa:
+    def __init__(self, ids: list, bits: bytearray):
+        self.ids = ids
+        self.bits = bits
+        self.expira = time.monotonic() + settings.MAPA_ASIENTOS_TTL
+        self.etag = None
+
+    def ocupar(self, entrada_id: int):
+        posicion = bisect_left(self.ids, entrada_id)
+        if posicion < len(self.ids) and self.ids[posicion] == entrada_id:
+            self.bits[posicion // 8] &= ~(0x80 >> (posicion % 8)) & 0xFF
+            self.etag = None
+
+class MapaAsientos:
+    """
+    Mapas de disponibilidad en memoria por evento (LRU con expiración).
+    Se construyen con una sola consulta y las compras y reservas apagan sus bits al confirmarse
+    la transacción. Las liberaciones y cancelaciones de evento descartan el mapa, que se
+    reconstruye en la siguiente lectura. Las compras y los mensajes del listener (que con
+    consumidores en competencia llegan a una sola instancia) sólo actualizan el mapa de la
+    instancia que los procesa: la expiración (MAPA_ASIENTOS_TTL) acota cuánto tarda una
+    instancia en ver los cambios hechos por otras.
+    """
+
+    def __init__(self, maximo: int):
+        self._maximo = maximo
+        self._mapas = OrderedDict()
+        # Cambios aplicados por evento: un mapa construido mientras cambiaba no se guarda
+        self._versiones = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, db: Session, evento_id: int) -> dict:
+        """
+        Retorna {"mapa", "etag", "total", "disponibles"}; ValueError si el evento no tiene entradas.
+        Los eventos sin inventario (anteriores al resumen de disponibilidad) se construyen
+        igual, a partir de sus filas de entradas.
+        """
+        with self._lock:
+            mapa = self._mapas.get(evento_id)
+            if mapa is not None and mapa.expira < time.monotonic():
+                del self._mapas[evento_id]
+                mapa = None
+            if mapa is not None:
+                self._mapas.move_to_end(evento_id)
+                return self._resumen(mapa)
+            version = self._versiones.get(evento_id, 0)
+
+        inventario = get_inventario(db, evento_id)
+        if inventario is not None and inventario.estado in EstadoInventario.RETIRADOS:
+            raise ValueError("Evento no encontrado")
+        if inventario is not None and inventario.modo == ModoInventario.PEREZOSO:
+            bits = _mapa_perezoso(inventario.aforo, inventario.disponibles)
+            return {"mapa": bits, "etag": _etag(bits), "total": inventario.aforo,
+                    "disponibles": inventario.disponibles}
+
+        filas = db.execute(
+            select(Entrada.id, Entrada.estado).where(Entrada.evento_id == evento_id).order_by(Entrada.id)
+        ).all()
+        if inventario is None and not filas:
+            raise ValueError("Evento no encontrado")
+        bits = bytearray((len(filas) + 7) // 8)
+        for posicion, (_, estado) in enumerate(filas):
+            if estado == EstadoEntrada.DISPONIBLE:
+                bits[posicion // 8] |= 0x80 >> (posicion % 8)
+        mapa = _Mapa([fila.id for fila in filas], bits)
+
+        with self._lock:
+            # Mientras se generan las entradas el mapa todavía crece: no se guarda
+            vendible = inventario is None or inventario.estado == EstadoInventario.VENDIBLE
+            if vendible and self._versiones.get(evento_id, 0) == version:
+                self._mapas[evento_id] = mapa
+                self._mapas.move_to_end(evento_id)
+                while len(self._mapas) > self._maximo:
+                    self._mapas.popitem(last=False)
+            return self._resumen(mapa)
+
+    def _resumen(self, mapa: _Mapa) -> dict:
+        bits = bytes(mapa.bits)
+        if mapa.etag is None:
+            mapa.etag = _etag(bits)
+        return {"mapa": bits, "etag": mapa.etag, "total": len(mapa.ids),
+                "disponibles": int.from_bytes(bits, "big").bit_count()}
+
+    def ocupar(self, evento_id: int, entrada_ids: list):
+        with self._lock:
+            self._versiones[evento_id] = self._versiones.get(evento_id, 0) + 1
+            mapa = self._mapas.get(evento_id)
+            if mapa is not None:
+                for entrada_id in entrada_ids:
+                    mapa.ocupar(entrada_id)
+
+    def invalidar(self, evento_id: int):
+        with self._lock:
+            self._versiones[evento_id] = self._versiones.get(evento_id, 0) + 1
+            self._mapas.pop(evento_id, None)
+
+mapa_asientos = MapaAsientos(settings.MAPA_ASIENTOS_MAX)
+
+# Los cambios se anotan en la sesión y se aplican al mapa sólo si la transacción se confirma;
+# un rollback (o un reintento por conflicto) los descarta. Los eventos de un savepoint se
+# ignoran: quien lo deshace descarta sus propias anotaciones (ver coordinador_compras).
+
+def registrar_ocupadas(db: Session, evento_id: int, entrada_ids: list):
+    db.info.setdefault("asientos", []).append((evento_id, entrada_ids))
+
+def registrar_liberadas(db: Session, evento_id: int):
+    db.info.setdefault("asientos", []).append((evento_id, None))
+
+@event.listens_for(Session, "after_commit")
+def _aplicar_cambios(session):
+    if session.in_nested_transaction():
+        return
+    for evento_id, entrada_ids in session.info.pop("asientos", []):
+        if entrada_ids is None:
+            mapa_asientos.invalidar(evento_id)
+        else:
+            mapa_asientos.ocupar(evento_id, entrada_ids)
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_cambios(session):
+    if session.in_nested_transaction():
+        return
+    session.info.pop("asientos", None)
@@ -0,0 +1,83 @@
+"""
+Mide las consultas calientes de ms-entradas antes y después de aplicar los índices.
+
+    python -m scripts.benchmark_indices --evento 1 --usuario 1 [--repeticiones 50] [--quitar-indices]
+
+Con --quitar-indices se eliminan primero los índices compuestos para medir la línea base;
+después se aplica app/config/migraciones.py y se repite la medición. Para cada consulta
+se muestra el plan (EXPLAIN) y la latencia p50/p95 en milisegundos.
+"""
+import argparse
+import statistics
+import time
+import uuid
+from sqlalchemy import func, select, text
+from app.config.database import engine
+from app.config.migraciones import aplicar_migraciones
+from app.model.entrada_model import Entrada
+from app.repository.entrada_repository import (
+    select_candidatas,
+    select_entradas_disponibles,
+    select_mis_entradas,
+    pagina_keyset
+)
+
+def consultas(evento_id: int, usuario_id: int) -> dict:
+    return {
+        "reclamar (candidatas desde pivote)": select_candidatas(evento_id, 10, str(uuid.uuid4())),
+        "get-disponibles (página de 100)": pagina_keyset(select_entradas_disponibles(evento_id), 100),
+        "mis-entradas": select_mis_entradas(usuario_id),
+        "conteo por estado": (
+            select(Entrada.estado, func.count(Entrada.id))
+            .where(Entrada.evento_id == evento_id)
+            .group_by(Entrada.estado)
+        ),
+    }
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(engine, compile_kwargs={"literal_binds": True}))
+
+def _plan(conn, sql: str) -> list:
+    prefijo = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    return [" ".join(str(columna) for columna in fila) for fila in conn.execute(text(prefijo + sql))]
+
+def medir(titulo: str, evento_id: int, usuario_id: int, repeticiones: int):
+    print(f"\n===== {titulo} =====")
+    with engine.connect() as conn:
+        for nombre, stmt in consultas(evento_id, usuario_id).items():
+            sql = _sql(stmt)
+            tiempos = []
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                conn.execute(text(sql)).fetchall()
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            tiempos.sort()
+            p95 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))]
+            print(f"\n▶ {nombre}: p50 {statistics.median(tiempos):.2f} ms, p95 {p95:.2f} ms")
+            for linea in _plan(conn, sql):
+                print(f"    {linea}")
+
+def quitar_indices():
+    with engine.begin() as conn:
+        for indice in Entrada.__table__.indexes:
+            if engine.dialect.name == "cockroachdb":
+                conn.execute(text(f"DROP INDEX IF EXISTS entradas@{indice.name}"))
+            else:
+                conn.execute(text(f"DROP INDEX IF EXISTS {indice.name}"))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--evento", type=int, required=True, help="evento_id con entradas generadas")
+    parser.add_argument("--usuario", type=int, required=True, help="usuario_id con entradas compradas")
+    parser.add_argument("--repeticiones", type=int, default=50)
+    parser.add_argument("--quitar-indices", action="store_true", help="eliminar los índices compuestos antes de la primera medición")
+    args = parser.parse_args()
+
+    if args.quitar_indices:
+        quitar_indices()
+    medir("Antes", args.evento, args.usuario, args.repeticiones)
+    aplicar_migraciones(engine)
+    medir("Después", args.evento, args.usuario, args.repeticiones)
+
+if __name__ == "__main__":
+    main()
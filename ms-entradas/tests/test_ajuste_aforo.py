@@ -0,0 +1,58 @@
+from app.config.settings import settings
+from app.listener.consumer import procesar_evento
+from app.listener.evento_listener import ajustar_aforo_evento, generar_entradas_evento
+from app.model.entrada_model import Entrada
+from app.model.inventario_model import InventarioEvento
+from app.service.entrada_service import comprar_entradas_multiple
+
+def _inventario(db, evento_id=10):
+    db.expire_all()
+    inventario = db.get(InventarioEvento, evento_id)
+    return inventario.aforo, inventario.generadas, inventario.disponibles, inventario.vendidas
+
+def _ids(db, evento_id=10):
+    return {id for (id,) in db.query(Entrada.id).filter(Entrada.evento_id == evento_id)}
+
+def test_ampliar_aforo_solo_inserta_la_diferencia(db):
+    generar_entradas_evento(db, 10, 4, "Evento", 1.0)
+    originales = _ids(db)
+    ajustar_aforo_evento(db, 10, 9, tamano_lote=2)
+    assert _inventario(db) == (9, 9, 9, 0)
+    assert originales < _ids(db) and len(_ids(db)) == 9
+
+def test_reducir_aforo_solo_retira_disponibles(db):
+    generar_entradas_evento(db, 10, 6, "Evento", 1.0)
+    comprar_entradas_multiple(db, 10, [{"quantity": 3}], 1)
+    ajustar_aforo_evento(db, 10, 4, tamano_lote=1)
+    assert _inventario(db) == (4, 4, 1, 3)
+    assert db.query(Entrada).filter(Entrada.evento_id == 10, Entrada.estado == "vendida").count() == 3
+
+def test_reducir_por_debajo_de_lo_vendido_se_queda_en_lo_vendido(db):
+    generar_entradas_evento(db, 10, 5, "Evento", 1.0)
+    comprar_entradas_multiple(db, 10, [{"quantity": 3}], 1)
+    ajustar_aforo_evento(db, 10, 1)
+    assert _inventario(db) == (3, 3, 0, 3)
+
+def test_reaplicar_el_mismo_aforo_no_duplica(db):
+    generar_entradas_evento(db, 10, 4, "Evento", 1.0)
+    ajustar_aforo_evento(db, 10, 7)
+    ajustar_aforo_evento(db, 10, 7)
+    assert _inventario(db) == (7, 7, 7, 0)
+    assert len(_ids(db)) == 7
+
+def test_modo_perezoso_solo_ajusta_contadores(db, monkeypatch):
+    monkeypatch.setattr(settings, "ENTRADAS_MODO_INVENTARIO", "perezoso")
+    generar_entradas_evento(db, 10, 5, "Evento", 1.0)
+    ajustar_aforo_evento(db, 10, 8)
+    # (aforo, disponibles): en modo perezoso no hay filas generadas
+    assert _inventario(db)[0::2] == (8, 8)
+    ajustar_aforo_evento(db, 10, 2)
+    assert _inventario(db)[0::2] == (2, 2)
+    assert _ids(db) == set()
+
+def test_mensaje_actualizado_renombra_y_ajusta(db):
+    generar_entradas_evento(db, 10, 3, "Antes", 1.0)
+    procesar_evento({"tipo": "evento_actualizado", "payload": {"evento_id": 10, "titulo": "Después", "aforo": 5}})
+    assert _inventario(db)[:3] == (5, 5, 5)
+    nombres = {nombre for (nombre,) in db.query(Entrada.evento_nombre).filter(Entrada.evento_id == 10)}
+    assert nombres == {"Después"}
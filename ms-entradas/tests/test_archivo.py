@@ -0,0 +1,32 @@
+from app.config.settings import settings
+from app.listener import consumer
+from app.listener.evento_listener import generar_entradas_evento, archivar_entradas_evento
+from app.repository.ventas_repository import reconstruir_ventas_por_evento, get_ventas_por_evento
+from app.service.entrada_service import comprar_entradas_multiple, obtener_estadisticas_ventas, historial_usuario
+
+def _finalizar(db, evento_id, monkeypatch):
+    monkeypatch.setattr(consumer, "lanzar_archivado", lambda e: archivar_entradas_evento(db, e, tamano_lote=3))
+    consumer.procesar_evento({"tipo": "evento_finalizado", "payload": {"evento_id": evento_id, "nombre": "Fin"}})
+
+def test_estadisticas_incluyen_entradas_archivadas(db, monkeypatch):
+    generar_entradas_evento(db, 10, 10, "Fin", 5.0)
+    comprar_entradas_multiple(db, 10, [{"quantity": 4}], 1)
+    _finalizar(db, 10, monkeypatch)
+
+    monkeypatch.setattr(settings, "ESTADISTICAS_USAR_ACUMULADO", False)
+    estadisticas = obtener_estadisticas_ventas(db)
+    assert estadisticas["total_vendidas"] == 4
+    assert estadisticas["total_ingresos"] == 20.0
+
+    reconstruir_ventas_por_evento(db)
+    assert [tuple(fila) for fila in get_ventas_por_evento(db)] == [(10, 4, 20.0)]
+
+def test_historial_incluye_archivadas_solo_si_se_pide(db, monkeypatch):
+    generar_entradas_evento(db, 10, 5, "Fin", 5.0)
+    generar_entradas_evento(db, 20, 5, "Vivo", 5.0)
+    comprar_entradas_multiple(db, 10, [{"quantity": 2}], 1)
+    comprar_entradas_multiple(db, 20, [{"quantity": 1}], 1)
+    _finalizar(db, 10, monkeypatch)
+
+    assert [entrada.evento_id for entrada in historial_usuario(db, 1)] == [20]
+    assert sorted(entrada.evento_id for entrada in historial_usuario(db, 1, True)) == [10, 10, 20]
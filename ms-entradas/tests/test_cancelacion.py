@@ -0,0 +1,37 @@
+from app.listener import consumer
+from app.listener.evento_listener import eliminar_entradas_evento, generar_entradas_evento
+from app.model.entrada_model import Entrada
+
+def _cancelar(evento_id, monkeypatch, borrados):
+    # El borrado en segundo plano se retiene para ver el evento justo después del mensaje
+    monkeypatch.setattr(consumer, "lanzar_eliminacion", borrados.append)
+    consumer.procesar_evento({"tipo": "evento_cancelado", "payload": {"evento_id": evento_id}})
+
+def test_evento_cancelado_deja_de_listarse_y_venderse_al_instante(db, cliente, monkeypatch):
+    generar_entradas_evento(db, 10, 4, "Cancelado", 1.0)
+    assert len(cliente.get("/entradas/get-disponibles/10").json()) == 4
+    entrada_id = db.query(Entrada.id).filter(Entrada.evento_id == 10).first()[0]
+
+    borrados = []
+    _cancelar(10, monkeypatch, borrados)
+    assert borrados == [10]
+    # Las entradas siguen en la tabla hasta que el borrado por lotes termine
+    assert db.query(Entrada).filter(Entrada.evento_id == 10).count() == 4
+
+    assert cliente.get("/entradas/get-disponibles/10").json() == []
+    assert cliente.get("/entradas/get-por-evento/10").json() == []
+    assert cliente.put(f"/entradas/comprar-entrada/{entrada_id}").status_code == 400
+    assert cliente.put("/entradas/comprar-entrada-evento/10").status_code == 400
+    respuesta = cliente.post("/entradas/comprar", json={"evento_id": 10, "entradas": [{"quantity": 1}]})
+    assert respuesta.status_code == 400
+
+    eliminar_entradas_evento(db, 10)
+    assert db.query(Entrada).filter(Entrada.evento_id == 10).count() == 0
+
+def test_cancelar_no_afecta_a_otros_eventos(db, cliente, monkeypatch):
+    generar_entradas_evento(db, 10, 2, "Cancelado", 1.0)
+    generar_entradas_evento(db, 20, 2, "Vigente", 1.0)
+    _cancelar(10, monkeypatch, [])
+
+    assert len(cliente.get("/entradas/get-disponibles/20").json()) == 2
+    assert cliente.put("/entradas/comprar-entrada-evento/20").status_code == 200
@@ -0,0 +1,36 @@
+import pytest
+from app.listener.evento_listener import generar_entradas_evento
+from app.model.entrada_model import Entrada
+from app.model.inventario_model import InventarioEvento
+from app.model.outbox_model import MensajeOutbox
+from app.service.entrada_service import comprar_entradas_multiple
+
+def _vendidas(db, evento_id):
+    return db.query(Entrada).filter(Entrada.evento_id == evento_id, Entrada.estado == "vendida").count()
+
+def test_compra_varios_tipos_en_una_transaccion(db):
+    generar_entradas_evento(db, 10, 5, "Evento", 2.0)
+    resultado = comprar_entradas_multiple(db, 10, [{"entryId": "general", "quantity": 2}, {"quantity": 1}], 1)
+    assert resultado["mensaje"] == "Se compraron 3 entradas exitosamente"
+    assert len({entrada.id for entrada in resultado["entradas"]}) == 3
+    assert _vendidas(db, 10) == 3
+    # Un único mensaje agregado por compra, no uno por entrada
+    assert db.query(MensajeOutbox).filter(MensajeOutbox.cola == "notificaciones_queue").count() == 1
+
+def test_si_no_alcanzan_no_se_compra_ninguna(db):
+    generar_entradas_evento(db, 10, 3, "Evento", 2.0)
+    with pytest.raises(ValueError, match="solicitadas: 4"):
+        comprar_entradas_multiple(db, 10, [{"quantity": 4}], 1)
+
+    db.expire_all()
+    assert _vendidas(db, 10) == 0
+    inventario = db.get(InventarioEvento, 10)
+    assert (inventario.disponibles, inventario.vendidas) == (3, 0)
+    assert db.query(MensajeOutbox).count() == 0
+
+@pytest.mark.parametrize("entradas", [[], [{"quantity": 0}], [{"quantity": -1}], [{"quantity": "2"}]])
+def test_cantidades_invalidas(db, entradas):
+    generar_entradas_evento(db, 10, 3, "Evento", 2.0)
+    with pytest.raises(ValueError):
+        comprar_entradas_multiple(db, 10, entradas, 1)
+    assert _vendidas(db, 10) == 0
@@ -0,0 +1,32 @@
+import uuid
+import pytest
+from app.listener.evento_listener import generar_entradas_evento
+from app.model.entrada_model import Entrada
+from app.model.outbox_model import MensajeOutbox
+from app.repository import entrada_repository
+from app.service.entrada_service import comprar_entrada_por_evento
+
+def test_cada_compra_reclama_una_entrada_distinta(db):
+    generar_entradas_evento(db, 10, 5, "Evento", 1.0)
+    compradas = [comprar_entrada_por_evento(db, 10, usuario).id for usuario in range(1, 6)]
+    assert len(set(compradas)) == 5
+    with pytest.raises(ValueError):
+        comprar_entrada_por_evento(db, 10, 6)
+
+    vendidas = db.query(Entrada).filter(Entrada.evento_id == 10, Entrada.estado == "vendida").all()
+    assert sorted((entrada.id, entrada.usuario_id) for entrada in vendidas) == sorted(zip(compradas, range(1, 6)))
+    assert db.query(MensajeOutbox).count() > 0
+
+@pytest.mark.parametrize("pivote", ["00000000-0000-0000-0000-000000000000", "ffffffff-ffff-ffff-ffff-ffffffffffff"])
+def test_pivote_en_los_extremos_completa_desde_el_principio(db, monkeypatch, pivote):
+    generar_entradas_evento(db, 10, 3, "Evento", 1.0)
+    monkeypatch.setattr(entrada_repository.uuid, "uuid4", lambda: uuid.UUID(pivote))
+    compradas = {comprar_entrada_por_evento(db, 10, usuario).id for usuario in range(1, 4)}
+    assert len(compradas) == 3
+
+def test_evento_sin_inventario_usa_la_tabla_de_entradas(db):
+    db.add_all([Entrada(id=i, codigo=str(uuid.uuid4()), evento_id=7, precio=1.0, estado="disponible") for i in (1, 2)])
+    db.commit()
+    assert {comprar_entrada_por_evento(db, 7, 1).id, comprar_entrada_por_evento(db, 7, 2).id} == {1, 2}
+    with pytest.raises(ValueError, match="No hay entradas disponibles"):
+        comprar_entrada_por_evento(db, 7, 3)
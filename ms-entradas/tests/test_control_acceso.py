@@ -0,0 +1,49 @@
+import pytest
+from app.config.database import ejecutar_transaccion
+from app.listener.evento_listener import generar_entradas_evento
+from app.repository.checkin_repository import registrar_checkins
+from app.security.firma_entradas import firmar_codigo
+from app.service import control_acceso as modulo
+from app.service.control_acceso import ControlAcceso
+from app.service.entrada_service import cancelar_entrada_usuario, comprar_entradas_multiple
+
+@pytest.fixture
+def control(monkeypatch):
+    # Una instancia por prueba: la del módulo guarda los eventos entre pruebas
+    control = ControlAcceso(10)
+    monkeypatch.setattr(modulo, "control_acceso", control)
+    return control
+
+def _comprar(db, cantidad=2, usuario=1):
+    generar_entradas_evento(db, 10, 5, "Evento", 1.0)
+    entradas = comprar_entradas_multiple(db, 10, [{"quantity": cantidad}], usuario)["entradas"]
+    return [firmar_codigo(entrada.id, 10, usuario) for entrada in entradas], entradas
+
+def _resultados(control, codigos, evento_id=10):
+    return [fila["resultado"] for fila in control.validar(evento_id, codigos)]
+
+def test_lote_de_la_puerta(db, control):
+    (primero, segundo), _ = _comprar(db)
+    falsificado = primero[:-2] + ("AA" if not primero.endswith("AA") else "BB")
+    assert _resultados(control, [primero, primero, segundo, falsificado, "basura"]) == [
+        "admitida", "usada", "admitida", "invalida", "invalida"
+    ]
+    assert _resultados(control, [segundo], evento_id=20) == ["otro_evento"]
+
+def test_entrada_cancelada_tras_cargar_el_evento(db, control):
+    (primero, segundo), entradas = _comprar(db)
+    assert _resultados(control, [primero]) == ["admitida"]
+    cancelar_entrada_usuario(db, entradas[1].id, 1)
+    assert _resultados(control, [segundo]) == ["cancelada"]
+
+def test_ingresos_guardados_se_ven_en_otra_instancia(db, control):
+    (primero, segundo), _ = _comprar(db)
+    control.validar(10, [primero])
+    lote = control.tomar_lote(10, 0.1)
+    assert [fila["entrada_id"] for fila in lote] == [int(primero.split(".")[0])]
+    assert ejecutar_transaccion(db, lambda s: registrar_checkins(s, lote)) == []
+    # El mismo ingreso llegado desde otra puerta se detecta como repetido
+    assert ejecutar_transaccion(db, lambda s: registrar_checkins(s, lote)) == [lote[0]["entrada_id"]]
+
+    otra_instancia = ControlAcceso(10)
+    assert _resultados(otra_instancia, [primero, segundo]) == ["usada", "admitida"]
@@ -0,0 +1,91 @@
+import asyncio
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from app.config.settings import settings
+from app.listener.evento_listener import generar_entradas_evento
+from app.model.entrada_model import Entrada
+from app.service.coordinador_compras import CoordinadorCompras, _aplicar_lote
+from app.service.entrada_service import _tx_comprar_entrada
+from app.service.mapa_asientos import mapa_asientos, registrar_ocupadas
+
+# pysqlite no emite BEGIN y confirma solo antes de un SAVEPOINT: para los savepoints del lote
+# se usa un motor que abre la transacción a mano (receta de la documentación de SQLAlchemy)
+motor_savepoints = create_engine(settings.DATABASE_URL)
+
+@event.listens_for(motor_savepoints, "connect")
+def _sin_autocommit(conexion, _registro):
+    conexion.isolation_level = None
+
+@event.listens_for(motor_savepoints, "begin")
+def _abrir_transaccion(conexion):
+    conexion.exec_driver_sql("BEGIN")
+
+def _sesion_lote():
+    return Session(motor_savepoints, autoflush=False)
+
+def _ids(db, evento_id):
+    return [entrada.id for entrada in db.query(Entrada).filter(Entrada.evento_id == evento_id).order_by(Entrada.id)]
+
+def _compra_fallida(evento_id, entrada_id):
+    def operacion(s):
+        registrar_ocupadas(s, evento_id, [entrada_id])
+        raise ValueError("Entrada no disponible")
+    return operacion
+
+def _lote(db, ids):
+    return [
+        lambda s: _tx_comprar_entrada(s, ids[0], 1),
+        _compra_fallida(10, ids[1]),
+        lambda s: _tx_comprar_entrada(s, ids[2], 2)
+    ]
+
+def test_lote_deshecho_no_toca_el_mapa(db):
+    generar_entradas_evento(db, 10, 5, "Lote", 1.0)
+    ids = _ids(db, 10)
+    assert mapa_asientos.obtener(db, 10)["disponibles"] == 5
+    db.rollback()
+
+    with _sesion_lote() as s:
+        resultados = _aplicar_lote(s, _lote(db, ids))
+        assert [error is None for error, _ in resultados] == [True, False, True]
+        # Falla la transacción del lote (p. ej. un 40001 antes del commit)
+        s.rollback()
+        assert "asientos" not in s.info
+
+    assert mapa_asientos.obtener(db, 10)["disponibles"] == 5
+    db.expire_all()
+    assert db.query(Entrada).filter(Entrada.estado == "vendida").count() == 0
+
+def test_lote_confirmado_aplica_solo_las_compras_exitosas(db):
+    generar_entradas_evento(db, 10, 5, "Lote", 1.0)
+    ids = _ids(db, 10)
+    mapa_asientos.obtener(db, 10)
+    db.rollback()
+
+    with _sesion_lote() as s:
+        _aplicar_lote(s, _lote(db, ids))
+        s.commit()
+
+    mapa = mapa_asientos.obtener(db, 10)
+    assert mapa["disponibles"] == 3
+    # Bits de las posiciones 0 y 2 apagados; la 1 (compra fallida) sigue disponible
+    assert mapa["mapa"][0] >> 3 == 0b01011
+
+def test_coordinador_devuelve_el_error_solo_a_su_compra(db):
+    generar_entradas_evento(db, 10, 5, "Lote", 1.0)
+    ids = _ids(db, 10)
+    coordinador = CoordinadorCompras(espera=0.01, maximo=10)
+
+    async def _comprar():
+        return await asyncio.gather(
+            coordinador.ejecutar(10, lambda s: _tx_comprar_entrada(s, ids[0], 1).id),
+            coordinador.ejecutar(10, _compra_fallida(10, ids[1])),
+            coordinador.ejecutar(10, lambda s: _tx_comprar_entrada(s, ids[2], 2).id),
+            return_exceptions=True
+        )
+
+    primera, fallida, tercera = asyncio.run(_comprar())
+    assert (primera, tercera) == (ids[0], ids[2])
+    assert isinstance(fallida, ValueError)
+    db.expire_all()
+    assert db.query(Entrada).filter(Entrada.estado == "vendida").count() == 2
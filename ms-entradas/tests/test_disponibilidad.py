@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy import event
+from app.config.database import engine
+from app.listener.evento_listener import generar_entradas_evento
+from app.service.entrada_service import cancelar_entrada_usuario, comprar_entrada_por_evento, comprar_entradas_multiple
+
+def _contadores(cliente, evento_id):
+    respuesta = cliente.get(f"/entradas/disponibilidad/{evento_id}")
+    assert respuesta.status_code == 200
+    datos = respuesta.json()
+    return datos["aforo"], datos["disponibles"], datos["vendidas"], datos["canceladas"]
+
+def test_contadores_siguen_compras_y_cancelaciones(db, cliente):
+    generar_entradas_evento(db, 10, 5, "Evento", 1.0)
+    assert _contadores(cliente, 10) == (5, 5, 0, 0)
+
+    comprar_entradas_multiple(db, 10, [{"quantity": 2}], 1)
+    entrada = comprar_entrada_por_evento(db, 10, 2)
+    assert _contadores(cliente, 10) == (5, 2, 3, 0)
+
+    cancelar_entrada_usuario(db, entrada.id, 2)
+    # La entrada cancelada no vuelve a la venta
+    assert _contadores(cliente, 10) == (5, 2, 2, 1)
+
+def test_evento_agotado_se_rechaza_sin_tocar_las_entradas(db):
+    generar_entradas_evento(db, 10, 2, "Evento", 1.0)
+    comprar_entradas_multiple(db, 10, [{"quantity": 2}], 1)
+
+    sentencias = []
+    registrar = lambda conn, cursor, sql, parametros, contexto, varias: sentencias.append(sql)
+    event.listen(engine, "before_cursor_execute", registrar)
+    try:
+        with pytest.raises(ValueError, match="agotadas"):
+            comprar_entrada_por_evento(db, 10, 2)
+    finally:
+        event.remove(engine, "before_cursor_execute", registrar)
+    assert sentencias and not [sql for sql in sentencias if "FROM entradas" in sql or "UPDATE entradas" in sql]
+
+def test_disponibilidad_de_evento_sin_inventario_y_sin_entradas(cliente):
+    assert cliente.get("/entradas/disponibilidad/99").status_code == 404
@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+import pytest
+from app.listener.evento_listener import generar_entradas_evento
+from app.service import evento_cache
+from app.service.entrada_service import comprar_entradas_multiple
+from app.service.evento_cache import CacheEventos
+
+class _ClienteEventos:
+    """Cliente HTTP falso de ms-eventos para la consulta por lotes"""
+
+    def __init__(self, eventos: dict, status_code: int = 200):
+        self.eventos = eventos
+        self.status_code = status_code
+        self.lotes = []
+
+    async def post(self, ruta, json):
+        self.lotes.append(sorted(json))
+        encontrados = [self.eventos[evento_id] for evento_id in json if evento_id in self.eventos]
+        return SimpleNamespace(status_code=self.status_code, json=lambda: encontrados)
+
+@pytest.fixture
+def ms_eventos(monkeypatch):
+    cliente = _ClienteEventos({10: {"id": 10, "titulo": "A"}, 20: {"id": 20, "titulo": "B"}})
+    monkeypatch.setattr(evento_cache, "get_cliente_eventos", lambda: cliente)
+    monkeypatch.setattr(evento_cache, "cache_eventos", CacheEventos(ttl=60, maximo=10))
+    return cliente
+
+def _entradas(db):
+    ids = []
+    for evento_id in (10, 20, 30):
+        generar_entradas_evento(db, evento_id, 2, "Local", 1.0)
+        ids += [entrada.id for entrada in comprar_entradas_multiple(db, evento_id, [{"quantity": 2}], 1)["entradas"]]
+    return ids
+
+def test_una_llamada_por_los_eventos_distintos(db, cliente, ms_eventos):
+    ids = _entradas(db)
+    respuesta = cliente.post("/entradas/evento-por-entrada/batch", json={"ids": ids + [9999]})
+    assert respuesta.status_code == 200
+    # El evento 30 no existe en ms-eventos y la entrada 9999 no existe: se omiten
+    assert sorted((fila["evento_id"], fila["evento_nombre"]) for fila in respuesta.json()) == [
+        (10, "A"), (10, "A"), (20, "B"), (20, "B")
+    ]
+    assert ms_eventos.lotes == [[10, 20, 30]]
+
+    # Los eventos encontrados quedan en cache; sólo se vuelve a pedir el que faltaba
+    cliente.post("/entradas/evento-por-entrada/batch", json={"ids": ids})
+    assert ms_eventos.lotes == [[10, 20, 30], [30]]
+
+def test_mis_entradas_con_evento(db, cliente, ms_eventos):
+    _entradas(db)
+    respuesta = cliente.get("/entradas/mis-entradas", params={"expand": "evento"})
+    assert respuesta.status_code == 200
+    eventos = {fila["evento_id"]: fila["evento"] for fila in respuesta.json()}
+    assert eventos == {10: {"id": 10, "titulo": "A"}, 20: {"id": 20, "titulo": "B"}, 30: None}
+    assert len(ms_eventos.lotes) == 1
+
+def test_fallo_de_ms_eventos_es_502(db, cliente, ms_eventos):
+    ids = _entradas(db)
+    ms_eventos.status_code = 500
+    assert cliente.post("/entradas/evento-por-entrada/batch", json={"ids": ids}).status_code == 502
@@ -0,0 +1,40 @@
+from app.config.settings import settings
+from app.listener.evento_listener import generar_entradas_evento
+from app.repository.ventas_repository import get_ventas_por_evento, reconstruir_ventas_por_evento
+from app.service.entrada_service import (
+    cancelar_entrada_usuario, comprar_entrada_por_evento, comprar_entradas_multiple, obtener_estadisticas_ventas
+)
+
+def _estadisticas(db, monkeypatch, acumulado):
+    monkeypatch.setattr(settings, "ESTADISTICAS_USAR_ACUMULADO", acumulado)
+    db.expire_all()
+    return obtener_estadisticas_ventas(db)
+
+def test_acumulado_coincide_con_la_agregacion(db, cliente, monkeypatch):
+    monkeypatch.setattr(settings, "ESTADISTICAS_USAR_ACUMULADO", True)
+    generar_entradas_evento(db, 10, 10, "A", 5.0)
+    generar_entradas_evento(db, 20, 10, "B", 2.5)
+
+    comprar_entradas_multiple(db, 10, [{"quantity": 3}], 1)
+    cancelada = comprar_entrada_por_evento(db, 10, 2)
+    cancelar_entrada_usuario(db, cancelada.id, 2)
+    comprar_entrada_por_evento(db, 20, 2)
+    # Una reserva sólo cuenta como venta cuando se confirma
+    confirmada = cliente.post("/entradas/reservar", json={"evento_id": 20, "cantidad": 2}).json()
+    cliente.put(f"/entradas/reservas/{confirmada['reserva_id']}/confirmar")
+    liberada = cliente.post("/entradas/reservar", json={"evento_id": 20, "cantidad": 1}).json()
+    cliente.delete(f"/entradas/reservas/{liberada['reserva_id']}")
+
+    acumulado = _estadisticas(db, monkeypatch, True)
+    assert acumulado == _estadisticas(db, monkeypatch, False)
+    assert (acumulado["total_vendidas"], acumulado["total_ingresos"]) == (6, 22.5)
+
+def test_reconstruir_el_acumulado_parte_de_las_entradas(db, monkeypatch):
+    generar_entradas_evento(db, 10, 5, "A", 4.0)
+    # Ventas hechas con el acumulado apagado: la tabla no las conoce hasta reconstruirla
+    comprar_entradas_multiple(db, 10, [{"quantity": 2}], 1)
+    assert get_ventas_por_evento(db) == []
+
+    reconstruir_ventas_por_evento(db)
+    assert [tuple(fila) for fila in get_ventas_por_evento(db)] == [(10, 2, 8.0)]
+    assert _estadisticas(db, monkeypatch, True) == _estadisticas(db, monkeypatch, False)
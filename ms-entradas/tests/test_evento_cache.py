@@ -0,0 +1,61 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from app.service import evento_cache
+from app.service.evento_cache import CacheEventos, obtener_evento
+
+class _ClienteEventos:
+    """Cliente HTTP falso de ms-eventos: cuenta las llamadas y responde tras ceder el event loop"""
+
+    def __init__(self, eventos: dict):
+        self.eventos = eventos
+        self.llamadas = []
+
+    async def get(self, ruta):
+        self.llamadas.append(ruta)
+        await asyncio.sleep(0)
+        evento = self.eventos.get(int(ruta.rsplit("/", 1)[1]))
+        return SimpleNamespace(status_code=200 if evento else 404, json=lambda: evento)
+
+@pytest.fixture
+def ms_eventos(monkeypatch):
+    cliente = _ClienteEventos({10: {"id": 10, "titulo": "A"}})
+    monkeypatch.setattr(evento_cache, "get_cliente_eventos", lambda: cliente)
+    monkeypatch.setattr(evento_cache, "cache_eventos", CacheEventos(ttl=60, maximo=2))
+    return cliente
+
+def test_segunda_consulta_sale_de_la_cache(ms_eventos):
+    assert asyncio.run(obtener_evento(10))["titulo"] == "A"
+    assert asyncio.run(obtener_evento(10))["titulo"] == "A"
+    assert len(ms_eventos.llamadas) == 1
+
+def test_consultas_simultaneas_comparten_la_llamada(ms_eventos):
+    async def varias():
+        return await asyncio.gather(*(obtener_evento(10) for _ in range(5)))
+
+    assert [evento["titulo"] for evento in asyncio.run(varias())] == ["A"] * 5
+    assert len(ms_eventos.llamadas) == 1
+
+def test_invalidar_y_evento_inexistente(ms_eventos):
+    asyncio.run(obtener_evento(10))
+    ms_eventos.eventos[10] = {"id": 10, "titulo": "B"}
+    evento_cache.cache_eventos.invalidar(10)
+    assert asyncio.run(obtener_evento(10))["titulo"] == "B"
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            asyncio.run(obtener_evento(99))
+    # Un 404 no se guarda en la cache
+    assert ms_eventos.llamadas.count("/eventos/get-evento/99") == 2
+
+def test_expiracion_y_limite_de_la_cache():
+    cache = CacheEventos(ttl=60, maximo=2)
+    for evento_id in (1, 2):
+        cache.guardar(evento_id, {"id": evento_id})
+    cache.obtener(1)  # 1 pasa a ser el más reciente
+    cache.guardar(3, {"id": 3})
+    assert (cache.obtener(1), cache.obtener(2), cache.obtener(3)) == ({"id": 1}, None, {"id": 3})
+
+    caducada = CacheEventos(ttl=-1, maximo=2)
+    caducada.guardar(1, {"id": 1})
+    assert caducada.obtener(1) is None
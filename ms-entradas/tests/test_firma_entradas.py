@@ -0,0 +1,15 @@
+import base64
+import hashlib
+import hmac
+from app.config.settings import settings
+from app.security.firma_entradas import firmar_codigo, verificar_codigo
+
+def test_codigo_firmado_se_verifica():
+    codigo = firmar_codigo(5, 10, 1)
+    assert verificar_codigo(codigo) == (5, 10, 1)
+    assert verificar_codigo(codigo.replace("5.10.1", "6.10.1", 1)) is None
+
+def test_firma_no_usa_secret_key_directamente():
+    digest = hmac.new(settings.SECRET_KEY.encode(), b"5.10.1", hashlib.sha256).digest()[:16]
+    con_secret_key = base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+    assert verificar_codigo(f"5.10.1.{con_secret_key}") is None
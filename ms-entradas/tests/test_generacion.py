@@ -0,0 +1,37 @@
+import pytest
+from app.config.database import SessionLocal
+from app.listener import evento_listener
+from app.listener.evento_listener import generar_entradas_evento
+from app.model.entrada_model import Entrada
+from app.model.inventario_model import InventarioEvento
+from app.service.entrada_service import comprar_entrada, obtener_disponibles
+
+def test_evento_en_generacion_no_lista_ni_vende(db, monkeypatch):
+    originales = evento_listener._nuevas_entradas
+    lotes = []
+
+    def _nuevas_entradas(*args):
+        if len(lotes) == 1:
+            # Mientras se genera el segundo lote, otra sesión intenta comprar una del primero
+            with SessionLocal() as otra:
+                assert obtener_disponibles(otra, 10) == []
+                primera = otra.query(Entrada).filter(Entrada.evento_id == 10).first()
+                with pytest.raises(ValueError):
+                    comprar_entrada(otra, primera.id, 1)
+        lotes.append(args)
+        return originales(*args)
+
+    monkeypatch.setattr(evento_listener, "_nuevas_entradas", _nuevas_entradas)
+    generar_entradas_evento(db, 10, 6, "Generando", 1.0, tamano_lote=3)
+    assert len(lotes) == 2
+
+    db.expire_all()
+    inventario = db.get(InventarioEvento, 10)
+    assert (inventario.generadas, inventario.disponibles, inventario.vendidas) == (6, 6, 0)
+    assert len(obtener_disponibles(db, 10)) == 6
+
+def test_evento_sin_inventario_sigue_a_la_venta(db):
+    db.add_all([Entrada(id=i, evento_id=7, precio=1.0, estado="disponible") for i in (1, 2)])
+    db.commit()
+    assert len(obtener_disponibles(db, 7)) == 2
+    assert comprar_entrada(db, 1, 1).estado == "vendida"
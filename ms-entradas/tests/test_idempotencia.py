@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta, timezone
+from app.config.settings import settings
+from app.listener.consumer import procesar_evento
+from app.listener.evento_listener import generar_entradas_evento
+from app.model.entrada_model import Entrada
+from app.model.idempotencia_model import ClaveIdempotencia, MensajeProcesado
+from app.service.barrido_reservas import purgar_idempotencia
+
+def _vendidas(db):
+    db.expire_all()
+    return db.query(Entrada).filter(Entrada.estado == "vendida").count()
+
+def test_reintento_con_la_misma_clave_devuelve_la_compra_original(db, cliente):
+    generar_entradas_evento(db, 10, 5, "Idempotente", 1.0)
+    cabeceras = {"Idempotency-Key": "k1"}
+    primera = cliente.put("/entradas/comprar-entrada-evento/10", headers=cabeceras)
+    segunda = cliente.put("/entradas/comprar-entrada-evento/10", headers=cabeceras)
+    assert primera.status_code == segunda.status_code == 200
+    assert primera.json() == segunda.json()
+    assert _vendidas(db) == 1
+
+    otra_ruta = cliente.post("/entradas/comprar", headers=cabeceras,
+                             json={"evento_id": 10, "entradas": [{"quantity": 1}]})
+    assert otra_ruta.status_code == 400
+    assert _vendidas(db) == 1
+
+def test_mensaje_reentregado_se_descarta(db):
+    mensaje = {"tipo": "evento_publicado", "payload": {"evento_id": 10, "aforo": 3, "nombre": "X", "precio": 1.0}}
+    procesar_evento(mensaje, "m1")
+    procesar_evento({"tipo": "evento_cancelado", "payload": {"evento_id": 99}}, "m2")
+    procesar_evento(mensaje, "m1")
+    assert db.query(Entrada).count() == 3
+    assert db.query(MensajeProcesado).count() == 2
+
+def test_purga_respeta_la_retencion(db, monkeypatch):
+    viejo = datetime.now(timezone.utc) - timedelta(days=30)
+    db.add_all([
+        ClaveIdempotencia(usuario_id=1, clave="vieja", ruta="r", respuesta="{}", creado_en=viejo),
+        ClaveIdempotencia(usuario_id=1, clave="nueva", ruta="r", respuesta="{}"),
+        MensajeProcesado(message_id="viejo", procesado_en=viejo),
+        MensajeProcesado(message_id="nuevo")
+    ])
+    db.commit()
+    monkeypatch.setattr(settings, "IDEMPOTENCIA_PURGA_LOTE", 1)
+
+    assert purgar_idempotencia(db) == 2
+    assert [clave.clave for clave in db.query(ClaveIdempotencia)] == ["nueva"]
+    assert [mensaje.message_id for mensaje in db.query(MensajeProcesado)] == ["nuevo"]
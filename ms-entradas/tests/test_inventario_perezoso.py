@@ -0,0 +1,32 @@
+from app.config.settings import settings
+from app.listener.evento_listener import generar_entradas_evento
+from app.model.inventario_model import InventarioEvento
+
+def _evento_perezoso(db, monkeypatch, evento_id=10, aforo=5):
+    monkeypatch.setattr(settings, "ENTRADAS_MODO_INVENTARIO", "perezoso")
+    generar_entradas_evento(db, evento_id, aforo, "Perezoso", 2.0)
+
+def test_comprar_plaza_virtual_crea_la_entrada(db, cliente, monkeypatch):
+    _evento_perezoso(db, monkeypatch)
+    plazas = cliente.get("/entradas/get-disponibles/10").json()
+    assert plazas[0]["id"] < 0
+
+    respuesta = cliente.put(f"/entradas/comprar-entrada/{plazas[0]['id']}", params={"evento_id": 10})
+    assert respuesta.status_code == 200, respuesta.text
+    entrada = respuesta.json()
+    assert entrada["id"] > 0 and entrada["estado"] == "vendida" and entrada["evento_id"] == 10
+
+    db.expire_all()
+    assert db.get(InventarioEvento, 10).disponibles == 4
+    assert len(cliente.get("/entradas/get-disponibles/10").json()) == 4
+
+def test_plaza_virtual_sin_evento_es_rechazada(db, cliente, monkeypatch):
+    _evento_perezoso(db, monkeypatch)
+    respuesta = cliente.put("/entradas/comprar-entrada/-1")
+    assert respuesta.status_code == 400
+    assert "evento_id" in respuesta.json()["detail"]
+
+def test_plaza_virtual_de_evento_materializado_no_existe(db, cliente):
+    generar_entradas_evento(db, 10, 5, "Materializado", 2.0)
+    respuesta = cliente.put("/entradas/comprar-entrada/-1", params={"evento_id": 10})
+    assert respuesta.status_code == 400
@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+from sqlalchemy import event
+from app.config import database
+from app.config.database import SesionHistorica
+from app.config.settings import settings
+from app.listener.evento_listener import generar_entradas_evento
+
+class _Conexion:
+    """Conexión falsa: registra las sentencias que el hook ejecuta al empezar la transacción"""
+
+    def __init__(self, dialecto="cockroachdb"):
+        self.dialect = SimpleNamespace(name=dialecto)
+        self.sentencias = []
+
+    def exec_driver_sql(self, sql):
+        self.sentencias.append(sql)
+
+def _sentencias(monkeypatch, activas=True, antiguedad="", dialecto="cockroachdb"):
+    monkeypatch.setattr(settings, "LECTURAS_HISTORICAS", activas)
+    monkeypatch.setattr(settings, "LECTURAS_ANTIGUEDAD", antiguedad)
+    conexion = _Conexion(dialecto)
+    database._leer_en_el_pasado(None, None, conexion)
+    return conexion.sentencias
+
+def test_lectura_historica_usa_follower_read_timestamp(monkeypatch):
+    assert _sentencias(monkeypatch) == ["SET TRANSACTION AS OF SYSTEM TIME follower_read_timestamp()"]
+
+def test_antiguedad_fija_va_entre_comillas(monkeypatch):
+    assert _sentencias(monkeypatch, antiguedad="-5s") == ["SET TRANSACTION AS OF SYSTEM TIME '-5s'"]
+    assert _sentencias(monkeypatch, antiguedad="-5s'; DROP") == ["SET TRANSACTION AS OF SYSTEM TIME '-5s; DROP'"]
+
+def test_sin_ajuste_o_fuera_de_cockroach_es_una_sesion_normal(monkeypatch):
+    assert _sentencias(monkeypatch, activas=False) == []
+    assert _sentencias(monkeypatch, dialecto="postgresql") == []
+
+def test_solo_los_listados_leen_en_el_pasado(db, cliente):
+    generar_entradas_evento(db, 10, 3, "Historico", 1.0)
+    historicas = []
+    escuchar = lambda session, transaction, connection: historicas.append(transaction)
+    event.listen(SesionHistorica, "after_begin", escuchar)
+    try:
+        assert len(cliente.get("/entradas/get-disponibles/10", params={"limit": 2}).json()) == 2
+        leidas = len(historicas)
+        assert leidas > 0
+        assert cliente.put("/entradas/comprar-entrada-evento/10").status_code == 200
+        assert len(historicas) == leidas
+    finally:
+        event.remove(SesionHistorica, "after_begin", escuchar)
@@ -0,0 +1,35 @@
+import base64
+from app.listener.evento_listener import generar_entradas_evento
+from app.model.entrada_model import Entrada
+
+def test_mapa_de_evento_sin_inventario(db, cliente):
+    db.add_all([
+        Entrada(id=1, evento_id=7, precio=1.0, estado="disponible"),
+        Entrada(id=2, evento_id=7, precio=1.0, usuario_id=3, estado="vendida"),
+        Entrada(id=3, evento_id=7, precio=1.0, estado="disponible")
+    ])
+    db.commit()
+
+    mapa = cliente.get("/entradas/mapa-asientos/7").json()
+    assert (mapa["total"], mapa["disponibles"]) == (3, 2)
+    assert base64.b64decode(mapa["mapa"]) == bytes([0b10100000])
+    assert cliente.get("/entradas/disponibilidad/7").json()["disponibles"] == 2
+
+def test_evento_inexistente_es_404(cliente):
+    assert cliente.get("/entradas/mapa-asientos/99").status_code == 404
+
+def test_etag_y_compra(db, cliente):
+    generar_entradas_evento(db, 10, 9, "Mapa", 1.0)
+    respuesta = cliente.get("/entradas/mapa-asientos/10", params={"formato": "binario"})
+    assert respuesta.content == bytes([0xFF, 0x80])
+    etag = respuesta.headers["ETag"]
+    sin_cambios = cliente.get("/entradas/mapa-asientos/10", params={"formato": "binario"},
+                              headers={"If-None-Match": etag})
+    assert sin_cambios.status_code == 304
+
+    cliente.put("/entradas/comprar-entrada-evento/10")
+    despues = cliente.get("/entradas/mapa-asientos/10", params={"formato": "binario"},
+                          headers={"If-None-Match": etag})
+    assert despues.status_code == 200
+    # Un bit menos encendido (la entrada comprada es cualquiera del evento)
+    assert int.from_bytes(despues.content, "big").bit_count() == 8
@@ -0,0 +1,27 @@
+from sqlalchemy import inspect, text
+from app.config.database import engine
+from app.config.migraciones import aplicar_migraciones
+
+def _indices(tabla):
+    return {indice["name"] for indice in inspect(engine).get_indexes(tabla)}
+
+def _columnas(tabla):
+    return {columna["name"] for columna in inspect(engine).get_columns(tabla)}
+
+def test_migraciones_completan_tablas_antiguas():
+    # Esquema de una versión anterior: sin índices compuestos ni la columna de reclamo del outbox
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_entradas_evento_estado"))
+        conn.execute(text("DROP INDEX ix_entradas_usuario_estado"))
+        conn.execute(text("DROP TABLE outbox"))
+        conn.execute(text("CREATE TABLE outbox (id INTEGER PRIMARY KEY, cola VARCHAR NOT NULL, "
+                          "mensaje VARCHAR NOT NULL, creado_en DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL)"))
+    # Como en un arranque: conexiones nuevas (SQLite no relee el esquema cacheado antes de un ALTER)
+    engine.dispose()
+
+    aplicar_migraciones(engine)
+    assert {"ix_entradas_evento_estado", "ix_entradas_usuario_estado"} <= _indices("entradas")
+    assert "reclamado_hasta" in _columnas("outbox")
+
+    # Se ejecutan en cada arranque: la segunda vez no hay nada que hacer
+    aplicar_migraciones(engine)
@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+from app.config.database import SessionLocal
+from app.config.rabbitmq import PublicadorRabbitMQ
+from app.events import outbox_relay
+from app.events.outbox import encolar_mensaje, reclamar_lote
+from app.model.outbox_model import MensajeOutbox
+
+class _Publicador:
+    """Publicador falso: comprueba en cada lote que el relay no tiene una transacción abierta"""
+
+    def __init__(self, db, exito=True):
+        self.db = db
+        self.exito = exito
+        self.lotes = []
+
+    def publicar_lote(self, mensajes):
+        assert not self.db.in_transaction()
+        colas = [cola for cola, _ in mensajes]
+        # Mientras se publica, otro relay no puede reclamar los mismos mensajes
+        with SessionLocal() as otro:
+            assert not set(colas) & {fila.cola for fila in reclamar_lote(otro, 10)}
+            otro.rollback()
+        self.lotes.append(colas)
+        return self.exito
+
+def _encolar(db, colas):
+    for cola in colas:
+        encolar_mensaje(db, cola, {"cola": cola})
+    db.commit()
+
+def test_relay_publica_el_lote_fuera_de_la_transaccion(db, monkeypatch):
+    _encolar(db, ["a", "b", "c"])
+    publicador = _Publicador(db)
+    monkeypatch.setattr(outbox_relay, "publicador", publicador)
+
+    assert outbox_relay.relay_lote(db, 2) == 2
+    assert outbox_relay.relay_lote(db, 2) == 1
+    assert outbox_relay.relay_lote(db, 2) == 0
+    assert publicador.lotes == [["a", "b"], ["c"]]
+    assert db.query(MensajeOutbox).count() == 0
+
+def test_lote_no_publicado_vuelve_a_pendientes_en_orden(db, monkeypatch):
+    _encolar(db, ["a", "b"])
+    monkeypatch.setattr(outbox_relay, "publicador", _Publicador(db, exito=False))
+    assert outbox_relay.relay_lote(db, 10) == 0
+
+    publicador = _Publicador(db)
+    monkeypatch.setattr(outbox_relay, "publicador", publicador)
+    assert outbox_relay.relay_lote(db, 10) == 2
+    assert publicador.lotes == [["a", "b"]]
+
+class _Channel:
+    def __init__(self):
+        self.publicados = []
+        self.commits = 0
+
+    def basic_publish(self, exchange, routing_key, body, properties):
+        self.publicados.append(routing_key)
+
+    def tx_commit(self):
+        self.commits += 1
+
+def test_publicar_lote_confirma_una_sola_vez():
+    publicador = PublicadorRabbitMQ(tamano_pool=1, heartbeat=0)
+    canal = SimpleNamespace(channel=_Channel(), abierto=True)
+    publicador._devolver(canal)
+
+    assert publicador.publicar_lote([("a", "1"), ("b", "2"), ("a", "3")])
+    assert canal.channel.publicados == ["a", "b", "a"]
+    assert canal.channel.commits == 1
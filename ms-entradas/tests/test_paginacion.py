@@ -0,0 +1,48 @@
+from app.config.settings import settings
+from app.listener.evento_listener import generar_entradas_evento
+from app.service.entrada_service import comprar_entrada
+
+def _recorrer(cliente, ruta, limit):
+    """Sigue X-Siguiente-After hasta que una página no lo trae; devuelve los ids de cada página"""
+    paginas, params = [], {"limit": limit}
+    while True:
+        respuesta = cliente.get(ruta, params=params)
+        assert respuesta.status_code == 200
+        paginas.append([entrada["id"] for entrada in respuesta.json()])
+        siguiente = respuesta.headers.get("X-Siguiente-After")
+        if siguiente is None:
+            return paginas
+        params = {"limit": limit, "after": siguiente}
+
+def test_paginas_sin_solape_ni_huecos(db, cliente):
+    generar_entradas_evento(db, 10, 5, "Paginado", 1.0)
+    paginas = _recorrer(cliente, "/entradas/get-disponibles/10", 2)
+    assert [len(pagina) for pagina in paginas] == [2, 2, 1]
+    ids = [id for pagina in paginas for id in pagina]
+    assert ids == sorted(ids) and len(set(ids)) == 5
+
+def test_ultima_pagina_llena_deja_una_vacia(db, cliente):
+    generar_entradas_evento(db, 10, 4, "Paginado", 1.0)
+    assert [len(pagina) for pagina in _recorrer(cliente, "/entradas/get-disponibles/10", 2)] == [2, 2, 0]
+
+def test_after_excluye_el_cursor_y_las_vendidas(db, cliente):
+    generar_entradas_evento(db, 10, 5, "Paginado", 1.0)
+    todas = sorted(entrada["id"] for entrada in cliente.get("/entradas/get-disponibles/10").json())
+    comprar_entrada(db, todas[2], 1)
+
+    respuesta = cliente.get("/entradas/get-disponibles/10", params={"limit": 10, "after": todas[1]})
+    assert [entrada["id"] for entrada in respuesta.json()] == todas[3:]
+    assert "X-Siguiente-After" not in respuesta.headers
+    # El listado por evento incluye también la vendida
+    respuesta = cliente.get("/entradas/get-por-evento/10", params={"limit": 10, "after": todas[1]})
+    assert [entrada["id"] for entrada in respuesta.json()] == todas[2:]
+
+def test_limit_fuera_de_rango(cliente):
+    assert cliente.get("/entradas/get-disponibles/10", params={"limit": 0}).status_code == 422
+    limite = settings.ENTRADAS_LIMITE_PAGINA_MAX + 1
+    assert cliente.get("/entradas/get-disponibles/10", params={"limit": limite}).status_code == 422
+
+def test_paginas_de_plazas_virtuales(db, cliente, monkeypatch):
+    monkeypatch.setattr(settings, "ENTRADAS_MODO_INVENTARIO", "perezoso")
+    generar_entradas_evento(db, 10, 5, "Perezoso", 1.0)
+    assert _recorrer(cliente, "/entradas/get-disponibles/10", 2) == [[-1, -2], [-3, -4], [-5]]
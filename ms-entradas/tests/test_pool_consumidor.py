@@ -0,0 +1,107 @@
+import json
+import threading
+from types import SimpleNamespace
+from sqlalchemy.exc import OperationalError
+from app.listener import pool_consumidor
+from app.listener.consumer import procesar_evento
+from app.listener.evento_listener import generar_entradas_evento
+from app.listener.pool_consumidor import ConsumidorConcurrente
+from app.model.inventario_model import InventarioEvento
+
+class _Canal:
+    """Canal de pika falso: registra los acks y los mensajes enviados a la DLQ"""
+    is_open = True
+
+    def __init__(self):
+        self.acks = []
+        self.dlq = []
+        self.confirmados = threading.Semaphore(0)
+        self.connection = SimpleNamespace(add_callback_threadsafe=lambda accion: accion())
+
+    def basic_publish(self, exchange, routing_key, body, properties):
+        self.dlq.append((routing_key, properties.headers))
+
+    def basic_ack(self, delivery_tag):
+        self.acks.append(delivery_tag)
+        self.confirmados.release()
+
+def _consumir(mensajes, message_id=None):
+    canal = _Canal()
+    consumidor = ConsumidorConcurrente("amqp://", "pruebas", procesar_evento, num_workers=1, prefetch=1,
+                                       max_reintentos=1, heartbeat=0)
+    for tag, mensaje in enumerate(mensajes):
+        propiedades = SimpleNamespace(message_id=message_id, headers=None)
+        consumidor._recibir(canal, SimpleNamespace(delivery_tag=tag), propiedades, json.dumps(mensaje).encode())
+    for _ in mensajes:
+        assert canal.confirmados.acquire(timeout=10)
+    return canal
+
+def _renombrar(titulo):
+    return {"tipo": "evento_actualizado", "payload": {"evento_id": 10, "titulo": titulo}}
+
+def test_mensajes_iguales_sin_message_id_se_aplican_todos(db):
+    generar_entradas_evento(db, 10, 3, "A", 1.0)
+    canal = _consumir([_renombrar("B"), _renombrar("A"), _renombrar("B")])
+    assert canal.acks == [0, 1, 2]
+    db.expire_all()
+    assert db.get(InventarioEvento, 10).evento_nombre == "B"
+
+def test_reentrega_con_message_id_se_descarta(db):
+    generar_entradas_evento(db, 10, 3, "A", 1.0)
+    _consumir([_renombrar("B")], message_id="m1")
+    db.query(InventarioEvento).filter(InventarioEvento.evento_id == 10).update({"evento_nombre": "C"})
+    db.commit()
+    _consumir([_renombrar("B")], message_id="m1")
+    db.expire_all()
+    assert db.get(InventarioEvento, 10).evento_nombre == "C"
+
+def _procesar_fallando(veces, error):
+    """Procesador que lanza `error` las primeras `veces` llamadas"""
+    llamadas = []
+
+    def procesar(data, message_id):
+        llamadas.append(data)
+        if len(llamadas) <= veces:
+            raise error
+    return procesar, llamadas
+
+def _entregar(procesar, cuerpo=b'{"tipo": "x", "payload": {"evento_id": 1}}', max_reintentos=3):
+    canal = _Canal()
+    consumidor = ConsumidorConcurrente("amqp://", "pruebas", procesar, num_workers=1, prefetch=1,
+                                       max_reintentos=max_reintentos, heartbeat=0)
+    consumidor._recibir(canal, SimpleNamespace(delivery_tag=7), SimpleNamespace(message_id=None, headers=None), cuerpo)
+    assert canal.confirmados.acquire(timeout=10)
+    return canal
+
+_ERROR_DB = OperationalError("UPDATE", {}, Exception("conexión perdida"))
+
+def test_error_de_base_de_datos_se_reintenta_en_el_worker(monkeypatch):
+    monkeypatch.setattr(pool_consumidor.random, "uniform", lambda a, b: 0)
+    procesar, llamadas = _procesar_fallando(2, _ERROR_DB)
+    canal = _entregar(procesar)
+    assert (len(llamadas), canal.acks, canal.dlq) == (3, [7], [])
+
+def test_reintentos_agotados_van_a_la_dlq(monkeypatch):
+    monkeypatch.setattr(pool_consumidor.random, "uniform", lambda a, b: 0)
+    procesar, llamadas = _procesar_fallando(5, _ERROR_DB)
+    canal = _entregar(procesar)
+    assert len(llamadas) == 3 and canal.acks == [7]
+    cola, headers = canal.dlq[0]
+    assert cola == "pruebas.dlq" and headers["x-cola-origen"] == "pruebas"
+
+def test_otros_errores_van_a_la_dlq_sin_reintentar():
+    procesar, llamadas = _procesar_fallando(1, KeyError("payload"))
+    canal = _entregar(procesar)
+    assert len(llamadas) == 1 and [cola for cola, _ in canal.dlq] == ["pruebas.dlq"]
+
+def test_mensaje_invalido_va_a_la_dlq():
+    procesar, llamadas = _procesar_fallando(0, None)
+    canal = _entregar(procesar, cuerpo=b"[1, 2]")
+    assert llamadas == [] and canal.acks == [7]
+    assert "objeto JSON" in canal.dlq[0][1]["x-error"]
+
+def test_mensajes_de_un_evento_van_al_mismo_worker():
+    consumidor = ConsumidorConcurrente("amqp://", "pruebas", None, num_workers=4, prefetch=1,
+                                       max_reintentos=1, heartbeat=0)
+    indices = {consumidor._indice_worker({"payload": {"evento_id": 42}}) for _ in range(10)}
+    assert len(indices) == 1
@@ -0,0 +1,53 @@
+from app.config.rabbitmq import PublicadorRabbitMQ
+
+class _Channel:
+    def __init__(self, falla=False):
+        self.falla = falla
+        self.publicados = []
+
+    def basic_publish(self, exchange, routing_key, body, properties):
+        if self.falla:
+            raise ConnectionError("conexión cerrada por el broker")
+        self.publicados.append(body)
+
+    def tx_commit(self):
+        pass
+
+class _Canal:
+    def __init__(self, falla=False, abierto=True):
+        self.channel = _Channel(falla)
+        self.abierto = abierto
+        self.cerrado = False
+
+    def cerrar(self):
+        self.cerrado = True
+
+def _publicador(monkeypatch, canales):
+    """Publicador cuyo pool abre, en orden, los canales falsos dados (None = broker caído)"""
+    publicador = PublicadorRabbitMQ(tamano_pool=2, heartbeat=0)
+    pendientes = list(canales)
+    monkeypatch.setattr(publicador, "_nuevo_canal", lambda: pendientes.pop(0))
+    return publicador
+
+def test_canal_roto_se_descarta_y_se_reintenta_con_otro(monkeypatch):
+    roto, bueno = _Canal(falla=True), _Canal()
+    publicador = _publicador(monkeypatch, [roto, bueno])
+    assert publicador.publicar_lote([("cola", "1")])
+    assert roto.cerrado and bueno.channel.publicados == ["1"]
+    # El canal bueno vuelve al pool y se reutiliza
+    assert publicador.publicar_lote([("cola", "2")])
+    assert bueno.channel.publicados == ["1", "2"]
+
+def test_canal_cerrado_en_el_pool_se_reabre(monkeypatch):
+    viejo, nuevo = _Canal(), _Canal()
+    publicador = _publicador(monkeypatch, [viejo, nuevo])
+    publicador.publicar_lote([("cola", "1")])
+    viejo.abierto = False  # heartbeat perdido mientras estaba libre
+    assert publicador.publicar_lote([("cola", "2")])
+    assert viejo.cerrado and nuevo.channel.publicados == ["2"]
+
+def test_sin_broker_no_se_confirma(monkeypatch):
+    publicador = _publicador(monkeypatch, [None, None])
+    assert not publicador.publicar_lote([("cola", "1")])
+    # Los intentos fallidos no ocupan plazas del pool
+    assert publicador._creados == 0
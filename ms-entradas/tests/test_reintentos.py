@@ -0,0 +1,92 @@
+import asyncio
+import pytest
+from sqlalchemy.exc import OperationalError
+from app.config.reintentos import MetricasReintentos, Reintentos, es_error_reintentable, reintentar
+from app.config import reintentos
+from app.config.settings import settings
+
+class _Orig(Exception):
+    def __init__(self, pgcode):
+        super().__init__(f"pgcode {pgcode}")
+        self.pgcode = pgcode
+
+def _error(pgcode="40001"):
+    return OperationalError("UPDATE entradas", {}, _Orig(pgcode))
+
+class _Sesion:
+    def __init__(self):
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+class _SesionAsync(_Sesion):
+    async def rollback(self):
+        self.rollbacks += 1
+
+@pytest.fixture(autouse=True)
+def metricas(monkeypatch):
+    monkeypatch.setattr(settings, "DB_REINTENTO_ESPERA_BASE", 0.0)
+    metricas = MetricasReintentos()
+    monkeypatch.setattr(reintentos, "metricas_reintentos", metricas)
+    return metricas
+
+def _fallar(veces, pgcode="40001"):
+    """Operación que falla `veces` veces con el código dado y después devuelve 'ok'"""
+    llamadas = []
+
+    def operacion(db):
+        llamadas.append(1)
+        if len(llamadas) <= veces:
+            raise _error(pgcode)
+        return "ok"
+    return operacion, llamadas
+
+def test_errores_reintentables():
+    assert es_error_reintentable(_error("40001"))
+    assert es_error_reintentable(OperationalError("x", {}, Exception("restart transaction: TransactionRetryError")))
+    assert not es_error_reintentable(_error("23505"))
+    assert not es_error_reintentable(ValueError("Entrada no disponible"))
+
+def test_conflicto_se_reintenta_y_cuenta(metricas):
+    operacion, llamadas = _fallar(2)
+    db = _Sesion()
+    assert reintentar("compra", max_intentos=3)(operacion)(db) == "ok"
+    assert (len(llamadas), db.rollbacks) == (3, 2)
+    assert metricas.resumen() == {"compra": {"ejecuciones": 1, "reintentos": 2, "agotados": 0}}
+
+def test_reintentos_agotados_propagan_el_error(metricas):
+    operacion, llamadas = _fallar(5)
+    with pytest.raises(OperationalError):
+        reintentar("compra", max_intentos=3)(operacion)(_Sesion())
+    assert len(llamadas) == 3
+    assert metricas.resumen()["compra"]["agotados"] == 1
+
+def test_otros_errores_no_se_reintentan(metricas):
+    operacion, llamadas = _fallar(1, pgcode="23505")
+    db = _Sesion()
+    with pytest.raises(OperationalError):
+        reintentar("compra", max_intentos=3)(operacion)(db)
+    assert (len(llamadas), db.rollbacks) == (1, 1)
+    assert metricas.resumen()["compra"] == {"ejecuciones": 1, "reintentos": 0, "agotados": 0}
+
+def test_version_asincrona(metricas):
+    operacion, llamadas = _fallar(1)
+
+    async def operacion_async(db):
+        return operacion(db)
+
+    db = _SesionAsync()
+    assert asyncio.run(reintentar("compra_async", max_intentos=3)(operacion_async)(db)) == "ok"
+    assert (len(llamadas), db.rollbacks) == (2, 1)
+    assert metricas.resumen()["compra_async"]["reintentos"] == 1
+
+def test_context_manager_repite_el_bloque(metricas):
+    operacion, llamadas = _fallar(2)
+    db = _Sesion()
+    for intento in Reintentos(db, "listener", max_intentos=3):
+        with intento:
+            resultado = operacion(db)
+    assert resultado == "ok"
+    assert (len(llamadas), db.rollbacks) == (3, 2)
+    assert metricas.resumen()["listener"]["reintentos"] == 2
@@ -0,0 +1,64 @@
+from app.config.settings import settings
+from app.listener.evento_listener import generar_entradas_evento
+from app.model.entrada_model import Entrada
+from app.service.entrada_service import liberar_reservas_expiradas
+
+def _reservar(cliente, cantidad=2):
+    respuesta = cliente.post("/entradas/reservar", json={"evento_id": 10, "cantidad": cantidad})
+    assert respuesta.status_code == 200
+    return respuesta.json()
+
+def _estados(db):
+    db.expire_all()
+    return sorted(estado for (estado,) in db.query(Entrada.estado).filter(Entrada.evento_id == 10))
+
+def _disponibles(cliente):
+    return cliente.get("/entradas/disponibilidad/10").json()["disponibles"]
+
+def test_reserva_confirmada_pasa_a_vendida(db, cliente):
+    generar_entradas_evento(db, 10, 3, "Evento", 1.0)
+    reserva = _reservar(cliente)
+    assert len(reserva["entradas"]) == 2
+    assert _estados(db) == ["disponible", "reservada", "reservada"]
+    assert _disponibles(cliente) == 1
+
+    respuesta = cliente.put(f"/entradas/reservas/{reserva['reserva_id']}/confirmar")
+    assert respuesta.status_code == 200
+    assert _estados(db) == ["disponible", "vendida", "vendida"]
+    # Ya confirmada no se puede volver a confirmar ni liberar
+    assert cliente.put(f"/entradas/reservas/{reserva['reserva_id']}/confirmar").status_code == 409
+    assert cliente.delete(f"/entradas/reservas/{reserva['reserva_id']}").status_code == 404
+
+def test_reserva_liberada_vuelve_a_la_venta(db, cliente):
+    generar_entradas_evento(db, 10, 3, "Evento", 1.0)
+    reserva = _reservar(cliente)
+    assert cliente.delete(f"/entradas/reservas/{reserva['reserva_id']}").json() == {"mensaje": "Se liberaron 2 entradas"}
+    assert _estados(db) == ["disponible"] * 3
+    assert _disponibles(cliente) == 3
+
+def test_reserva_expirada_no_se_confirma_y_el_barrido_la_libera(db, cliente, monkeypatch):
+    generar_entradas_evento(db, 10, 3, "Evento", 1.0)
+    monkeypatch.setattr(settings, "RESERVAS_TTL", -1)
+    reserva = _reservar(cliente)
+    assert cliente.put(f"/entradas/reservas/{reserva['reserva_id']}/confirmar").status_code == 409
+
+    # Una fila de reserva por entrada retenida
+    assert liberar_reservas_expiradas(db, 10) == 2
+    assert liberar_reservas_expiradas(db, 10) == 0
+    assert _estados(db) == ["disponible"] * 3
+    assert _disponibles(cliente) == 3
+
+def test_reserva_perezosa_liberada_no_deja_filas(db, cliente, monkeypatch):
+    monkeypatch.setattr(settings, "ENTRADAS_MODO_INVENTARIO", "perezoso")
+    generar_entradas_evento(db, 10, 3, "Evento", 1.0)
+    reserva = _reservar(cliente)
+    assert _estados(db) == ["reservada", "reservada"]
+    cliente.delete(f"/entradas/reservas/{reserva['reserva_id']}")
+    assert _estados(db) == []
+    assert _disponibles(cliente) == 3
+
+def test_limite_de_entradas_por_reserva(db, cliente):
+    generar_entradas_evento(db, 10, 20, "Evento", 1.0)
+    respuesta = cliente.post("/entradas/reservar", json={"evento_id": 10, "cantidad": settings.RESERVAS_MAX_ENTRADAS + 1})
+    assert respuesta.status_code == 400
+    assert cliente.post("/entradas/reservar", json={"evento_id": 10, "cantidad": 0}).status_code == 422
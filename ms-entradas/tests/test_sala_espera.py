@@ -0,0 +1,33 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.config.settings import settings
+from app.controller.entrada_controller import router
+from app.listener.evento_listener import generar_entradas_evento
+from app.security.auth import verify_token
+from app.security.dependencies import get_current_user
+from app.security.sala_espera import sala_espera
+
+def _cliente_con_sala_espera(monkeypatch):
+    monkeypatch.setattr(settings, "SALA_ESPERA_ACTIVA", True)
+    app = FastAPI()
+    app.include_router(router, prefix="/entradas")
+    app.dependency_overrides[get_current_user] = lambda: {"id": 1}
+    return TestClient(app)
+
+def test_admision_acepta_evento_id_como_texto(db, monkeypatch):
+    cliente = _cliente_con_sala_espera(monkeypatch)
+    generar_entradas_evento(db, 10, 5, "Cola", 1.0)
+    token = sala_espera.entrar(10, 1)["token_admision"]
+
+    respuesta = cliente.post("/entradas/comprar", headers={"X-Token-Admision": token},
+                             json={"evento_id": "10", "entradas": [{"quantity": 1}]})
+    assert respuesta.status_code == 200, respuesta.text
+
+    otro_evento = cliente.post("/entradas/comprar", headers={"X-Token-Admision": token},
+                               json={"evento_id": 11, "entradas": [{"quantity": 1}]})
+    assert otro_evento.status_code == 403
+
+def test_token_de_admision_no_sirve_como_sesion():
+    token = sala_espera.entrar(10, 1)["token_admision"]
+    assert sala_espera.validar_admision(token, 1) == 10
+    assert verify_token(token) is None
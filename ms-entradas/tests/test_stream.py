@@ -0,0 +1,26 @@
+from sqlalchemy import event
+from app.config.database import SesionHistorica
+from app.config.settings import settings
+from app.listener.evento_listener import generar_entradas_evento
+
+def test_stream_ndjson_abre_una_transaccion_por_lote(db, cliente, monkeypatch):
+    generar_entradas_evento(db, 10, 7, "Stream", 1.0)
+    monkeypatch.setattr(settings, "ENTRADAS_LOTE_STREAM", 3)
+    transacciones = []
+    escuchar = lambda session, transaction, connection: transacciones.append(transaction)
+    event.listen(SesionHistorica, "after_begin", escuchar)
+    try:
+        respuesta = cliente.get("/entradas/get-disponibles/10", params={"formato": "ndjson"})
+    finally:
+        event.remove(SesionHistorica, "after_begin", escuchar)
+    assert respuesta.status_code == 200
+    assert len(respuesta.text.splitlines()) == 7
+    # Tres lotes de keyset (el primero junto con la lectura del inventario)
+    assert len(transacciones) == 3
+
+def test_stream_ndjson_de_plazas_virtuales(db, cliente, monkeypatch):
+    monkeypatch.setattr(settings, "ENTRADAS_MODO_INVENTARIO", "perezoso")
+    generar_entradas_evento(db, 10, 5, "Perezoso", 1.0)
+    respuesta = cliente.get("/entradas/get-disponibles/10", params={"formato": "ndjson"})
+    assert respuesta.status_code == 200
+    assert len(respuesta.text.splitlines()) == 5
@@ -1,7 +1,22 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker, declarative_base, Session
 from app.config.settings import settings
 
 engine = create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+
+class SesionHistorica(Session):
+    """Sesión de sólo lectura cuyas transacciones leen AS OF SYSTEM TIME (datos con unos segundos de retraso)"""
+
+def marca_lectura_historica() -> str:
+    if settings.LECTURAS_ANTIGUEDAD:
+        return "'" + settings.LECTURAS_ANTIGUEDAD.replace("'", "") + "'"
+    return "follower_read_timestamp()"
+
+@event.listens_for(SesionHistorica, "after_begin")
+def _leer_en_el_pasado(session, transaction, connection):
+    if settings.LECTURAS_HISTORICAS and connection.dialect.name == "cockroachdb":
+        connection.exec_driver_sql(f"SET TRANSACTION AS OF SYSTEM TIME {marca_lectura_historica()}")
+
+SessionLecturaLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=SesionHistorica)
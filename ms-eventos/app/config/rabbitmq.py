@@ -1,6 +1,7 @@
+import uuid
 import pika
 from app.config.settings import settings
-from typing import Iterable, Tuple
+from typing import Iterable, Optional, Tuple
 
 DEFAULT_QUEUES: Tuple[str, str] = ("notificaciones_queue", "entradas_events")
 
@@ -12,11 +13,13 @@ def _open_channel():
     channel = connection.channel()
     return connection, channel
 
-def publish_message(message: str, queues: Iterable[str] = DEFAULT_QUEUES) -> None:
+def publish_message(message: str, queues: Iterable[str] = DEFAULT_QUEUES, message_id: Optional[str] = None) -> None:
     """
     Publica el mismo mensaje en múltiples colas (por defecto: notificaciones_queue y entradas_events).
     Recibe str (tú ya haces json.dumps en el publisher).
+    Todas las copias llevan el mismo message_id para que los consumidores descarten duplicados.
     """
+    message_id = message_id or str(uuid.uuid4())
     connection = None
     try:
         connection, channel = _open_channel()
@@ -28,7 +31,7 @@ def publish_message(message: str, queues: Iterable[str] = DEFAULT_QUEUES) -> Non
                 exchange="",
                 routing_key=queue_name,
                 body=body,
-                properties=pika.BasicProperties(delivery_mode=2),  # persistente
+                properties=pika.BasicProperties(delivery_mode=2, message_id=message_id),  # persistente
             )
             print(f"[RabbitMQ] 📤 Mensaje enviado a '{queue_name}'")
 
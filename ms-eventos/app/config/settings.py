@@ -9,6 +9,10 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
 
+    # Lecturas históricas (AS OF SYSTEM TIME) para el listado público de eventos
+    LECTURAS_HISTORICAS: bool = False  # Permite que cualquier réplica atienda el listado
+    LECTURAS_ANTIGUEDAD: str = ""  # Antigüedad fija (p. ej. '-5s'); vacía = follower_read_timestamp()
+
     class Config:
         env_file = ".env"
 
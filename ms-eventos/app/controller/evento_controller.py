@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, UploadFile, File
 from fastapi.responses import Response
 from sqlalchemy.orm import Session
-from app.config.database import SessionLocal
+from app.config.database import SessionLocal, SessionLecturaLocal
 from app.dto.evento_dto import EventoCreateDTO, EventoUpdateDTO, EventoOutDTO
 from app.service import evento_service
 from app.security.dependencies import get_current_user, require_admin
@@ -20,12 +20,20 @@ def get_db():
     finally:
         db.close()
 
+def get_db_lectura():
+    # Listados públicos: con LECTURAS_HISTORICAS los sirve cualquier réplica
+    db = SessionLecturaLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
 @router.post("/post-evento", response_model=EventoOutDTO)
 def crear(dto: EventoCreateDTO, db: Session = Depends(get_db), _: dict = Depends(require_admin)):
     return evento_service.crear_evento(db, dto)
 
 @router.get("/get-eventospublicados", response_model=List[EventoOutDTO])
-def publicados(db: Session = Depends(get_db)):
+def publicados(db: Session = Depends(get_db_lectura)):
     return evento_service.listar_publicados(db)
 
 @router.get("/get-eventos", response_model=List[EventoOutDTO])
@@ -46,6 +54,11 @@ def obtener(id: int, db: Session = Depends(get_db)):
         raise HTTPException(404, "Evento no encontrado")
     return evento
 
+@router.post("/get-eventos-lote", response_model=List[EventoOutDTO])
+def obtener_lote(ids: List[int] = Body(..., max_length=500), db: Session = Depends(get_db)):
+    """Obtiene varios eventos por ID en una sola consulta (usado por ms-entradas)"""
+    return evento_service.obtener_eventos_por_ids(db, ids)
+
 @router.put("/update-evento/{id}", response_model=EventoOutDTO)
 def actualizar(id: int, dto: EventoUpdateDTO, db: Session = Depends(get_db), _: dict = Depends(require_admin)):
     return evento_service.actualizar_evento(db, id, dto)
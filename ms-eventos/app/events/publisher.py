@@ -30,6 +30,20 @@ def publicar_evento_cancelado(evento_id: int):
     mensaje = {"tipo": "evento_cancelado", "payload": {"evento_id": evento_id}}
     publish_message(json.dumps(mensaje))
 
-def publicar_evento_finalizado(nombre: str):
-    mensaje = {"evento": "evento_finalizado", "nombre": nombre}
+def publicar_evento_actualizado(evento_id: int, aforo: int, delta_aforo: int, titulo: str):
+    # Sólo interesa a ms-entradas: ajusta las entradas a la diferencia de aforo y el nombre desnormalizado
+    mensaje = {
+        "tipo": "evento_actualizado",
+        "payload": {
+            "evento_id": evento_id,
+            "aforo": aforo,
+            "delta_aforo": delta_aforo,
+            "titulo": titulo
+        }
+    }
+    publish_message(json.dumps(mensaje), queues=("entradas_events",))
+
+def publicar_evento_finalizado(evento_id: int, nombre: str):
+    # ms-entradas archiva las entradas del evento en entradas_archivo
+    mensaje = {"tipo": "evento_finalizado", "payload": {"evento_id": evento_id, "nombre": nombre}}
     publish_message(json.dumps(mensaje))
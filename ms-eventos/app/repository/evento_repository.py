@@ -63,6 +63,9 @@ def obtener_por_id(db: Session, id: int):
         print(f"🔍 Eventos existentes: {[(e.id, e.titulo) for e in eventos_existentes]}")
     return evento
 
+def obtener_por_ids(db: Session, ids: list):
+    return db.query(Evento).filter(Evento.id.in_(ids)).all()
+
 def actualizar_evento(db: Session, id: int, data: EventoUpdateDTO):
     print(f"🔍 Intentando actualizar evento con ID: {id}")
     print(f"🔍 Datos a actualizar: {data.model_dump(exclude_unset=True)}")
@@ -3,7 +3,12 @@ from sqlalchemy import func
 from app.model.evento_model import Evento
 from app.dto.evento_dto import EventoCreateDTO, EventoUpdateDTO
 from app.repository import evento_repository
-from app.events.publisher import publicar_evento_cancelado, publicar_evento_creado, publicar_evento_finalizado
+from app.events.publisher import (
+    publicar_evento_cancelado,
+    publicar_evento_creado,
+    publicar_evento_actualizado,
+    publicar_evento_finalizado
+)
 
 
 def crear_evento(db: Session, evento: EventoCreateDTO):
@@ -18,8 +23,23 @@ def listar_todos(db: Session):
 def obtener_evento(db: Session, id: int):
     return evento_repository.obtener_por_id(db, id)
 
+def obtener_eventos_por_ids(db: Session, ids: list):
+    return evento_repository.obtener_por_ids(db, list(set(ids)))
+
 def actualizar_evento(db: Session, id: int, data: EventoUpdateDTO):
-    return evento_repository.actualizar_evento(db, id, data)
+    evento_existente = evento_repository.obtener_por_id(db, id)
+    if not evento_existente:
+        return None
+    aforo_anterior, titulo_anterior = evento_existente.aforo, evento_existente.titulo
+
+    evento = evento_repository.actualizar_evento(db, id, data)
+    # Las entradas sólo existen desde la publicación; antes no hay nada que ajustar en ms-entradas
+    if evento and evento.estado == "PUBLICADO" and (evento.aforo, evento.titulo) != (aforo_anterior, titulo_anterior):
+        try:
+            publicar_evento_actualizado(evento.id, evento.aforo, evento.aforo - aforo_anterior, evento.titulo)
+        except Exception as e:
+            print(f"⚠️ Error al notificar evento actualizado: {e}")
+    return evento
 
 def desactivar_evento(db: Session, id: int):
     return evento_repository.cambiar_estado(db, id, "CANCELADO")
@@ -58,7 +78,7 @@ def publicar_evento(db: Session, id: int):
 def finalizar_evento(db: Session, id: int):
     evento = evento_repository.cambiar_estado(db, id, "FINALIZADO")
     if evento:
-        publicar_evento_finalizado(evento.titulo)  # ✅ notificar evento finalizado
+        publicar_evento_finalizado(evento.id, evento.titulo)  # ✅ notificar evento finalizado
     return evento
 
 def eliminar_evento(db: Session, id: int):
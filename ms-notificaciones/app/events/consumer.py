@@ -53,6 +53,11 @@ def start_consumer():
                 db = SessionLocal()
                 procesar_evento_rabbit(db, data)
                 db.close()
+            elif tipo == "evento_finalizado":
+                print("🏁 Procesando evento finalizado")
+                db = SessionLocal()
+                procesar_evento_rabbit(db, data)
+                db.close()
             else:
                 print(f"⚠️ Tipo de evento desconocido: {tipo}")
                 return
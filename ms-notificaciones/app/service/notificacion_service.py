@@ -57,6 +57,14 @@ def procesar_evento_rabbit(db: Session, payload: dict):
                 mensaje=data.get("mensaje", "Operación realizada"),
                 tipo=data.get("tipo", "info")
             )
+        elif tipo == "evento_finalizado":
+            # Evento finalizado en ms-eventos: se avisa a todos los usuarios
+            dto = NotificacionCreateDTO(
+                usuario_id=None,  # Broadcast
+                titulo="Evento finalizado",
+                mensaje=f"El evento {data.get('nombre')} ha finalizado",
+                tipo="info"
+            )
         else:
             print(f"⚠️ Tipo de evento desconocido: {tipo}")
             return